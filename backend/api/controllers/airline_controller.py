@@ -1,4 +1,5 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from datetime import datetime, timedelta, date
 from ..models import Route_section
 from ..models.aircraft import Aircraft
@@ -15,6 +16,11 @@ from ..query.airport_query import get_airport_by_iata_code
 from ..query.route_query import get_route_by_airport, find_reverse_route, get_route
 from ..query.flight_query import get_routes_assigned_to_aircraft, check_aircraft_schedule_conflicts,get_route_totals, get_route_class_distribution, get_flight_totals, get_flight_class_distribution
 from ..utils.geo import *
+from ..utils.reference_cache import reference_cache
+from ..utils.cache import analytics_cache
+from ..query.analytics_query import get_revenue_timeseries, get_flight_revenue_timeseries, get_performance_analytics
+from ..query.fare_query import rebuild_fares, build_fares
+from ..utils.data_versions import bump_versions, get_versions, ALL_SCOPE
 
 
 class Airline_controller:
@@ -26,7 +32,9 @@ class Airline_controller:
         if get_airline_by_iata_code(self.session,iata_code):
             return {"message": "airline already exists"}, 400
         else:
-            return insert_airline(self.session,iata_code, name), 201
+            response = insert_airline(self.session,iata_code, name)
+            reference_cache.bump("airlines")
+            return response, 201
 
     def insert_aircraft(self,airline_code,id_aircraft):
 
@@ -57,6 +65,8 @@ class Airline_controller:
             aircraft = self.session.get(Aircraft_airline, id_aircraft_airline)
             if aircraft:
                 self.session.delete(aircraft)
+                # the capacity of the performance analytics counts the cells of the fleet
+                bump_versions(self.session, f"aircraft:{id_aircraft_airline}", f"analytics:{aircraft.airline_code}")
                 self.session.commit()
             return {"message": "aircraft deleted from the fleet successfully"}, 200
 
@@ -89,75 +99,68 @@ class Airline_controller:
                     if num_seat_matrix + num_seat_aircraft > get_max_economy_seats(self.session, id_aircraft_airline):
                         return {"message": "exceeded the maximum number of seats available"}, 400
                     else:
+                        aircraft = self.session.get(Aircraft_airline, id_aircraft_airline)
+                        bump_versions(self.session, f"aircraft:{id_aircraft_airline}", f"analytics:{aircraft.airline_code}")
                         return insert_block_seat_map(self.session, matrix, id_aircraft_airline, id_class)
 
 
 
     def clone_aircraft_seat_map(self, source_id, target_id):
-        
+        return self.clone_aircraft_seat_map_many(source_id, [target_id])
+
+    def clone_aircraft_seat_map_many(self, source_id, target_ids):
+        """Copy the seat map of one aircraft to every target in one transaction, all of them or none."""
         source_aircraft = self.session.get(Aircraft_airline, source_id)
-        target_aircraft = self.session.get(Aircraft_airline, target_id)
-        if source_aircraft is None or target_aircraft is None:
-            return {"message": "source_id or target_id not found"}, 404
-        
+        if source_aircraft is None:
+            return {"message": "source_id not found"}, 404
         source_model = self.session.get(Aircraft, source_aircraft.id_aircraft_model)
-        target_model = self.session.get(Aircraft, target_aircraft.id_aircraft_model)
-        if source_model is None or target_model is None:
+        if source_model is None:
             return {"message": "Aircraft model not found"}, 404
 
-        if source_model.cabin_max_cols != target_model.cabin_max_cols:
-            return {
-                "message": (
-                    f"Incompatible aircraft cabin layout: "
-                    f"source cols={source_model.cabin_max_cols}, "
-                    f"target cols={target_model.cabin_max_cols}"
-                )
-            }, 400
-
+        targets = self.session.execute(
+            select(Aircraft_airline.id_aircraft_airline, Aircraft_airline.airline_code, Aircraft.cabin_max_cols, Aircraft.max_seats)
+            .join(Aircraft, Aircraft.id_aircraft == Aircraft_airline.id_aircraft_model)
+            .where(Aircraft_airline.id_aircraft_airline.in_(target_ids))
+        ).all()
+        missing = sorted(set(target_ids) - {target.id_aircraft_airline for target in targets})
+        if missing:
+            return {"message": f"target_id not found: {', '.join(map(str, missing))}"}, 404
 
         num_seat_aircraft = number_seat_aircraft(self.session, source_id)
-        if num_seat_aircraft > target_model.max_seats:
-            return {
-                "message": (
-                    f"Source aircraft has {num_seat_aircraft} seats, "
-                    f"which exceeds target aircraft max_seats={target_model.max_seats}"
-                )
-            }, 400
-
-        source_cabins = get_aircraft_seat_map(self.session, source_id)
-        if not source_cabins:
-            return {"message": "No cabins found for source_id"}, 404
-
-        try:
-            if aircraft_exists_composition(self.session, target_id):
-                delete_aircraft_composition(self.session, target_id)
-
-            new_cabins = []
-
-            for source_cabin in source_cabins:
-                new_cabin = Cabin(
-                    rows=source_cabin.rows,
-                    cols=source_cabin.cols,
-                    id_aircraft=target_id,
-                    id_class=source_cabin.id_class  
-                )
-                self.session.add(new_cabin)
-                self.session.flush()  
-
-                for cell in source_cabin.cells:
-                    new_cell = Cell(
-                        id_cabin=new_cabin.id_cabin,
-                        x=cell.x,
-                        y=cell.y,
-                        is_seat=cell.is_seat
+        for target in targets:
+            if source_model.cabin_max_cols != target.cabin_max_cols:
+                return {
+                    "message": (
+                        f"Incompatible aircraft cabin layout: "
+                        f"source cols={source_model.cabin_max_cols}, "
+                        f"target {target.id_aircraft_airline} cols={target.cabin_max_cols}"
                     )
-                    self.session.add(new_cell)
-
-                new_cabins.append(new_cabin)
+                }, 400
+            if num_seat_aircraft > target.max_seats:
+                return {
+                    "message": (
+                        f"Source aircraft has {num_seat_aircraft} seats, "
+                        f"which exceeds target aircraft {target.id_aircraft_airline} max_seats={target.max_seats}"
+                    )
+                }, 400
 
+        try:
+            copied = clone_seat_map(self.session, source_id, list(target_ids))
+            if not copied:
+                return {"message": "No cabins found for source_id"}, 404
+            bump_versions(
+                self.session,
+                *(f"aircraft:{target_id}" for target_id in target_ids),
+                *{f"analytics:{target.airline_code}" for target in targets},
+            )
             self.session.commit()
 
-            return {"message": f"Operation successful, {len(new_cabins)} copied blocks"}, 201
+            if len(target_ids) == 1:
+                return {"message": f"Operation successful, {copied} copied blocks"}, 201
+            return {
+                "message": f"Operation successful, {copied} copied blocks on {len(target_ids)} aircraft",
+                "target_ids": list(target_ids),
+            }, 201
 
         except Exception as e:
             self.session.rollback()
@@ -334,6 +337,7 @@ class Airline_controller:
             prev_detail = new_detail
             next_departure_dt = datetime.combine(dummy_date, arrival_time) + timedelta(minutes=waiting_minutes)
 
+        bump_versions(self.session, f"routes:{airline_code}", f"analytics:{airline_code}")
         return {"message": f"Route {name_route} and return {name_route_return} created successfully"}, 201
 
     def change_deadline(self, code, end_date):
@@ -355,6 +359,7 @@ class Airline_controller:
             if inverse_route:
                 inverse_route.end_date = end_date
 
+        bump_versions(self.session, f"routes:{route.airline_iata_code}")
         self.session.commit()
 
         return {"message": "End date updated successfully"}, 200
@@ -467,6 +472,10 @@ class Airline_controller:
                 scheduled_arrival_day=ad["return_arrival"]
             ))
         self.session.add_all(flights_to_insert)
+        self.session.flush()
+        # priced now, so that search only reads the price table
+        build_fares(self.session, [flight.id_flight for flight in flights_to_insert])
+        bump_versions(self.session, f"flights:{route.airline_iata_code}", f"analytics:{route.airline_iata_code}")
         self.session.commit()
 
         return {
@@ -493,6 +502,7 @@ class Airline_controller:
         )
 
         self.session.add(new_class_price_policy)
+        rebuild_fares(self.session, airline_code=airline_code, id_class=id_class)
         self.session.commit()
         self.session.refresh(new_class_price_policy)
 
@@ -512,6 +522,7 @@ class Airline_controller:
             if fixed_markup is not None:
                 class_price_policy.fixed_markup = fixed_markup
 
+            rebuild_fares(self.session, airline_code=class_price_policy.airline_code, id_class=class_price_policy.id_class)
             self.session.commit()
 
         return {"message": "class price policy has been successfully modified."}, 201
@@ -566,6 +577,8 @@ class Airline_controller:
             return {"message": "route not found"}, 404
 
         route.base_price = base_price
+        rebuild_fares(self.session, route_code=route_code)
+        bump_versions(self.session, f"flights:{route.airline_iata_code}")
         self.session.commit()
         return {"message": "route base price has been successfully modified."}, 201
 
@@ -610,29 +623,74 @@ class Airline_controller:
             "class_distribution": class_distribution
         }, 200
 
+    def _analytics_version(self, airline_code: str) -> tuple:
+        """
+        Versions the analytics ETags are built from, read before the analytics
+        queries: the cached body is never older than the ETag it goes out with.
+        """
+        versions = get_versions(self.session, [ALL_SCOPE, f"analytics:{airline_code}"])
+        return tuple(versions.values())
+
+    def get_revenue_timeseries(self, airline_code: str, data: dict):
+        if self.session.get(Airline, airline_code) is None:
+            return {"message": "airline not found"}, 404
+
+        route_code = data.get("route_code")
+        id_flight = data.get("id_flight")
+
+        if route_code is not None:
+            route = self.session.get(Route, route_code)
+            if route is None or route.airline_iata_code != airline_code:
+                return {"message": "route not found"}, 404
+
+        if id_flight is not None:
+            flight = self.session.get(Flight, id_flight)
+            if flight is None or flight.route.airline_iata_code != airline_code:
+                return {"message": "flight not found"}, 404
+
+        def compute():
+            if id_flight is not None:
+                return get_flight_revenue_timeseries(
+                    self.session, airline_code, id_flight, data["bucket"], data.get("start_date"), data.get("end_date")
+                )
+            return get_revenue_timeseries(
+                self.session, airline_code, data["bucket"], data["axis"],
+                data.get("start_date"), data.get("end_date"), route_code
+            )
 
+        key = ("timeseries", tuple(sorted(data.items())))
+        series = analytics_cache.get_or_compute(airline_code, self._analytics_version(airline_code), key, compute)
 
+        return {
+            "airline_code": airline_code,
+            "bucket": data["bucket"],
+            "axis": data["axis"],
+            "route_code": route_code,
+            "id_flight": id_flight,
+            "series": series
+        }, 200
 
+    def get_performance_analytics(self, airline_code: str, data: dict):
+        if self.session.get(Airline, airline_code) is None:
+            return {"message": "airline not found"}, 404
 
+        route_code = data.get("route_code")
+        if route_code is not None:
+            route = self.session.get(Route, route_code)
+            if route is None or route.airline_iata_code != airline_code:
+                return {"message": "route not found"}, 404
 
+        def compute():
+            return get_performance_analytics(
+                self.session, airline_code, data["level"],
+                data.get("start_date"), data.get("end_date"), route_code
+            )
 
+        key = ("performance", tuple(sorted(data.items())))
+        analytics = analytics_cache.get_or_compute(airline_code, self._analytics_version(airline_code), key, compute)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+        return {
+            "airline_code": airline_code,
+            "level": data["level"],
+            "analytics": analytics
+        }, 200
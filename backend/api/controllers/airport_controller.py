@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from ..models.airport import Airport
 from ..models.city import City
 from ..query.airport_query import *
+from ..utils.reference_cache import reference_cache
 
 
 class Airport_controller:
@@ -34,6 +35,7 @@ class Airport_controller:
             self.session.add(new_airport)
             self.session.commit()
             self.session.refresh(new_airport)
+            reference_cache.bump("airports")
 
             return {"message": "Airport created successfully", "airport": new_airport.to_dict()}, 201
 
@@ -111,6 +113,7 @@ class Airport_controller:
                     return {"message": "City not found"}, 404
 
             self.session.commit()
+            reference_cache.bump("airports")
 
             return {"message": "Airport updated successfully", "airport": airport.to_dict()}, 200
 
@@ -127,6 +130,7 @@ class Airport_controller:
 
             self.session.delete(airport)
             self.session.commit()
+            reference_cache.bump("airports")
 
             return {"message": "Airport deleted successfully"}, 200
 
@@ -7,25 +7,48 @@ from ..models.baggage import Baggage
 from ..models.passenger import Passenger
 from ..models.additional_baggage import Additional_baggage
 from ..models.passenger_ticket import Passenger_ticket
-from ..query.flight_query import get_flight_for_search, get_aircraft_by_seat_id, get_class_from_seat, get_flight_seat_blocks
-from ..query.airline_query import get_airline_class_multiplier
-from ..query.baggage_query import get_baggage_role_by_type_airline
+from ..query.flight_query import get_flight_for_search, get_seat_cabin, get_flight_seat_blocks, get_aircraft_seats_in, get_booked_seats_in, get_class_cabin_cells, get_booked_seats
+from ..query.baggage_query import get_baggage_role_by_type_airline, get_extra_baggage_prices
 from ..query.passenger_query import get_passenger_id_by_email
+from ..query.revenue_query import add_ticket_to_revenue_rollup
+from ..query.fare_query import get_flight_fares, lock_flight_fare, sell_fare
+from ..utils.fare_quote import fare_quotes, Quote_invalid
+from ..utils.seat_holds import seat_holds, Seat_hold_conflict, Seat_hold_limit
+from ..utils.seat_allocator import Cabin_grid, allocate_seats
+from ..utils.data_versions import bump_versions
+from datetime import datetime
+
+
+class Seat_unavailable(ValueError):
+    """The seat was taken by another booking."""
+
 
 class Flight_controller:
 
     def __init__(self, session: Session):
         self.session = session
-
-    def flights_price_policy(self,flights, id_class):
+        self.booked_airlines = set()
+        # (id_flight, id_seat, hold token) of the holds book turned into tickets, released after the commit
+        self.converted_holds = []
+
+    def flights_fares(self, flights, id_class):
+        """
+        Quote every flight at the current bucket of its price table row for the
+        class, with a signed quote that book honours for FARE_QUOTE_TTL seconds
+        while the class stays at that bucket (None when quotes are disabled).
+        """
+        fares = get_flight_fares(self.session, [flight["id_flight"] for flight in flights], id_class)
+        baggage_prices = get_extra_baggage_prices(self.session, {flight["airline"]["iata_code"] for flight in flights})
         for flight in flights:
-            airline_code = flight["airline"]["iata_code"]
-            policy = get_airline_class_multiplier(self.session, airline_code, id_class)
-            if policy:
-                multiplier = policy[0]
-                markup = policy[1]
-                flight["flight_price"] *= multiplier
-                flight["flight_price"] += markup
+            fare = fares.get(flight["id_flight"])
+            if fare:
+                flight["flight_price"] = fare["price"]
+                flight["fare_bucket"] = fare["bucket"]
+                flight["seats_left"] = fare["seats_left"]
+                flight["quote"] = fare_quotes.sign(
+                    flight["id_flight"], id_class, fare["price"], fare["bucket"],
+                    baggage_prices.get(flight["airline"]["iata_code"], {}),
+                )
 
 
     def get_flights(self, departure_airport_code, arrival_airport_code, round_trip_flight, direct_flights, departure_date_outbound, departure_date_return, id_class):
@@ -44,7 +67,7 @@ class Flight_controller:
             )
         ]
 
-        self.flights_price_policy(data_outbound, id_class)
+        self.flights_fares(data_outbound, id_class)
 
         data_return = []
         response = {"outbound_flights": data_outbound}
@@ -55,13 +78,79 @@ class Flight_controller:
                     self.session, arrival_airport_code, departure_airport_code, departure_date_return, direct_flights, id_class
                 )
             ]
-            self.flights_price_policy(data_return, id_class)
+            self.flights_fares(data_return, id_class)
             response["return_flights"] = data_return
 
         return response, 200
 
 
-    def book(self, id_buyer: int, tickets):
+    def hold_seats(self, id_flight: int, id_seats: list[int], id_user: int):
+        flight = self.session.get(Flight, id_flight)
+        if flight is None:
+            return {"message": "Flight not found"}, 404
+
+        id_seats = sorted(set(id_seats))
+        if len(id_seats) > seat_holds.max_seats:
+            return {"message": f"At most {seat_holds.max_seats} seats can be held at once"}, 400
+
+        not_on_flight = set(id_seats) - get_aircraft_seats_in(self.session, flight.id_aircraft, id_seats)
+        if not_on_flight:
+            return {"message": "The selected seats do not belong to the selected flight", "seats": sorted(not_on_flight)}, 400
+
+        booked = get_booked_seats_in(self.session, id_flight, id_seats)
+        if booked:
+            return {"message": "Seats already occupied", "seats": sorted(booked)}, 409
+
+        try:
+            token, expires_at = seat_holds.hold(id_flight, id_seats, id_user)
+        except Seat_hold_conflict as e:
+            return {"message": str(e), "seats": e.seats}, 409
+        except Seat_hold_limit as e:
+            return {"message": str(e)}, 429
+
+        return {"hold_token": token, "id_flight": id_flight, "seats": id_seats, "expires_at": expires_at}, 201
+
+
+    def auto_assign_seats(self, id_flight: int, party_size: int, id_class: int, keep_together: bool,
+                          preference: str | None, hold: bool, id_user: int | None = None):
+        """With hold the seats are held for id_user, the authenticated customer."""
+        flight = self.session.get(Flight, id_flight)
+        if flight is None:
+            return {"message": "Flight not found"}, 404
+
+        cabins = {}
+        for id_cabin, id_cell, x, y, is_seat in get_class_cabin_cells(self.session, flight.id_aircraft, id_class):
+            cabins.setdefault(id_cabin, []).append((id_cell, x, y, is_seat))
+        if not cabins:
+            return {"message": "The flight has no seats in this class"}, 404
+
+        taken = get_booked_seats(self.session, id_flight) | seat_holds.held_seats(id_flight)
+        grids = [Cabin_grid(id_cabin, cells, taken) for id_cabin, cells in cabins.items()]
+        result = allocate_seats(grids, party_size, keep_together, preference)
+        if result is None:
+            return {"message": f"Fewer than {party_size} free seats left in this class"}, 409
+
+        response = {
+            "id_flight": id_flight,
+            "arrangement": result["arrangement"],
+            "seats": [{"id_cell": id_cell, "x": x, "y": y} for id_cell, x, y in result["seats"]],
+        }
+        if hold:
+            if party_size > seat_holds.max_seats:
+                return {"message": f"At most {seat_holds.max_seats} seats can be held at once"}, 400
+            try:
+                token, expires_at = seat_holds.hold(id_flight, [id_cell for id_cell, _, _ in result["seats"]], id_user)
+            except Seat_hold_conflict as e:
+                return {"message": f"{e}, try again", "seats": e.seats}, 409
+            except Seat_hold_limit as e:
+                return {"message": str(e)}, 429
+            response["hold_token"] = token
+            response["expires_at"] = expires_at
+        return response, 200
+
+
+    def book(self, id_buyer: int, tickets, id_user: int | None = None):
+        """id_user: the authenticated customer, who must own the holds of held seats."""
         buyer = self.session.get(User, id_buyer)
         if buyer is None:
             raise ValueError("User not found")
@@ -71,27 +160,48 @@ class Flight_controller:
             if flight is None:
                 raise ValueError("Flight not found")
 
-            id_aircraft = get_aircraft_by_seat_id(self.session, ticket.ticket_info.id_seat)
-            if id_aircraft is None:
+            seat_cabin = get_seat_cabin(self.session, ticket.ticket_info.id_seat)
+            if seat_cabin is None:
                 raise ValueError("Seat not found")
 
+            id_aircraft, id_class = seat_cabin
             if id_aircraft != flight.id_aircraft:
                 raise ValueError("The selected seat does not belong to the selected flight")
 
+            quote = None
+            if ticket.ticket_info.quote is not None:
+                quote = fare_quotes.load(ticket.ticket_info.quote)
+                if quote["id_flight"] != flight.id_flight or quote["id_class"] != id_class:
+                    raise Quote_invalid("The fare quote is for another flight or class")
+
+            # taken first, so that bookings of the same class check the seats one at a time
+            fare = lock_flight_fare(self.session, flight.id_flight, id_class) if id_class is not None else None
+            if quote is not None and (fare is None or fare.bucket != quote["bucket"]):
+                # a quote only holds at the bucket it was priced at, the sales since may have moved it
+                raise Quote_invalid("The fare changed since it was quoted, search the flight again")
+
+            holder = seat_holds.holder(flight.id_flight, ticket.ticket_info.id_seat)
+            if holder is not None:
+                hold_token, id_holder = holder
+                # the token alone is not enough, it has to come from the customer who made the hold
+                if hold_token != ticket.ticket_info.hold_token or id_holder != id_user:
+                    raise Seat_unavailable(f"Seat {ticket.ticket_info.id_seat} is held by another customer")
+                self.converted_holds.append((flight.id_flight, ticket.ticket_info.id_seat, hold_token))
+
             occupied_seats = get_flight_seat_blocks(self.session, ticket.ticket_info.id_flight)
             for block in occupied_seats:
                 for seat in block["seats"]:
                     if seat["id_cell"] == ticket.ticket_info.id_seat:
-                        raise ValueError(f"Seat {ticket.ticket_info.id_seat} is already occupied")
+                        raise Seat_unavailable(f"Seat {ticket.ticket_info.id_seat} is already occupied")
 
-            id_class = get_class_from_seat(self.session, ticket.ticket_info.id_seat)
-            policy = get_airline_class_multiplier(self.session, flight.route.airline_iata_code, id_class)
-            price = flight.route.base_price
-            if policy:
-                multiplier = policy[0]
-                markup = policy[1]
-                price *= multiplier
-                price += markup
+            if fare is not None:
+                price = sell_fare(fare)
+            else:
+                # seat in a cabin without a class: no class policy applies, route base price as before
+                price = flight.route.base_price
+            if quote is not None:
+                # same bucket, so the displayed price is charged even if the route price changed since
+                price = quote["price"]
 
             new_ticket = Ticket(
                 id_flight = flight.id_flight,
@@ -103,19 +213,26 @@ class Flight_controller:
             self.session.flush()
 
             for baggage_ in ticket.ticket_info.additional_baggage:
-                baggage = self.session.get(Baggage, baggage_.id_baggage)
-                if baggage is None:
-                    raise ValueError("Baggage not found")
+                if quote is not None:
+                    baggage_price = quote["baggage_prices"].get(baggage_.id_baggage)
+                    if baggage_price is None:
+                        raise ValueError("You cannot purchase this type of baggage.")
+                else:
+                    baggage = self.session.get(Baggage, baggage_.id_baggage)
+                    if baggage is None:
+                        raise ValueError("Baggage not found")
 
-                roles = get_baggage_role_by_type_airline(self.session, baggage_.id_baggage, flight.route.airline_iata_code)
+                    roles = get_baggage_role_by_type_airline(self.session, baggage_.id_baggage, flight.route.airline_iata_code)
 
-                if roles is None:
-                    raise ValueError("Baggage role not found")
+                    if roles is None:
+                        raise ValueError("Baggage role not found")
 
-                if roles.allow_extra != True:
-                    raise ValueError("You cannot purchase this type of baggage.")
+                    if roles.allow_extra != True:
+                        raise ValueError("You cannot purchase this type of baggage.")
 
-                price += baggage_.count * roles.base_price
+                    baggage_price = roles.base_price
+
+                price += baggage_.count * baggage_price
 
                 new_additional_baggage = Additional_baggage(
                     id_ticket = new_ticket.id_ticket,
@@ -127,6 +244,16 @@ class Flight_controller:
                 self.session.flush()
 
             new_ticket.price = price
+            self.booked_airlines.add(flight.route.airline_iata_code)
+            add_ticket_to_revenue_rollup(
+                self.session,
+                flight.route.airline_iata_code,
+                flight.route_code,
+                flight.scheduled_departure_day.date(),
+                datetime.utcnow().date(),
+                id_class,
+                price,
+            )
             id_passenger = get_passenger_id_by_email(self.session, ticket.passenger_info.email)
             if id_passenger is None:
                 new_passenger = Passenger(
@@ -152,6 +279,11 @@ class Flight_controller:
             self.session.add(new_passenger_ticket)
             self.session.flush()
 
+        bump_versions(
+            self.session,
+            *(f"flight:{ticket.ticket_info.id_flight}" for ticket in tickets),
+            *(f"analytics:{airline_code}" for airline_code in self.booked_airlines),
+        )
         return {"message": "The tickets have been successfully purchased."}, 200
 
 
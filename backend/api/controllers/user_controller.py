@@ -3,11 +3,10 @@ from flask import jsonify
 from ..models import Airline
 from ..models.user import User
 from ..models.role import Role
-from ..utils.blacklist import blacklisted_tokens
 from ..query.user_query import get_user_by_email
 from ..query.flight_query import get_flights_by_user_id
 from sqlalchemy.orm import Session
-from werkzeug.security import generate_password_hash, check_password_hash
+from ..utils.password import password_hasher, Password_hasher_busy
 from flask_jwt_extended import create_access_token, get_jwt
 from datetime import datetime, timedelta
 
@@ -21,7 +20,10 @@ class User_controller:
         if get_user_by_email(self.session,data['email']):
             return {"message": "Email already registered"}, 409
 
-        hashed_password = generate_password_hash(data['password'])
+        try:
+            hashed_password = password_hasher.hash(data['password'])
+        except Password_hasher_busy:
+            return {"message": "Too many requests, retry shortly"}, 503
 
         new_user = User(
             name=data['name'],
@@ -41,8 +43,18 @@ class User_controller:
 
     def login_user(self, email:str, password:str):
         user = self.session.query(User).filter_by(email=email).first()
-        if (not user) or (not check_password_hash(user.password, password)):
-            return {"message": "Email or Password wrong"}, 400
+        try:
+            if (not user) or (not password_hasher.verify(user.password, password)):
+                return {"message": "Email or Password wrong"}, 400
+        except Password_hasher_busy:
+            return {"message": "Too many requests, retry shortly"}, 503
+
+        if password_hasher.needs_rehash(user.password):
+            try:
+                user.password = password_hasher.hash(password)
+                self.session.commit()
+            except Password_hasher_busy:
+                pass  # keep the old hash, it is upgraded on a later login
 
         access_token = create_access_token(identity=str(user.id_user),additional_claims={"role": user.role.name, "airline_code": user.airline_code})
         return {"access_token": access_token}, 200
@@ -89,12 +101,28 @@ class User_controller:
         self.session.commit()
         return {"message": "airline assigned to the user"}, 201
 
-    def get_user_flights(self, id_user):
+    def get_user_flights(self, id_user, when="all", page=None, per_page=20):
         user = self.session.get(User, id_user)
         if user is None:
             return {"message": "User not found"}, 404
-        flights = get_flights_by_user_id(self.session, id_user)
-        return flights, 200
+
+        if when not in ("all", "upcoming", "past"):
+            return {"message": "when must be one of: all, upcoming, past"}, 400
+
+        if page is not None and (page < 1 or per_page < 1):
+            return {"message": "page and per_page must be positive"}, 400
+
+        flights, total = get_flights_by_user_id(self.session, id_user, when, page, per_page)
+        if page is None:
+            return flights, 200
+
+        return {
+            "flights": flights,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": (total + per_page - 1) // per_page
+        }, 200
         #return {"flight": flights}, 200
 
 
@@ -1,5 +1,6 @@
 from .base import Base
 from .role import Role
+from .user import User
 from .country import Country
 from .state import State
 from .city import City
@@ -7,6 +8,7 @@ from .airport import Airport
 from .manufacturer import Manufacturer
 from .aircraft import Aircraft
 from .airline import Airline
+from .aircraft_airlines import Aircraft_airline
 from .class_seat import Class_seat
 from .cabin import Cabin
 from .cell import Cell
@@ -22,4 +24,9 @@ from .class_price_policy import Class_price_policy
 from .baggage import Baggage
 from .baggage_role import Baggage_role
 from .class_baggage_policy import Class_baggage_policy
-from .additional_baggage import Additional_baggage
\ No newline at end of file
+from .additional_baggage import Additional_baggage
+from .revoked_token import Revoked_token
+from .revenue_daily import Revenue_daily
+from .flight_fare import Flight_fare
+from .seat_hold import Seat_hold
+from .data_version import Data_version
\ No newline at end of file
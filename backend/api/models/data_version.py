@@ -0,0 +1,15 @@
+from .base import Base
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, Integer
+
+class Data_version(Base):
+    __tablename__ = "data_versions"
+
+    # e.g. "flight:42", "aircraft:3", "routes:AZ"; "*" moves every ETag at once
+    scope: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Data_version(scope={self.scope}, version={self.version})"
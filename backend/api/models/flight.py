@@ -48,7 +48,7 @@ class Flight(Base):
                 "iata_code": self.route.airline.iata_code,
                 "name": self.route.airline.name
             },
-            "scheduled_departure_day": self.scheduled_departure_day.isoformat(),
-            "scheduled_arrival_day": self.scheduled_arrival_day.isoformat(),
+            "scheduled_departure_day": self.scheduled_departure_day,
+            "scheduled_arrival_day": self.scheduled_arrival_day,
             "sections": [rd.to_dict_search() for rd in self.route.routes_details],
         }
\ No newline at end of file
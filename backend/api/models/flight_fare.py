@@ -0,0 +1,34 @@
+from .base import Base
+from datetime import datetime, date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, Date, ForeignKey, Integer, Float
+
+class Flight_fare(Base):
+    __tablename__ = "flight_fares"
+
+    id_flight: Mapped[int] = mapped_column(ForeignKey("flights.id_flight", ondelete="CASCADE"), primary_key=True)
+    id_class: Mapped[int] = mapped_column(ForeignKey("class.id_class", ondelete="CASCADE"), primary_key=True)
+
+    seats: Mapped[int] = mapped_column(Integer, nullable=False)
+    sold: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # route base price with the class price policy applied, the bucket multiplier goes on top
+    base_fare: Mapped[float] = mapped_column(Float, nullable=False)
+    bucket: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[float] = mapped_column(Float, nullable=False)
+    departure_day: Mapped[date] = mapped_column(Date, nullable=False)
+    priced_on: Mapped[date] = mapped_column(Date, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Flight_fare(id_flight={self.id_flight}, id_class={self.id_class}, sold={self.sold}/{self.seats}, bucket={self.bucket}, price={self.price})"
+
+    def to_dict(self):
+        return {
+            "id_flight": self.id_flight,
+            "id_class": self.id_class,
+            "seats": self.seats,
+            "sold": self.sold,
+            "bucket": self.bucket,
+            "price": self.price,
+            "priced_on": self.priced_on,
+        }
@@ -0,0 +1,33 @@
+from .base import Base
+from datetime import datetime, date
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import DateTime, Date, ForeignKey, Integer, Float
+
+class Revenue_daily(Base):
+    __tablename__ = "revenue_daily"
+
+    route_code: Mapped[str] = mapped_column(ForeignKey("routes.code", ondelete="CASCADE"), primary_key=True)
+    flight_day: Mapped[date] = mapped_column(Date, primary_key=True)
+    sale_day: Mapped[date] = mapped_column(Date, primary_key=True)
+    # cabins without a class are rolled up under 0
+    id_class: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    airline_code: Mapped[str] = mapped_column(ForeignKey("airlines.iata_code", ondelete="CASCADE"), nullable=False, index=True)
+
+    tickets: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"Revenue_daily(route_code={self.route_code}, flight_day={self.flight_day}, sale_day={self.sale_day}, id_class={self.id_class}, tickets={self.tickets}, revenue={self.revenue})"
+
+    def to_dict(self):
+        return {
+            "airline_code": self.airline_code,
+            "route_code": self.route_code,
+            "flight_day": self.flight_day,
+            "sale_day": self.sale_day,
+            "id_class": self.id_class,
+            "tickets": self.tickets,
+            "revenue": self.revenue,
+        }
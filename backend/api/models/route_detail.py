@@ -46,8 +46,8 @@ class Route_detail(Base):
     def to_dict_search(self):
         return {
              "id_airline_routes": self.id_airline_routes,
-             "departure_time": self.departure_time.strftime("%H:%M:%S"),
-             "arrival_time": self.arrival_time.strftime("%H:%M:%S"),
+             "departure_time": self.departure_time,
+             "arrival_time": self.arrival_time,
              "section": self.section.to_dict(),
              "next_id": self.next.id_airline_routes if self.next else None,
         }
\ No newline at end of file
@@ -0,0 +1,16 @@
+from .base import Base
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, ForeignKey
+
+class Seat_hold(Base):
+    __tablename__ = "seat_holds"
+
+    id_flight: Mapped[int] = mapped_column(ForeignKey("flights.id_flight", ondelete="CASCADE"), primary_key=True)
+    id_seat: Mapped[int] = mapped_column(ForeignKey("cells.id_cell", ondelete="CASCADE"), primary_key=True)
+    token: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    id_user: Mapped[int] = mapped_column(ForeignKey("users.id_user", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"Seat_hold(id_flight={self.id_flight}, id_seat={self.id_seat}, id_user={self.id_user}, expires_at={self.expires_at})"
@@ -1,5 +1,5 @@
 from flask_sqlalchemy.session import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, delete
 from sqlalchemy.orm import joinedload, selectinload
 
 from ..models.class_price_policy import Class_price_policy
@@ -10,6 +10,8 @@ from ..models.cabin import Cabin
 from ..models.cell import Cell
 from ..models.aircraft import Aircraft
 from ..models.class_price_policy import Class_price_policy
+from ..models.class_seat import Class_seat
+from ..utils.seat_map_codec import compact_cabin
 
 
 
@@ -92,30 +94,28 @@ def aircraft_exists_composition(session: Session, id_aircraft_airline: int)-> bo
 
 
 
+def insert_cells(session: Session, id_cabin: int, matrix: list[list[bool]]):
+    """The cells of a cabin in one executemany, without building an ORM object per cell."""
+    session.execute(
+        insert(Cell),
+        [
+            {"id_cabin": id_cabin, "x": x, "y": y, "is_seat": is_seat}
+            for y, row in enumerate(matrix)
+            for x, is_seat in enumerate(row)
+        ],
+    )
+
 def insert_block_seat_map(session: Session, matrix: list[list[bool]], id_aircraft_airline: int, id_class: int):
     rows = len(matrix)
     cols = len(matrix[0])
 
     try:
-        new_cabin = Cabin(
-            rows=rows, 
-            cols=cols,
-            id_aircraft = id_aircraft_airline,
-            id_class = id_class,
+        id_cabin = session.scalar(
+            insert(Cabin)
+            .values(rows=rows, cols=cols, id_aircraft=id_aircraft_airline, id_class=id_class)
+            .returning(Cabin.id_cabin)
         )
-        session.add(new_cabin)
-        session.flush()
-
-        cells = []
-        for y, row in enumerate(matrix):
-            for x, is_seat in enumerate(row):
-                cells.append(Cell(
-                    id_cabin=new_cabin.id_cabin,
-                    x=x,
-                    y=y,
-                    is_seat=is_seat
-                ))
-        session.add_all(cells)
+        insert_cells(session, id_cabin, matrix)
 
         session.commit()
         return {"message": "Block inserted successfully"}, 201
@@ -124,6 +124,49 @@ def insert_block_seat_map(session: Session, matrix: list[list[bool]], id_aircraf
         session.rollback()
         return {"message": str(e)}, 500
 
+def clone_seat_map(session: Session, source_id: int, target_ids: list[int]) -> int:
+    """
+    Copy the cabins of the source aircraft to every target, replacing theirs.
+    The cabins are inserted in one executemany; the cells with one
+    INSERT ... SELECT per source cabin, for all the targets at once, so they
+    never leave the database. Returns the number of cabins of the source; the
+    caller commits.
+    """
+    source_cabins = session.execute(
+        select(Cabin.id_cabin, Cabin.rows, Cabin.cols, Cabin.id_class)
+        .where(Cabin.id_aircraft == source_id)
+        .order_by(Cabin.id_cabin)
+    ).all()
+    if not source_cabins:
+        return 0
+
+    delete_aircraft_composition(session, target_ids)
+
+    params = [
+        {"rows": cabin.rows, "cols": cabin.cols, "id_aircraft": target_id, "id_class": cabin.id_class}
+        for target_id in target_ids
+        for cabin in source_cabins
+    ]
+    new_ids = session.scalars(
+        insert(Cabin).returning(Cabin.id_cabin, sort_by_parameter_order=True), params
+    ).all()
+
+    # new_ids runs target by target, each with the source cabins in order
+    for i, cabin in enumerate(source_cabins):
+        copies = new_ids[i::len(source_cabins)]
+        session.execute(
+            insert(Cell).from_select(
+                ["id_cabin", "x", "y", "is_seat"],
+                select(Cabin.id_cabin, Cell.x, Cell.y, Cell.is_seat)
+                .select_from(Cell)
+                .join(Cabin, Cabin.id_cabin.in_(copies))
+                .where(Cell.id_cabin == cabin.id_cabin)
+                # cabin by cabin, row by row, so that the ids of a cabin stay consecutive
+                .order_by(Cabin.id_cabin, Cell.y, Cell.x),
+            )
+        )
+    return len(source_cabins)
+
 def get_aircraft_seat_map(session: Session, id_aircraft_airline: int):
     stmt = (
         select(Cabin)
@@ -172,17 +215,47 @@ def get_aircraft_seat_map_JSON(session: Session, id_aircraft_airline: int):
 
     return seat_map
 
-def delete_aircraft_composition(session: Session, id_aircraft_airline: int):
+def get_aircraft_cells(session: Session, id_aircraft_airline: int) -> dict[int, dict]:
+    """The cabins of an aircraft by id_cabin, each with its cells as (id_cell, x, y, is_seat) rows, no ORM objects."""
     stmt = (
-        select(Cabin)
+        select(Cabin.id_cabin, Cabin.id_class, Class_seat.name, Cabin.rows, Cabin.cols,
+               Cell.id_cell, Cell.x, Cell.y, Cell.is_seat)
+        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .outerjoin(Class_seat, Class_seat.id_class == Cabin.id_class)
         .where(Cabin.id_aircraft == id_aircraft_airline)
-        .options(joinedload(Cabin.cells))
+        .order_by(Cabin.id_cabin)
     )
+    cabins = {}
+    for id_cabin, id_class, class_name, rows, cols, id_cell, x, y, is_seat in session.execute(stmt):
+        cabin = cabins.get(id_cabin)
+        if cabin is None:
+            cabin = cabins[id_cabin] = {
+                "id_class": id_class, "class_name": class_name, "rows": rows, "cols": cols, "cells": [],
+            }
+        cabin["cells"].append((id_cell, x, y, is_seat))
+    return cabins
+
+def get_aircraft_seat_map_compact(session: Session, id_aircraft_airline: int):
+    """get_aircraft_seat_map_JSON with the cells of each cabin as bitsets, see compact_cabin."""
+    seat_map = []
+    for id_cabin, cabin in get_aircraft_cells(session, id_aircraft_airline).items():
+        seat_map.append({
+            "id_cabin": id_cabin,
+            "id_class": cabin["id_class"],
+            "class_name": cabin["class_name"],
+            **compact_cabin(cabin["rows"], cabin["cols"], cabin["cells"]),
+        })
+    return seat_map
 
-    cabins = session.execute(stmt).unique().scalars().all()
-
-    for cabin in cabins:
-        session.delete(cabin)  #I don't need to delete the cells. i use DELETE CASCADE
+def delete_aircraft_composition(session: Session, aircraft_ids: list[int]):
+    """Drop the cabins of the aircraft and their cells, two set-based deletes."""
+    cabins = select(Cabin.id_cabin).where(Cabin.id_aircraft.in_(aircraft_ids))
+    session.execute(
+        delete(Cell).where(Cell.id_cabin.in_(cabins)).execution_options(synchronize_session=False)
+    )
+    session.execute(
+        delete(Cabin).where(Cabin.id_aircraft.in_(aircraft_ids)).execution_options(synchronize_session=False)
+    )
 
 
 def get_airline_class_price_policy(session: Session, airline_code: str):
@@ -0,0 +1,269 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select, func, cast, Date, Float
+from sqlalchemy.orm import Session, aliased
+
+from ..models.revenue_daily import Revenue_daily
+from ..models.flight import Flight
+from ..models.route import Route
+from ..models.ticket import Ticket
+from ..models.route_detail import Route_detail
+from ..models.route_section import Route_section
+from ..models.airport import Airport
+from ..models.cabin import Cabin
+from ..models.cell import Cell
+from ..models.aircraft_airlines import Aircraft_airline
+
+EARTH_RADIUS_KM = 6371
+
+
+def _bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _next_bucket(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+def _fill_buckets(rows, bucket: str, start_date=None, end_date=None):
+    """Turn (bucket, passengers, revenue) rows into a gap-free series."""
+    values = {row.bucket: row for row in rows}
+    if not values and (start_date is None or end_date is None):
+        return []
+
+    first = _bucket_start(start_date, bucket) if start_date else min(values)
+    last = _bucket_start(end_date, bucket) if end_date else max(values)
+
+    series = []
+    current = first
+    while current <= last:
+        row = values.get(current)
+        series.append({
+            "bucket": current.isoformat(),
+            "passengers": int(row.passengers) if row else 0,
+            "revenue": float(row.revenue) if row else 0.0,
+        })
+        current = _next_bucket(current, bucket)
+    return series
+
+
+def get_revenue_timeseries(session: Session, airline_code: str, bucket: str, axis: str = "sale",
+                           start_date=None, end_date=None, route_code: str | None = None):
+    """
+    Passengers and revenue per day/week/month for an airline, optionally narrowed
+    to one route, with one date_trunc GROUP BY over the revenue_daily rollup.
+    axis picks the date the buckets follow: the sale day or the flight day.
+    """
+    day_column = Revenue_daily.sale_day if axis == "sale" else Revenue_daily.flight_day
+    bucket_column = cast(func.date_trunc(bucket, day_column), Date).label("bucket")
+
+    stmt = (
+        select(
+            bucket_column,
+            func.sum(Revenue_daily.tickets).label("passengers"),
+            func.sum(Revenue_daily.revenue).label("revenue"),
+        )
+        .where(Revenue_daily.airline_code == airline_code)
+        .group_by(bucket_column)
+        .order_by(bucket_column)
+    )
+
+    if route_code is not None:
+        stmt = stmt.where(Revenue_daily.route_code == route_code)
+    if start_date is not None:
+        stmt = stmt.where(day_column >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(day_column <= end_date)
+
+    rows = session.execute(stmt).all()
+    return _fill_buckets(rows, bucket, start_date, end_date)
+
+
+def get_flight_revenue_timeseries(session: Session, airline_code: str, id_flight: int, bucket: str,
+                                  start_date=None, end_date=None):
+    """Sales curve of a single flight, bucketed by the day each ticket was sold."""
+    bucket_column = cast(func.date_trunc(bucket, Ticket.created_at), Date).label("bucket")
+
+    stmt = (
+        select(
+            bucket_column,
+            func.count(Ticket.id_ticket).label("passengers"),
+            func.coalesce(func.sum(Ticket.price), 0).label("revenue"),
+        )
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .where(
+            Ticket.id_flight == id_flight,
+            Route.airline_iata_code == airline_code
+        )
+        .group_by(bucket_column)
+        .order_by(bucket_column)
+    )
+
+    if start_date is not None:
+        stmt = stmt.where(Ticket.created_at >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Ticket.created_at < end_date + timedelta(days=1))
+
+    rows = session.execute(stmt).all()
+    return _fill_buckets(rows, bucket, start_date, end_date)
+
+
+def _sql_haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, same formula as utils.geo.haversine but evaluated by the database."""
+    dlat = func.radians(lat2 - lat1)
+    dlon = func.radians(lon2 - lon1)
+    a = (
+        func.power(func.sin(dlat / 2), 2)
+        + func.cos(func.radians(lat1)) * func.cos(func.radians(lat2)) * func.power(func.sin(dlon / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.atan2(func.sqrt(a), func.sqrt(1 - a))
+
+
+def _route_distances(airline_code: str):
+    """route_code -> total km over all its sections."""
+    departure = aliased(Airport)
+    arrival = aliased(Airport)
+    return (
+        select(
+            Route_detail.code_route.label("route_code"),
+            func.sum(_sql_haversine(
+                departure.latitude, departure.longitude, arrival.latitude, arrival.longitude
+            )).label("distance_km"),
+        )
+        .join(Route, Route.code == Route_detail.code_route)
+        .join(Route_section, Route_section.id_routes_section == Route_detail.id_route_section)
+        .join(departure, departure.iata_code == Route_section.code_departure_airport)
+        .join(arrival, arrival.iata_code == Route_section.code_arrival_airport)
+        .where(Route.airline_iata_code == airline_code)
+        .group_by(Route_detail.code_route)
+        .subquery()
+    )
+
+
+def _aircraft_capacities(airline_code: str):
+    """id_aircraft_airline -> number of seats, counted once per aircraft instead of once per flight."""
+    return (
+        select(
+            Cabin.id_aircraft.label("id_aircraft"),
+            func.count(Cell.id_cell).label("capacity"),
+        )
+        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .join(Aircraft_airline, Aircraft_airline.id_aircraft_airline == Cabin.id_aircraft)
+        .where(
+            Aircraft_airline.airline_code == airline_code,
+            Cell.is_seat == True
+        )
+        .group_by(Cabin.id_aircraft)
+        .subquery()
+    )
+
+
+def _flight_sales(airline_code: str):
+    """id_flight -> tickets sold and revenue."""
+    return (
+        select(
+            Ticket.id_flight.label("id_flight"),
+            func.count(Ticket.id_ticket).label("passengers"),
+            func.coalesce(func.sum(Ticket.price), 0).label("revenue"),
+        )
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .where(Route.airline_iata_code == airline_code)
+        .group_by(Ticket.id_flight)
+        .subquery()
+    )
+
+
+def _performance_metrics(seats: int, passengers: int, revenue: float, distance_km: float) -> dict:
+    """Load factor and per-km unit revenues from the raw totals."""
+    available_seat_km = seats * distance_km
+    revenue_passenger_km = passengers * distance_km
+    return {
+        "seats": seats,
+        "passengers": passengers,
+        "revenue": revenue,
+        "distance_km": round(distance_km, 1),
+        "load_factor": round(passengers / seats, 4) if seats else None,
+        "ask": round(available_seat_km, 1),
+        "rpk": round(revenue_passenger_km, 1),
+        "rask": round(revenue / available_seat_km, 4) if available_seat_km else None,
+        "yield_per_km": round(revenue / revenue_passenger_km, 4) if revenue_passenger_km else None,
+    }
+
+
+def get_performance_analytics(session: Session, airline_code: str, level: str = "route",
+                              start_date=None, end_date=None, route_code: str | None = None):
+    """
+    Load factor, RASK and yield per km for every flight or route of an airline.
+
+    Seat capacity, route distance and sales are each aggregated once in their
+    own subquery and joined to the flights, so the whole report is a single
+    statement whatever the number of flights.
+    """
+    distances = _route_distances(airline_code)
+    capacities = _aircraft_capacities(airline_code)
+    sales = _flight_sales(airline_code)
+
+    seats = func.coalesce(capacities.c.capacity, 0)
+    passengers = func.coalesce(sales.c.passengers, 0)
+    revenue = func.coalesce(sales.c.revenue, 0)
+    distance_km = func.coalesce(distances.c.distance_km, 0)
+
+    if level == "flight":
+        stmt = select(
+            Flight.id_flight,
+            Flight.route_code,
+            Flight.scheduled_departure_day,
+            seats.label("seats"),
+            passengers.label("passengers"),
+            revenue.label("revenue"),
+            cast(distance_km, Float).label("distance_km"),
+        ).order_by(Flight.scheduled_departure_day, Flight.id_flight)
+    else:
+        stmt = select(
+            Flight.route_code,
+            func.count(Flight.id_flight).label("flights"),
+            func.sum(seats).label("seats"),
+            func.sum(passengers).label("passengers"),
+            func.sum(revenue).label("revenue"),
+            cast(func.max(distance_km), Float).label("distance_km"),
+        ).group_by(Flight.route_code).order_by(Flight.route_code)
+
+    stmt = (
+        stmt
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(capacities, capacities.c.id_aircraft == Flight.id_aircraft)
+        .outerjoin(sales, sales.c.id_flight == Flight.id_flight)
+        .outerjoin(distances, distances.c.route_code == Flight.route_code)
+        .where(Route.airline_iata_code == airline_code)
+    )
+
+    if route_code is not None:
+        stmt = stmt.where(Flight.route_code == route_code)
+    if start_date is not None:
+        stmt = stmt.where(Flight.scheduled_departure_day >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(Flight.scheduled_departure_day < end_date + timedelta(days=1))
+
+    result = []
+    for row in session.execute(stmt).all():
+        metrics = _performance_metrics(int(row.seats or 0), int(row.passengers or 0),
+                                       float(row.revenue or 0), float(row.distance_km or 0))
+        if level == "flight":
+            item = {
+                "id_flight": row.id_flight,
+                "route_code": row.route_code,
+                "scheduled_departure_day": row.scheduled_departure_day.isoformat(),
+            }
+        else:
+            item = {"route_code": row.route_code, "flights": row.flights}
+        item.update(metrics)
+        result.append(item)
+    return result
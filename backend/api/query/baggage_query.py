@@ -14,6 +14,18 @@ def get_baggage_role_by_type_airline(session: Session, baggage_type, airline_cod
     result = session.scalars(stmt).first()
     return result
 
+def get_extra_baggage_prices(session: Session, airline_codes) -> dict:
+    """{airline_code: {id_baggage: base_price}} of the baggage types each airline sells as extra."""
+    stmt = (
+        select(Baggage_role.airline_code, Baggage_role.id_baggage_type, Baggage_role.base_price)
+        .where(Baggage_role.airline_code.in_(airline_codes), Baggage_role.allow_extra == True)
+        .order_by(Baggage_role.id_baggage_rules)
+    )
+    prices = {}
+    for airline_code, id_baggage, base_price in session.execute(stmt):
+        prices.setdefault(airline_code, {}).setdefault(id_baggage, base_price)
+    return prices
+
 def get_baggage_role_by_airline(session: Session, airline_code):
     stmt = select(Baggage_role).where(Baggage_role.airline_code == airline_code)
     result = session.scalars(stmt).all()
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from sqlalchemy import select, func, or_
+
+from ..models.ticket import Ticket
+from ..models.flight import Flight
+from ..models.route import Route
+from ..models.cell import Cell
+from ..models.cabin import Cabin
+from ..models.class_seat import Class_seat
+
+
+def ticket_facts():
+    return (
+        select(
+            Ticket.id_ticket,
+            Ticket.id_flight,
+            Flight.route_code,
+            Route.airline_iata_code.label("airline_code"),
+            Ticket.id_seat,
+            func.coalesce(Cabin.id_class, 0).label("id_class"),
+            Ticket.price,
+            Ticket.created_at,
+        )
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(Cell, Cell.id_cell == Ticket.id_seat)
+        .outerjoin(Cabin, Cabin.id_cabin == Cell.id_cabin)
+    ), Ticket.created_at, Ticket.id_ticket
+
+
+def flight_facts():
+    return (
+        select(
+            Flight.id_flight,
+            Flight.route_code,
+            Route.airline_iata_code.label("airline_code"),
+            Flight.id_aircraft,
+            Flight.scheduled_departure_day,
+            Flight.scheduled_arrival_day,
+            Flight.created_at,
+        )
+        .join(Route, Route.code == Flight.route_code)
+    ), Flight.created_at, Flight.id_flight
+
+
+def route_facts():
+    code = Route.code.label("route_code")
+    return (
+        select(
+            code,
+            Route.airline_iata_code.label("airline_code"),
+            Route.base_price,
+            Route.start_date,
+            Route.end_date,
+            Route.is_outbound,
+            Route.created_at,
+        )
+    ), Route.created_at, code
+
+
+def class_facts():
+    return (
+        select(
+            Class_seat.id_class,
+            Class_seat.code,
+            Class_seat.name,
+            Class_seat.created_at,
+        )
+    ), Class_seat.created_at, Class_seat.id_class
+
+
+# name -> builder returning (select statement, watermark column, key column)
+EXPORT_DATASETS = {
+    "tickets": ticket_facts,
+    "flights": flight_facts,
+    "routes": route_facts,
+    "classes": class_facts,
+}
+
+
+def export_statement(name: str, since=None, lookback: timedelta = timedelta(0)):
+    """
+    (statement, name of the key column) of the rows of the dataset from the
+    watermark on, oldest first so the watermark can advance as they stream.
+    created_at is stamped before the commit, so a row can show up after newer
+    ones were exported: the statement reaches lookback before since and the
+    caller drops the keys it already has. Rows without created_at have no
+    place on that timeline, they come last on every run.
+    """
+    stmt, created_at, key = EXPORT_DATASETS[name]()
+    if since is not None:
+        stmt = stmt.where(or_(created_at >= since - lookback, created_at.is_(None)))
+    return stmt.order_by(created_at.is_(None), created_at, key), key.name
@@ -0,0 +1,229 @@
+from datetime import date
+
+from sqlalchemy import select, func, delete, and_, true
+from sqlalchemy.orm import Session
+
+from ..models.flight_fare import Flight_fare
+from ..models.flight import Flight
+from ..models.route import Route
+from ..models.ticket import Ticket
+from ..models.cell import Cell
+from ..models.cabin import Cabin
+from ..models.class_price_policy import Class_price_policy
+from .revenue_query import _dialect_insert
+
+
+# multipliers on the class fare, cheapest first
+FARE_BUCKETS = (0.7, 0.8, 0.9, 1.0, 1.15, 1.3, 1.5, 1.75, 2.0)
+NEUTRAL_BUCKET = FARE_BUCKETS.index(1.0)
+# one bucket per 10 points of load factor ahead of (or behind) the booking curve
+BUCKET_STEP = 0.1
+BOOKING_HORIZON_DAYS = 120
+TARGET_LOAD_FACTOR = 0.85
+
+
+def expected_load_factor(days_out: int) -> float:
+    """Booking curve: share of the class expected to be sold days_out days before departure."""
+    remaining = max(0.0, 1 - days_out / BOOKING_HORIZON_DAYS)
+    return TARGET_LOAD_FACTOR * remaining * remaining
+
+
+def fare_bucket(seats: int, sold: int, days_out: int) -> int:
+    """
+    Bucket of a flight class from its load factor against the booking curve,
+    one or two buckets more in the last two weeks, the top one for the last 5% of the seats.
+    """
+    last = len(FARE_BUCKETS) - 1
+    if seats <= 0 or seats - sold <= max(1, seats // 20):
+        return last
+
+    bucket = NEUTRAL_BUCKET + round((sold / seats - expected_load_factor(days_out)) / BUCKET_STEP)
+    if days_out <= 3:
+        bucket += 2
+    elif days_out <= 14:
+        bucket += 1
+    return min(max(bucket, 0), last)
+
+
+def _price(base_fare: float, seats: int, sold: int, departure_day: date, today: date) -> tuple[int, float]:
+    bucket = fare_bucket(seats, sold, max((departure_day - today).days, 0))
+    return bucket, round(base_fare * FARE_BUCKETS[bucket], 2)
+
+
+def reprice(fare: Flight_fare, today: date):
+    fare.bucket, fare.price = _price(fare.base_fare, fare.seats, fare.sold, fare.departure_day, today)
+    fare.priced_on = today
+
+
+def _fare_rows(session: Session, flight_ids, id_class: int | None, today: date) -> dict:
+    """
+    Price rows of the flights (ids, or a select of them), for one class or all
+    of them, by (id_flight, id_class): seats and tickets of each class counted
+    in one query.
+    """
+    seats = (
+        select(Flight.id_flight, Cabin.id_class, func.count(Cell.id_cell).label("seats"))
+        .join(Cabin, Cabin.id_aircraft == Flight.id_aircraft)
+        .join(Cell, and_(Cell.id_cabin == Cabin.id_cabin, Cell.is_seat == true()))
+        .where(Flight.id_flight.in_(flight_ids), Cabin.id_class.is_not(None))
+        .group_by(Flight.id_flight, Cabin.id_class)
+    )
+    sold = (
+        select(Ticket.id_flight, Cabin.id_class, func.count(Ticket.id_ticket).label("sold"))
+        .join(Cell, Cell.id_cell == Ticket.id_seat)
+        .join(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .where(Ticket.id_flight.in_(flight_ids))
+        .group_by(Ticket.id_flight, Cabin.id_class)
+    )
+    if id_class is not None:
+        seats = seats.where(Cabin.id_class == id_class)
+        sold = sold.where(Cabin.id_class == id_class)
+    seats, sold = seats.subquery(), sold.subquery()
+    stmt = (
+        select(
+            seats.c.id_flight,
+            seats.c.id_class,
+            seats.c.seats,
+            func.coalesce(sold.c.sold, 0),
+            Route.base_price,
+            Flight.scheduled_departure_day,
+            Class_price_policy.price_multiplier,
+            Class_price_policy.fixed_markup,
+        )
+        .join(Flight, Flight.id_flight == seats.c.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(sold, and_(sold.c.id_flight == seats.c.id_flight, sold.c.id_class == seats.c.id_class))
+        .outerjoin(
+            Class_price_policy,
+            and_(Class_price_policy.airline_code == Route.airline_iata_code,
+                 Class_price_policy.id_class == seats.c.id_class),
+        )
+    )
+
+    rows = {}
+    for id_flight, id_class, seat_count, sold_count, base_price, departure, multiplier, markup in session.execute(stmt):
+        if (id_flight, id_class) in rows:
+            continue
+        base_fare = base_price or 0
+        if multiplier is not None:
+            base_fare = base_fare * multiplier + markup
+        bucket, price = _price(base_fare, seat_count, sold_count, departure.date(), today)
+        rows[id_flight, id_class] = {
+            "id_flight": id_flight,
+            "id_class": id_class,
+            "seats": seat_count,
+            "sold": sold_count,
+            "base_fare": base_fare,
+            "bucket": bucket,
+            "price": price,
+            "departure_day": departure.date(),
+            "priced_on": today,
+        }
+    return rows
+
+
+def build_fares(session: Session, flight_ids, id_class: int | None = None, today: date | None = None) -> int:
+    """Insert the price rows the flights (ids, or a select of them) do not have yet, for one class or all of them."""
+    rows = _fare_rows(session, flight_ids, id_class, today or date.today())
+    existing = select(Flight_fare.id_flight, Flight_fare.id_class).where(Flight_fare.id_flight.in_(flight_ids))
+    for key in session.execute(existing).all():
+        rows.pop(tuple(key), None)
+    if rows:
+        session.execute(_dialect_insert(session)(Flight_fare).on_conflict_do_nothing(), list(rows.values()))
+    return len(rows)
+
+
+def get_flight_fares(session: Session, flight_ids: list[int], id_class: int, today: date | None = None) -> dict:
+    """
+    Bucket and price of the flights for one class, by id_flight, read from the
+    price table without writing to it, so that search stays a read. Rows built
+    at booking, flight creation or by refresh_fares.py are used as they are;
+    missing rows are computed here, and rows priced on an earlier day repriced
+    from their stored counts, in memory only. Flights without seats of the
+    class are left out.
+    """
+    if not flight_ids:
+        return {}
+    today = today or date.today()
+
+    stmt = (
+        select(Flight_fare.id_flight, Flight_fare.seats, Flight_fare.sold, Flight_fare.base_fare,
+               Flight_fare.bucket, Flight_fare.price, Flight_fare.departure_day, Flight_fare.priced_on)
+        .where(Flight_fare.id_flight.in_(flight_ids), Flight_fare.id_class == id_class)
+    )
+    rows = {row.id_flight: row for row in session.execute(stmt)}
+    missing = [id_flight for id_flight in flight_ids if id_flight not in rows]
+    if missing:
+        for row in _fare_rows(session, missing, id_class, today).values():
+            rows[row["id_flight"]] = Flight_fare(**row)
+
+    fares = {}
+    for id_flight, row in rows.items():
+        bucket, price = row.bucket, row.price
+        if row.priced_on != today:
+            bucket, price = _price(row.base_fare, row.seats, row.sold, row.departure_day, today)
+        fares[id_flight] = {"bucket": bucket, "price": price, "seats_left": row.seats - row.sold}
+    return fares
+
+
+def lock_flight_fare(session: Session, id_flight: int, id_class: int, today: date | None = None) -> Flight_fare | None:
+    """The price row of a flight class, locked until the end of the transaction so that bookings of it queue up."""
+    today = today or date.today()
+    stmt = (
+        select(Flight_fare)
+        .where(Flight_fare.id_flight == id_flight, Flight_fare.id_class == id_class)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    fare = session.execute(stmt).scalar_one_or_none()
+    if fare is None:
+        build_fares(session, [id_flight], id_class, today)
+        fare = session.execute(stmt).scalar_one_or_none()
+        if fare is None:
+            return None
+    if fare.priced_on != today:
+        reprice(fare, today)
+    return fare
+
+
+def refresh_fares(session: Session, today: date | None = None) -> tuple[int, int]:
+    """
+    Daily upkeep of the price table for the flights that have not departed:
+    rows priced on an earlier day are repriced, locked so that no booking is
+    overwritten, and missing rows are built. Returns (repriced, built).
+    """
+    today = today or date.today()
+    stale = session.scalars(
+        select(Flight_fare)
+        .where(Flight_fare.priced_on < today, Flight_fare.departure_day >= today)
+        .with_for_update()
+    ).all()
+    for fare in stale:
+        reprice(fare, today)
+    session.flush()
+    upcoming = select(Flight.id_flight).where(Flight.scheduled_departure_day >= today)
+    return len(stale), build_fares(session, upcoming, today=today)
+
+
+def sell_fare(fare: Flight_fare, today: date | None = None) -> float:
+    """Charge the current bucket, then count the seat as sold and reprice the row."""
+    price = fare.price
+    fare.sold += 1
+    reprice(fare, today or date.today())
+    return price
+
+
+def rebuild_fares(session: Session, route_code: str | None = None, airline_code: str | None = None,
+                  id_class: int | None = None):
+    """Rebuild the price rows an input of the class fare changed for, those of the flights still to depart included."""
+    flights = select(Flight.id_flight)
+    if route_code is not None:
+        flights = flights.where(Flight.route_code == route_code)
+    if airline_code is not None:
+        flights = flights.join(Route, Route.code == Flight.route_code).where(Route.airline_iata_code == airline_code)
+
+    stmt = delete(Flight_fare).where(Flight_fare.id_flight.in_(flights))
+    if id_class is not None:
+        stmt = stmt.where(Flight_fare.id_class == id_class)
+    session.execute(stmt)
+    build_fares(session, flights.where(Flight.scheduled_departure_day >= date.today()), id_class)
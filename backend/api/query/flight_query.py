@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import timedelta, datetime, time
 
 import sqlalchemy
 from sqlalchemy import select, or_, and_, true, func
@@ -9,6 +9,7 @@ from sqlalchemy.orm import aliased
 
 from ..models.flight import Flight
 from ..models.route import Route
+from ..models.airline import Airline
 from ..models.route_detail import Route_detail
 from ..models.route_section import Route_section
 from ..models.aircraft_airlines import Aircraft_airline
@@ -18,6 +19,9 @@ from ..models.class_seat import Class_seat
 from ..models.passenger import Passenger
 from ..models.passenger_ticket import Passenger_ticket
 from ..models.cabin import Cabin
+from ..models.revenue_daily import Revenue_daily
+from ..utils.seat_map_codec import compact_cabin
+from .airline_query import get_aircraft_cells
 
 
 def check_aircraft_schedule_conflicts(session, aircraft_id, dates_to_check):
@@ -108,11 +112,15 @@ def get_flight_for_search(session: Session, departure_airport: str, arrival_airp
     if not valid_route_codes:
         return []
 
+    # the whole day as a range of the DateTime column: index friendly, and right
+    # on every dialect whatever time of day the rows carry
+    day_start = datetime.combine(departure_date, time.min)
     flights_stmt = (
         select(Flight)
         .where(
             Flight.route_code.in_(valid_route_codes),
-            Flight.scheduled_departure_day == departure_date
+            Flight.scheduled_departure_day >= day_start,
+            Flight.scheduled_departure_day < day_start + timedelta(days=1),
         )
     )
 
@@ -170,10 +178,10 @@ def get_flight_seat_blocks(session: Session, id_flight: int):
         for row in results
     ]
 
-def get_flight_seat_map(session: Session, id_flight: int):
+def get_flight_seat_map(session: Session, id_flight: int, held_seats: set[int] = frozenset()):
     """
     Returns ALL seats for a flight's aircraft with occupancy status.
-    This includes available and occupied seats.
+    This includes available, held and occupied seats.
     """
     # Get the flight's aircraft
     flight_stmt = select(Flight.id_aircraft).where(Flight.id_flight == id_flight)
@@ -220,20 +228,43 @@ def get_flight_seat_map(session: Session, id_flight: int):
                 "id_cabin": seat.id_cabin,
                 "id_class": seat.id_class,
                 "occupied_seats": 0,
+                "held_seats": 0,
                 "seats": []
             }
         
+        is_held = not is_occupied and seat.id_cell in held_seats
+
         if is_occupied:
             cabin_map[cabin_key]["occupied_seats"] += 1
+        if is_held:
+            cabin_map[cabin_key]["held_seats"] += 1
         
         cabin_map[cabin_key]["seats"].append({
             "id_cell": seat.id_cell,
             "x": seat.x,
             "y": seat.y,
-            "occupied": is_occupied
+            "occupied": is_occupied,
+            "held": is_held
         })
     
     return list(cabin_map.values())
+
+def get_flight_seat_map_compact(session: Session, id_flight: int, held_seats: set[int] = frozenset()):
+    """get_flight_seat_map with every cabin as bitsets over its grid, see compact_cabin."""
+    id_aircraft = session.scalar(select(Flight.id_aircraft).where(Flight.id_flight == id_flight))
+    if not id_aircraft:
+        return []
+
+    occupied = set(session.scalars(select(Ticket.id_seat).where(Ticket.id_flight == id_flight)).all())
+    return [
+        {
+            "id_cabin": id_cabin,
+            "id_class": cabin["id_class"],
+            **compact_cabin(cabin["rows"], cabin["cols"], cabin["cells"], occupied, held_seats),
+        }
+        for id_cabin, cabin in get_aircraft_cells(session, id_aircraft).items()
+    ]
+
 def get_aircraft_by_seat_id(session: Session, id_seat: int) -> int | None:
     stmt = (
         select(Cabin.id_aircraft)
@@ -242,6 +273,41 @@ def get_aircraft_by_seat_id(session: Session, id_seat: int) -> int | None:
     )
     return session.scalar(stmt)
 
+def get_aircraft_seats_in(session: Session, id_aircraft: int, id_seats) -> set[int]:
+    """The ids of id_seats that are seats of the aircraft."""
+    stmt = (
+        select(Cell.id_cell)
+        .join(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .where(Cell.id_cell.in_(id_seats), Cabin.id_aircraft == id_aircraft, Cell.is_seat == true())
+    )
+    return set(session.scalars(stmt).all())
+
+def get_class_cabin_cells(session: Session, id_aircraft: int, id_class: int):
+    """(id_cabin, id_cell, x, y, is_seat) of every cell of the aircraft cabins of a class, front cabin first."""
+    stmt = (
+        select(Cabin.id_cabin, Cell.id_cell, Cell.x, Cell.y, Cell.is_seat)
+        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .where(Cabin.id_aircraft == id_aircraft, Cabin.id_class == id_class)
+        .order_by(Cabin.id_cabin)
+    )
+    return session.execute(stmt).all()
+
+def get_booked_seats(session: Session, id_flight: int) -> set[int]:
+    return set(session.scalars(select(Ticket.id_seat).where(Ticket.id_flight == id_flight)).all())
+
+def get_booked_seats_in(session: Session, id_flight: int, id_seats) -> set[int]:
+    stmt = select(Ticket.id_seat).where(Ticket.id_flight == id_flight, Ticket.id_seat.in_(id_seats))
+    return set(session.scalars(stmt).all())
+
+def get_seat_cabin(session: Session, id_seat: int):
+    """(id_aircraft, id_class) of the cabin a seat is in, None if the seat does not exist."""
+    stmt = (
+        select(Cabin.id_aircraft, Cabin.id_class)
+        .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+        .where(Cell.id_cell == id_seat)
+    )
+    return session.execute(stmt).first()
+
 def get_class_from_seat(session: Session, id_seat: int) -> int | None:
     stmt = (
         select(Cabin.id_class)
@@ -250,68 +316,172 @@ def get_class_from_seat(session: Session, id_seat: int) -> int | None:
     )
     return session.scalar(stmt)
 
-def get_flights_by_user_id(session: Session, id_user: int):
+def get_flights_by_user_id(session: Session, id_user: int, when: str = "all", page: int | None = None, per_page: int = 20):
+    """
+    Trip history of a buyer, same shape as Passenger_ticket.to_dict_buy_ticket().
+    Built from one projection for the page plus one query for the route sections,
+    so the number of queries does not depend on the number of bookings.
+    Returns (trips, total); total is None when page is None.
+    """
+    # scheduled_departure_day is a DateTime: a flight of today that already left is past
+    now = datetime.utcnow()
+
     stmt = (
-        select(Passenger_ticket)
+        select(
+            Passenger_ticket.id_passenger_tickets,
+            Passenger_ticket.id_buyer,
+            Ticket.id_ticket,
+            Ticket.price,
+            Flight.id_flight,
+            Flight.id_aircraft,
+            Flight.scheduled_departure_day,
+            Flight.scheduled_arrival_day,
+            Route.code.label("route_code"),
+            Route.base_price,
+            Airline.iata_code.label("airline_iata_code"),
+            Airline.name.label("airline_name"),
+            Passenger.id_passengers,
+            Passenger.name,
+            Passenger.lastname,
+            Passenger.date_birth,
+            Passenger.phone_number,
+            Passenger.email,
+            Passenger.passport_number,
+        )
+        .join(Ticket, Ticket.id_ticket == Passenger_ticket.id_ticket)
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .join(Airline, Airline.iata_code == Route.airline_iata_code)
+        .join(Passenger, Passenger.id_passengers == Passenger_ticket.id_passenger)
         .where(Passenger_ticket.id_buyer == id_user)
     )
 
-    results = session.execute(stmt).scalars().all()
+    if when == "upcoming":
+        stmt = stmt.where(Flight.scheduled_departure_day >= now).order_by(
+            Flight.scheduled_departure_day, Passenger_ticket.id_passenger_tickets
+        )
+    elif when == "past":
+        stmt = stmt.where(Flight.scheduled_departure_day < now).order_by(
+            Flight.scheduled_departure_day.desc(), Passenger_ticket.id_passenger_tickets
+        )
+    else:
+        stmt = stmt.order_by(Passenger_ticket.id_passenger_tickets)
+
+    total = None
+    if page is not None:
+        total = session.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+        stmt = stmt.offset((page - 1) * per_page).limit(per_page)
+
+    rows = session.execute(stmt).all()
+
+    sections_by_route = defaultdict(list)
+    route_codes = {row.route_code for row in rows}
+    if route_codes:
+        sections_stmt = (
+            select(
+                Route_detail.code_route,
+                Route_detail.id_airline_routes,
+                Route_detail.departure_time,
+                Route_detail.arrival_time,
+                Route_detail.id_next,
+                Route_section.id_routes_section,
+                Route_section.code_departure_airport,
+                Route_section.code_arrival_airport,
+            )
+            .join(Route_section, Route_section.id_routes_section == Route_detail.id_route_section)
+            .where(Route_detail.code_route.in_(route_codes))
+            .order_by(Route_detail.id_airline_routes)
+        )
+        for rd in session.execute(sections_stmt).all():
+            sections_by_route[rd.code_route].append({
+                "id_airline_routes": rd.id_airline_routes,
+                "departure_time": rd.departure_time,
+                "arrival_time": rd.arrival_time,
+                "section": {
+                    "id_routes_section": rd.id_routes_section,
+                    "code_departure_airport": rd.code_departure_airport,
+                    "code_arrival_airport": rd.code_arrival_airport,
+                },
+                "next_id": rd.id_next,
+            })
+
+    trips = [
+        {
+            "id_passenger_ticket": row.id_passenger_tickets,
+            "id_buyer": row.id_buyer,
+            "ticket": {
+                "id_ticket": row.id_ticket,
+                "flight": {
+                    "id_flight": row.id_flight,
+                    "id_aircraft": row.id_aircraft,
+                    "route_code": row.route_code,
+                    "base_price": row.base_price,
+                    "flight_price": row.base_price,
+                    "airline": {
+                        "iata_code": row.airline_iata_code,
+                        "name": row.airline_name
+                    },
+                    "scheduled_departure_day": row.scheduled_departure_day,
+                    "scheduled_arrival_day": row.scheduled_arrival_day,
+                    "sections": sections_by_route[row.route_code],
+                },
+                "price": row.price
+            },
+            "passenger": {
+                "id_passengers": row.id_passengers,
+                "name": row.name,
+                "lastname": row.lastname,
+                "date_birth": row.date_birth,
+                "phone_number": row.phone_number,
+                "email": row.email,
+                "passport_number": row.passport_number,
+            },
+        }
+        for row in rows
+    ]
 
-    output = [pt.to_dict_buy_ticket() for pt in results]
+    return trips, total
 
-    return output
+def _filter_flight_days(stmt, start_date=None, end_date=None):
+    if start_date and end_date:
+        stmt = stmt.where(Revenue_daily.flight_day.between(start_date, end_date))
+    elif start_date:
+        stmt = stmt.where(Revenue_daily.flight_day >= start_date)
+    elif end_date:
+        stmt = stmt.where(Revenue_daily.flight_day <= end_date)
+    return stmt
 
 def get_route_totals(session, route_code, start_date=None, end_date=None):
     stmt = (
         select(
-            func.count(Ticket.id_ticket).label("passengers"),
-            func.sum(Ticket.price).label("revenue")
+            func.sum(Revenue_daily.tickets).label("passengers"),
+            func.sum(Revenue_daily.revenue).label("revenue")
         )
-        .join(Flight, Ticket.id_flight == Flight.id_flight)
-        .where(Flight.route_code == route_code)
+        .where(Revenue_daily.route_code == route_code)
     )
-
-    if start_date and end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day.between(start_date, end_date))
-    elif start_date:
-        stmt = stmt.where(Flight.scheduled_departure_day >= start_date)
-    elif end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day <= end_date)
+    stmt = _filter_flight_days(stmt, start_date, end_date)
 
     result = session.execute(stmt).first()
     return {"passengers": result.passengers or 0, "revenue": result.revenue or 0}
 
 def get_route_class_distribution(session, route_code, start_date=None, end_date=None):
     stmt = (
-        select(Ticket.id_seat)
-        .join(Flight, Ticket.id_flight == Flight.id_flight)
-        .where(Flight.route_code == route_code)
+        select(
+            Class_seat.name.label("name"),
+            func.sum(Revenue_daily.tickets).label("tickets")
+        )
+        .join(Class_seat, Class_seat.id_class == Revenue_daily.id_class)
+        .where(Revenue_daily.route_code == route_code)
+        .group_by(Class_seat.name)
     )
+    stmt = _filter_flight_days(stmt, start_date, end_date)
 
-    if start_date and end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day.between(start_date, end_date))
-    elif start_date:
-        stmt = stmt.where(Flight.scheduled_departure_day >= start_date)
-    elif end_date:
-        stmt = stmt.where(Flight.scheduled_departure_day <= end_date)
-
-    seat_ids = [row.id_seat for row in session.execute(stmt).all()]
-
-    class_ids = [get_class_from_seat(session,seat_id) for seat_id in seat_ids]
-
-    class_names = []
-    for class_id in class_ids:
-        cls = session.get(Class_seat, class_id)
-        if cls:
-            class_names.append(cls.name)
-
-    total = len(class_names)
-    counter = Counter(class_names)
+    rows = session.execute(stmt).all()
+    total = sum(row.tickets for row in rows)
 
     distribution = {
-        cls: round((count / total) * 100, 2)
-        for cls, count in counter.items()
+        row.name: round((row.tickets / total) * 100, 2)
+        for row in rows
     } if total > 0 else {}
 
     return distribution
@@ -362,8 +532,8 @@ def get_flights_by_airline(session, airline_code: str):
             Route.code.label("route_code"),
             Route_section.code_departure_airport.label("origin"),
             Route_section.code_arrival_airport.label("destination"),
-            Route_detail.departure_time.label("departure_time"),
-            Route_detail.arrival_time.label("arrival_time"),
+            func.to_char(Route_detail.departure_time, "HH24:MI").label("departure_time"),
+            func.to_char(Route_detail.arrival_time, "HH24:MI").label("arrival_time"),
             Route.base_price.label("base_price"),
             func.to_char(
                 (
@@ -380,18 +550,7 @@ def get_flights_by_airline(session, airline_code: str):
         .where(Route.airline_iata_code == airline_code)
     )
 
-    rows = session.execute(stmt).mappings().all()
-    flights = []
-    for row in rows:
-        r = dict(row)
-        if r["departure_time"]:
-            r["departure_time"] = r["departure_time"].strftime("%H:%M")
-
-        if r["arrival_time"]:
-            r["arrival_time"] = r["arrival_time"].strftime("%H:%M")
-
-        flights.append(r)
-    return flights
+    return [dict(row) for row in session.execute(stmt).mappings()]
 
 
 
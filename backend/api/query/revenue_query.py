@@ -0,0 +1,86 @@
+from datetime import date, datetime
+
+from sqlalchemy import select, func, delete, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models.revenue_daily import Revenue_daily
+from ..models.route import Route
+from ..models.flight import Flight
+from ..models.ticket import Ticket
+from ..models.cell import Cell
+from ..models.cabin import Cabin
+
+
+def _dialect_insert(session: Session):
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+def add_ticket_to_revenue_rollup(session: Session, airline_code: str, route_code: str, flight_day: date,
+                                 sale_day: date, id_class: int | None, price: float):
+    """Add one sold ticket to its daily bucket, in the caller's transaction."""
+    stmt = _dialect_insert(session)(Revenue_daily).values(
+        route_code=route_code,
+        flight_day=flight_day,
+        sale_day=sale_day,
+        id_class=id_class or 0,
+        airline_code=airline_code,
+        tickets=1,
+        revenue=price,
+        updated_at=datetime.utcnow(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["route_code", "flight_day", "sale_day", "id_class"],
+        set_={
+            "tickets": Revenue_daily.tickets + 1,
+            "revenue": Revenue_daily.revenue + stmt.excluded.revenue,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    session.execute(stmt)
+
+
+def rebuild_revenue_rollup(session: Session, airline_code: str | None = None) -> int:
+    """Recompute the rollup from the raw tickets, for backfill or repair. Returns the number of buckets."""
+    delete_stmt = delete(Revenue_daily)
+    if airline_code is not None:
+        delete_stmt = delete_stmt.where(Revenue_daily.airline_code == airline_code)
+    session.execute(delete_stmt)
+
+    flight_day = func.date(Flight.scheduled_departure_day)
+    sale_day = func.date(Ticket.created_at)
+    id_class = func.coalesce(Cabin.id_class, 0)
+
+    source = (
+        select(
+            Route.code,
+            flight_day,
+            sale_day,
+            id_class,
+            Route.airline_iata_code,
+            func.count(Ticket.id_ticket),
+            func.coalesce(func.sum(Ticket.price), 0),
+            func.now(),
+        )
+        .join(Flight, Flight.id_flight == Ticket.id_flight)
+        .join(Route, Route.code == Flight.route_code)
+        .outerjoin(Cell, Cell.id_cell == Ticket.id_seat)
+        .outerjoin(Cabin, Cabin.id_cabin == Cell.id_cabin)
+        .group_by(Route.code, flight_day, sale_day, id_class, Route.airline_iata_code)
+    )
+    if airline_code is not None:
+        source = source.where(Route.airline_iata_code == airline_code)
+
+    session.execute(
+        insert(Revenue_daily).from_select(
+            ["route_code", "flight_day", "sale_day", "id_class", "airline_code", "tickets", "revenue", "updated_at"],
+            source,
+        )
+    )
+
+    count_stmt = select(func.count()).select_from(Revenue_daily)
+    if airline_code is not None:
+        count_stmt = count_stmt.where(Revenue_daily.airline_code == airline_code)
+    return session.scalar(count_stmt)
@@ -6,8 +6,7 @@ from flask_sqlalchemy.session import Session
 from ..models.route_section import Route_section
 from ..models.route import Route
 from ..models.route_detail import Route_detail
-from ..models.ticket import Ticket
-from ..models.flight import Flight
+from ..models.revenue_daily import Revenue_daily
 
 def get_all_routes(session: Session):
     stmt = select(Route_section)
@@ -141,15 +140,15 @@ def get_all_route_airline(session: Session, airline_code: str):
         # Set route-level info only once
         if route["route_code"] is None:
             route["route_code"] = row.code
-            route["start_date"] = row.start_date.isoformat()
-            route["end_date"] = row.end_date.isoformat()
-            route["route_created_at"] = row.created_at.isoformat()
+            route["start_date"] = row.start_date
+            route["end_date"] = row.end_date
+            route["route_created_at"] = row.created_at
 
         # Append route details
         route["details"].append({
             "route_detail_id": row.id_airline_routes,
-            "departure_time": row.departure_time.strftime("%H:%M:%S") if row.departure_time else None,
-            "arrival_time": row.arrival_time.strftime("%H:%M:%S") if row.arrival_time else None,
+            "departure_time": row.departure_time,
+            "arrival_time": row.arrival_time,
             "id_next": row.id_next,
             "departure_airport": row.code_departure_airport,
             "arrival_airport": row.code_arrival_airport,
@@ -231,18 +230,17 @@ def get_routes_analytics(session, airline_code: str, start_date):
     stmt = (
         select(
             Route.code.label("route_code"),
-            func.count(Ticket.id_ticket).label("total_tickets"),
-            func.coalesce(func.sum(Ticket.price), 0).label("total_revenue"),
+            func.coalesce(func.sum(Revenue_daily.tickets), 0).label("total_tickets"),
+            func.coalesce(func.sum(Revenue_daily.revenue), 0).label("total_revenue"),
         )
-        .outerjoin(Flight, Flight.route_code == Route.code)
-        .outerjoin(Ticket, Ticket.id_flight == Flight.id_flight)
+        .outerjoin(Revenue_daily, Revenue_daily.route_code == Route.code)
         .where(Route.airline_iata_code == airline_code)
         .group_by(Route.code)
         .order_by(Route.code)
     )
 
     if start_date is not None:
-        stmt = stmt.where(Ticket.created_at >= start_date)
+        stmt = stmt.where(Revenue_daily.sale_day >= start_date)
 
     results = session.execute(stmt).all()
 
@@ -257,20 +255,14 @@ def get_routes_analytics(session, airline_code: str, start_date):
 
 def get_total_revenue_by_airline_and_date(session: Session, airline_iata_code: str, start_date: datetime) -> int:
     stmt = (
-        select(func.coalesce(func.sum(Ticket.price), 0).label("total_revenue"))
-        .join(Ticket.flight)
-        .join(Flight.route)
-        .where(Route.airline_iata_code == airline_iata_code)
+        select(func.coalesce(func.sum(Revenue_daily.revenue), 0).label("total_revenue"))
+        .where(Revenue_daily.airline_code == airline_iata_code)
     )
 
     if start_date is not None:
-        stmt = stmt.where(Ticket.created_at >= start_date)
+        stmt = stmt.where(Revenue_daily.sale_day >= start_date)
 
-    stmt = stmt.where(Ticket.created_at <= func.now())
+    stmt = stmt.where(Revenue_daily.sale_day <= datetime.utcnow().date())
 
     result = session.execute(stmt).scalar_one()
     return result
-        
-
-    
-    
\ No newline at end of file
@@ -1,19 +1,28 @@
-from .user_routes import user_bp
-from .aircraft_routes import aircraft_bp
-from .manufacturer_routes import manufacturer_bp
-from .airline_routes import airline_bp
-from .route_routes import route_bp
-from .flight_routes import flight_bp
-from .airport_routes import airport_bp
-from .baggage_routes import baggage_bp
+from importlib import import_module
 
 
-def register_routes(app):
-    app.register_blueprint(user_bp, url_prefix="/users")
-    app.register_blueprint(aircraft_bp, url_prefix="/aircraft")
-    app.register_blueprint(manufacturer_bp, url_prefix="/manufacturer")
-    app.register_blueprint(airline_bp, url_prefix="/airline")
-    app.register_blueprint(route_bp, url_prefix="/route")
-    app.register_blueprint(flight_bp, url_prefix="/flight")
-    app.register_blueprint(airport_bp, url_prefix="/airports")
-    app.register_blueprint(baggage_bp, url_prefix="/baggage")
\ No newline at end of file
+# name -> (module, blueprint, url prefix). Modules are only imported when their
+# blueprint is registered, so a worker serving a subset skips the controllers,
+# queries and schemas of the others.
+BLUEPRINTS = {
+    "users": ("user_routes", "user_bp", "/users"),
+    "aircraft": ("aircraft_routes", "aircraft_bp", "/aircraft"),
+    "manufacturer": ("manufacturer_routes", "manufacturer_bp", "/manufacturer"),
+    "airline": ("airline_routes", "airline_bp", "/airline"),
+    "route": ("route_routes", "route_bp", "/route"),
+    "flight": ("flight_routes", "flight_bp", "/flight"),
+    "airports": ("airport_routes", "airport_bp", "/airports"),
+    "baggage": ("baggage_routes", "baggage_bp", "/baggage"),
+}
+
+
+def register_routes(app, names=None):
+    """Register the blueprints in names, all of them when None."""
+    names = list(BLUEPRINTS) if names is None else names
+    unknown = [name for name in names if name not in BLUEPRINTS]
+    if unknown:
+        raise ValueError(f"unknown blueprint(s) {', '.join(unknown)}, expected some of {', '.join(BLUEPRINTS)}")
+
+    for name in names:
+        module, blueprint, url_prefix = BLUEPRINTS[name]
+        app.register_blueprint(getattr(import_module(f".{module}", __name__), blueprint), url_prefix=url_prefix)
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify, session
-from ..query.aircraft_query import all_aircraft, all_aircraft_by_manufacturer
+from ..query.aircraft_query import all_aircraft_by_manufacturer
 from ..utils.role_checking import role_required
+from ..utils.reference_cache import reference_cache, etag_response
 from db import SessionLocal
 
 aircraft_bp = Blueprint("aircraft_bp", __name__)
@@ -60,9 +61,8 @@ def get_all_aircraft():
       403:
         description: User does not have the required role
     """
-    session = SessionLocal()
-    aircraft = all_aircraft(session)
-    return jsonify(aircraft), 200
+    aircraft = reference_cache.get("aircraft")
+    return etag_response(aircraft.payload, aircraft.etag)
 
 
 @aircraft_bp.route("/manufacturer/<int:id_manufacturer>", methods=["GET"])
@@ -1,3 +1,4 @@
+from datetime import date
 from flask import Blueprint, request, jsonify, session
 from pydantic import ValidationError
 from db import SessionLocal
@@ -6,14 +7,32 @@ from ..models import Route
 from ..models.aircraft_airlines import Aircraft_airline
 from ..models.airline import Airline
 from ..query.flight_query import get_flights_by_airline
-from ..query.airline_query import all_airline, get_aircraft_seat_map_JSON, number_seat_aircraft,get_max_economy_seats, get_airline_class_price_policy, get_airline_price_policy
+from ..query.airline_query import get_aircraft_seat_map_JSON, get_aircraft_seat_map_compact, number_seat_aircraft,get_max_economy_seats, get_airline_class_price_policy, get_airline_price_policy
 from ..query.route_query import get_all_route_airline, get_route, get_routes_analytics, get_total_revenue_by_airline_and_date
 from ..utils.role_checking import role_required, airline_check_param, airline_check_body
+from ..utils.reference_cache import reference_cache, etag_response
+from ..utils.seat_map_codec import wants_compact, seat_map_response
+from ..utils.data_versions import conditional_get
 from ..validations.airline_validation import *
 from ..controllers.airline_controller import Airline_controller
 
 airline_bp = Blueprint("airline_bp", __name__)
 
+
+def _scope(prefix: str):
+    """ETag scope of an airline wide GET: prefix:<airline_code>."""
+    return lambda session, airline_code, **_: [f"{prefix}:{airline_code}"]
+
+
+def _aircraft_scope(session, id_aircraft_airline, **_):
+    return [f"aircraft:{id_aircraft_airline}"]
+
+
+def _today(**_):
+    # the analytics default to windows relative to today
+    return date.today()
+
+
 @airline_bp.route("/", methods=["GET"])
 #@role_required("Admin")
 def get_all_airlines():
@@ -50,10 +69,8 @@ def get_all_airlines():
           403:
             description: User does not have the required Admin role
         """
-        session = SessionLocal()
-        airlines = all_airline(session)
-        session.close()
-        return jsonify(airlines), 200
+        airlines = reference_cache.get("airlines")
+        return etag_response(airlines.payload, airlines.etag)
 
 @airline_bp.route("/new", methods=["POST"])
 #@role_required("Admin")
@@ -523,6 +540,7 @@ def new_block(id_aircraft_airline: int):
 
 @airline_bp.route("/<airline_code>/aircraft/<int:id_aircraft_airline>/seat_map", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_aircraft_scope)
 def get_seat_map(airline_code: str, id_aircraft_airline: int):
     """
         Get Seat Map of Aircraft
@@ -567,6 +585,16 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
             description: ID of the aircraft in the airline's fleet
             example: 3
 
+          - name: format
+            in: query
+            type: string
+            required: false
+            enum: ["compact"]
+            description: >
+              `compact` (or `Accept: application/vnd.seatmap.compact+json`) returns each block of
+              `seat_map` as `rows`, `cols`, `base_cell` and a base64 bitset `seats` over its grid
+              instead of `cells`, see GET /flight/{id_flight}/seat-availability.
+
         security:
           - Bearer: []
 
@@ -634,12 +662,16 @@ def get_seat_map(airline_code: str, id_aircraft_airline: int):
     if (session.get(Aircraft_airline, id_aircraft_airline) is None):
             return jsonify({"message": "id_aircraft_airline not found"}), 404
     else:
-            seat_map = get_aircraft_seat_map_JSON(session, id_aircraft_airline)
+            compact = wants_compact()
+            if compact:
+                seat_map = get_aircraft_seat_map_compact(session, id_aircraft_airline)
+            else:
+                seat_map = get_aircraft_seat_map_JSON(session, id_aircraft_airline)
             seats_number = number_seat_aircraft(session, id_aircraft_airline)
             seats_remaining = get_max_economy_seats(session, id_aircraft_airline) - seats_number
             session.close()
-            return jsonify(
-                    {"additional_seats_remaining": seats_remaining, "seats_number": seats_number, "seat_map": seat_map}), 200
+            return seat_map_response(
+                    {"additional_seats_remaining": seats_remaining, "seats_number": seats_number, "seat_map": seat_map}, compact)
 
 
 @airline_bp.route("/aircraft/clone-seatmap", methods=["POST"])
@@ -660,8 +692,8 @@ def clone_seatmap():
 
       **Important notes:**
       1. If the target aircraft already has a seat map configuration, it will be deleted and replaced with the source's seat map.
-      2. This operation may take some time because the database does not have indices yet.  
-         Example: deleting 150 records took 12.24 sec.
+      2. Cells are deleted and copied with set-based statements; to copy the same layout to many
+         aircraft at once use POST /airline/aircraft/clone-seatmap/bulk.
       3. Ensure `source_id` and `target_id` are valid aircraft IDs in the same airline.
 
     parameters:
@@ -731,6 +763,98 @@ def clone_seatmap():
 
     return jsonify(response), status
 
+@airline_bp.route("/aircraft/clone-seatmap/bulk", methods=["POST"])
+#@airline_check_body("airline_code")
+def clone_seatmap_many():
+    """
+    Clone Seat Map from One Aircraft to Many
+    ---
+    tags:
+      - Airline
+    summary: Copy the seat map of a source aircraft to several target aircraft in one transaction
+    description: |
+      Copies the seat map configuration of a source aircraft to every target aircraft.
+      Either all the targets get the new seat map or, on any error, none does.
+
+      **Authorization required:** Bearer JWT Token  
+      **Allowed roles:** Airline-Admin
+
+      **Important notes:**
+      1. The seat maps already configured on the targets are deleted and replaced.
+      2. Every target must have the same `cabin_max_cols` as the source, and room for its seats.
+
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - airline_code
+            - source_id
+            - target_ids
+          properties:
+            airline_code:
+              type: string
+              example: "AZ"
+            source_id:
+              type: integer
+              description: ID of the source aircraft (to copy from)
+              example: 4
+            target_ids:
+              type: array
+              description: IDs of the target aircraft (to copy to), at most 500
+              items:
+                type: integer
+              example: [3, 5, 6]
+
+    security:
+      - Bearer: []
+
+    responses:
+      201:
+        description: Seat map cloned successfully
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: "Operation successful, 3 copied blocks on 3 aircraft"
+            target_ids:
+              type: array
+              items:
+                type: integer
+
+      400:
+        description: Invalid request (e.g. duplicate IDs or an incompatible target)
+
+      401:
+        description: Missing or invalid JWT token
+
+      403:
+        description: User does not have Airline-Admin privileges
+
+      404:
+        description: Source or a target aircraft not found
+
+    """
+    session = SessionLocal()
+    try:
+        data = Clone_aircraft_seat_map_many_schema(**request.get_json())
+    except ValidationError as e:
+        session.close()
+        return jsonify({"message": str(e)}), 400
+    try:
+        with session.begin():
+            controller = Airline_controller(session)
+            response, status = controller.clone_aircraft_seat_map_many(data.source_id, data.target_ids)
+    except Exception as e:
+        response, status = {"message": str(e)}, 500
+    finally:
+        session.close()
+
+    return jsonify(response), status
+
 @airline_bp.route("/add/route", methods=["POST"])
 #@airline_check_body("airline_code")
 def add_route():
@@ -1011,6 +1135,7 @@ def change_route_deadline(code: str):
 
 @airline_bp.route("/<airline_code>/route", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("routes"))
 def get_routes(airline_code: str):
         """
         Get All Routes of an Airline
@@ -1850,6 +1975,7 @@ def change_base_price(code: str):
 
 @airline_bp.route("/<airline_code>/analytics/route/<code>", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
 def route_analytics(airline_code: str ,code: str):
     """
     Airline route analytics
@@ -1946,6 +2072,7 @@ def route_analytics(airline_code: str ,code: str):
 
 @airline_bp.route("/<airline_code>/analytics/flight/<id_flight>", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
 def flight_analytics(airline_code: str,id_flight: int):
     """
     Airline flight analytics
@@ -2031,6 +2158,7 @@ def flight_analytics(airline_code: str,id_flight: int):
 
 @airline_bp.route("/<airline_code>/analytics/routes", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
 def get_all_routes_analytics(airline_code: str):
     """
     Airline analytics routes
@@ -2108,6 +2236,7 @@ def get_all_routes_analytics(airline_code: str):
 
 @airline_bp.route("/<airline_code>/analytics/routes/total_revenue", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
 def get_routes_total_revenue(airline_code: str):
     """
     Airline total revenue
@@ -2172,8 +2301,126 @@ def get_routes_total_revenue(airline_code: str):
     session.close()
     return jsonify({"total_revenue": analytics}), 200
 
+@airline_bp.route("/<airline_code>/analytics/timeseries", methods=["GET"])
+#@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
+def get_revenue_timeseries(airline_code: str):
+    """
+    Airline revenue time series
+    ---
+    tags:
+      - Airline
+    summary: Passengers and revenue per day, week or month
+    description: >
+      Returns the whole chart series in one call, bucketed by day, week or month, for the airline,
+      a single route (`route_code`) or a single flight (`id_flight`). Empty buckets are returned with zeros.
+      `axis` chooses whether buckets follow the day the tickets were sold or the day the flights depart;
+      a single flight is always bucketed by sale day.
+      `start_date` to `end_date` spans at most 366 days by day, 5 years by week and 10 years by month
+      (an omitted date counts as today).
+
+      **Authorization required:** Bearer JWT Token  
+      **Allowed roles:** Airline-Admin
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - name: bucket
+        in: query
+        type: string
+        enum: [day, week, month]
+        default: day
+      - name: axis
+        in: query
+        type: string
+        enum: [sale, flight]
+        default: sale
+      - name: start_date
+        in: query
+        type: string
+        format: date
+      - name: end_date
+        in: query
+        type: string
+        format: date
+      - name: route_code
+        in: query
+        type: string
+        description: Restrict the series to one route (e.g., "AZ9")
+      - name: id_flight
+        in: query
+        type: integer
+        description: Restrict the series to one flight
+
+    responses:
+      200:
+        description: Series retrieved successfully
+        schema:
+          type: object
+          properties:
+            airline_code:
+              type: string
+              example: "AZ"
+            bucket:
+              type: string
+              example: "week"
+            axis:
+              type: string
+              example: "sale"
+            route_code:
+              type: string
+              nullable: true
+              example: null
+            id_flight:
+              type: integer
+              nullable: true
+              example: null
+            series:
+              type: array
+              items:
+                type: object
+                properties:
+                  bucket:
+                    type: string
+                    format: date
+                    example: "2026-01-05"
+                  passengers:
+                    type: integer
+                    example: 42
+                  revenue:
+                    type: number
+                    format: float
+                    example: 6120.0
+      400:
+        description: Invalid query parameters, or a date range too long for the bucket
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Airline, route or flight not found
+
+    """
+    try:
+        query_params = request.args.to_dict()
+        data = Revenue_timeseries_schema(**query_params)
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    controller = Airline_controller(session)
+    response, status = controller.get_revenue_timeseries(airline_code, data.model_dump())
+    session.close()
+    return jsonify(response), status
+
 @airline_bp.route("/<airline_code>/flight", methods=["GET"])
 #@airline_check_param("airline_code")
+@conditional_get(_scope("flights"))
 def get_airline_flights(airline_code: str):
     """
     Get all airline's flights
@@ -2258,14 +2505,129 @@ def get_airline_flights(airline_code: str):
     session.close()
     return jsonify(flights), 200
 
+@airline_bp.route("/<airline_code>/analytics/performance", methods=["GET"])
+#@airline_check_param("airline_code")
+@conditional_get(_scope("analytics"), _today)
+def get_performance_analytics(airline_code: str):
+    """
+    Airline load factor and unit revenue
+    ---
+    tags:
+      - Airline
+    summary: Load factor, RASK and yield per km for every flight or route
+    description: >
+      Returns, per flight (`level=flight`) or per route (`level=route`), seats offered, passengers,
+      revenue, route distance and the derived indicators: load factor (passengers / seats),
+      ASK and RPK (seat and passenger kilometres), RASK (revenue / ASK) and yield per km (revenue / RPK).
+      Distances are the great-circle length of the route sections. Flights can be filtered by
+      departure date and route.
 
+      **Authorization required:** Bearer JWT Token  
+      **Allowed roles:** Airline-Admin
 
+    security:
+      - Bearer: []
 
+    parameters:
+      - name: airline_code
+        in: path
+        required: true
+        type: string
+        description: IATA code of the airline (e.g., "AZ")
+      - name: level
+        in: query
+        type: string
+        enum: [flight, route]
+        default: route
+      - name: start_date
+        in: query
+        type: string
+        format: date
+        description: First departure day included (YYYY-MM-DD)
+      - name: end_date
+        in: query
+        type: string
+        format: date
+        description: Last departure day included (YYYY-MM-DD)
+      - name: route_code
+        in: query
+        type: string
+        description: Restrict the report to one route (e.g., "AZ9")
 
+    responses:
+      200:
+        description: Analytics retrieved successfully
+        schema:
+          type: object
+          properties:
+            airline_code:
+              type: string
+              example: "AZ"
+            level:
+              type: string
+              example: "route"
+            analytics:
+              type: array
+              items:
+                type: object
+                properties:
+                  route_code:
+                    type: string
+                    example: "AZ9"
+                  flights:
+                    type: integer
+                    example: 12
+                  seats:
+                    type: integer
+                    example: 2016
+                  passengers:
+                    type: integer
+                    example: 1580
+                  revenue:
+                    type: number
+                    format: float
+                    example: 221200.0
+                  distance_km:
+                    type: number
+                    format: float
+                    example: 1056.3
+                  load_factor:
+                    type: number
+                    format: float
+                    example: 0.7837
+                  ask:
+                    type: number
+                    format: float
+                    example: 2129500.8
+                  rpk:
+                    type: number
+                    format: float
+                    example: 1668954.0
+                  rask:
+                    type: number
+                    format: float
+                    example: 0.1039
+                  yield_per_km:
+                    type: number
+                    format: float
+                    example: 0.1325
+      400:
+        description: Invalid query parameters
+      401:
+        description: Missing or invalid token
+      403:
+        description: Airline-Admin role required
+      404:
+        description: Airline or route not found
 
-
-
-
-
-
-
+    """
+    try:
+        query_params = request.args.to_dict()
+        data = Performance_analytics_schema(**query_params)
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    controller = Airline_controller(session)
+    response, status = controller.get_performance_analytics(airline_code, data.model_dump())
+    session.close()
+    return jsonify(response), status
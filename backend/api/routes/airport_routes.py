@@ -4,6 +4,7 @@ from pydantic import ValidationError
 from ..controllers.airport_controller import Airport_controller
 from ..validations.airport_validation import Airport_schema, Airport_modify_schema
 from ..utils.role_checking import role_required
+from ..utils.reference_cache import reference_cache, etag_response
 
 from db import SessionLocal
 
@@ -184,12 +185,12 @@ parameters:
   - name: page
     in: query
     type: integer
-    description: Page number for pagination (default: 1)
+    description: "Page number for pagination (default: 1)"
     default: 1
   - name: per_page
     in: query
     type: integer
-    description: Number of items per page for pagination (default: 50)
+    description: "Number of items per page for pagination (default: 50)"
     default: 50
   - name: all
     in: query
@@ -241,11 +242,21 @@ responses:
 
    
     """
-    session = SessionLocal()
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     get_all = request.args.get('all', 'false').lower() == 'true'
 
+    if get_all:
+        airports = reference_cache.get("airports")
+        return etag_response({
+            "airports": airports.payload,
+            "total": len(airports.payload),
+            "page": 1,
+            "per_page": len(airports.payload),
+            "total_pages": 1
+        }, airports.etag)
+
+    session = SessionLocal()
     controller = Airport_controller(session)
     result, status_code = controller.get_all_airports(page, per_page, all=get_all)
     session.close()
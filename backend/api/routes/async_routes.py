@@ -0,0 +1,138 @@
+import asyncio
+from datetime import date
+
+from pydantic import ValidationError
+from werkzeug.http import quote_etag
+
+from . import BLUEPRINTS
+from ..controllers.airline_controller import Airline_controller
+from ..controllers.airport_controller import Airport_controller
+from ..controllers.flight_controller import Flight_controller
+from ..models.flight import Flight
+from ..query.flight_query import get_flight_seat_map, get_flight_seat_map_compact
+from ..utils.compression import etag_matches
+from ..utils.data_versions import data_etag
+from ..utils.seat_holds import seat_holds
+from ..utils.seat_map_codec import wants_compact, COMPACT_MEDIA_TYPE
+from ..validations.airline_validation import Revenue_timeseries_schema, Performance_analytics_schema
+from ..validations.flight_validation import Flight_search_schema
+
+# Async twins of the read-heavy Flask views. They run the same controllers and
+# queries through AsyncSession.run_sync, where every statement awaits the
+# asyncio driver, so one worker keeps many queries in flight; the answers,
+# ETags included, are the ones of the Flask views.
+
+
+async def _conditional(request, session, endpoint: str, scopes: list[str], extra, view):
+    """conditional_get for an async view: same ETag as the Flask endpoint, 304 without running view when it matches."""
+    etag = await session.run_sync(
+        data_etag, endpoint, request.headers.get("Accept", ""), request.args, scopes, extra
+    )
+    if etag_matches(etag, request.if_none_match):
+        return None, 304, {"ETag": quote_etag(etag)}
+    payload, status, headers = await view()
+    if status == 200:
+        headers["ETag"] = quote_etag(etag)
+    return payload, status, headers
+
+
+async def _held_seats(id_flight: int) -> list[int]:
+    if seat_holds.store.shared:
+        # the database store queries through the sync engine, off the event loop
+        return sorted(await asyncio.to_thread(seat_holds.held_seats, id_flight))
+    return sorted(seat_holds.held_seats(id_flight))
+
+
+async def flight_search(request, session):
+    try:
+        data = Flight_search_schema(**request.get_json())
+    except ValidationError as e:
+        return {"message": str(e)}, 400
+    return await session.run_sync(lambda sync_session: Flight_controller(sync_session).get_flights(
+        data.departure_airport,
+        data.arrival_airport,
+        data.round_trip_flight,
+        data.direct_flights,
+        data.departure_date_outbound,
+        data.departure_date_return,
+        data.id_class,
+    ))
+
+
+async def flight_seat_availability(request, session, id_flight: int):
+    flight = await session.get(Flight, id_flight)
+    held = await _held_seats(id_flight)
+    scopes = [f"flight:{id_flight}", f"aircraft:{flight.id_aircraft if flight else None}"]
+
+    async def view():
+        if flight is None:
+            return {"message": f"Flight {id_flight} not found"}, 404, {}
+        compact = wants_compact(request)
+        get_seat_map = get_flight_seat_map_compact if compact else get_flight_seat_map
+        data = await session.run_sync(get_seat_map, id_flight, set(held))
+        headers = {"Vary": "Accept"}
+        if compact:
+            headers["Content-Type"] = COMPACT_MEDIA_TYPE
+        return data, 200, headers
+
+    return await _conditional(request, session, "flight_bp.flight_seat_availability", scopes, held, view)
+
+
+async def search_airports(request, session):
+    query = request.args.get("q", "")
+    if not query:
+        return {"message": "Query parameter 'q' is required"}, 400
+    return await session.run_sync(lambda sync_session: Airport_controller(sync_session).search_airports(query))
+
+
+async def get_revenue_timeseries(request, session, airline_code: str):
+    async def view():
+        try:
+            data = Revenue_timeseries_schema(**request.args.to_dict())
+        except ValidationError as e:
+            return {"message": str(e)}, 400, {}
+        response, status = await session.run_sync(
+            lambda sync_session: Airline_controller(sync_session).get_revenue_timeseries(airline_code, data.model_dump())
+        )
+        return response, status, {}
+
+    return await _conditional(
+        request, session, "airline_bp.get_revenue_timeseries", [f"analytics:{airline_code}"], date.today(), view
+    )
+
+
+async def get_performance_analytics(request, session, airline_code: str):
+    async def view():
+        try:
+            data = Performance_analytics_schema(**request.args.to_dict())
+        except ValidationError as e:
+            return {"message": str(e)}, 400, {}
+        response, status = await session.run_sync(
+            lambda sync_session: Airline_controller(sync_session).get_performance_analytics(airline_code, data.model_dump())
+        )
+        return response, status, {}
+
+    return await _conditional(
+        request, session, "airline_bp.get_performance_analytics", [f"analytics:{airline_code}"], date.today(), view
+    )
+
+
+# (blueprint name in BLUEPRINTS, rule under its url prefix, methods, handler)
+ASYNC_ROUTES = [
+    ("flight", "/search", ["POST"], flight_search),
+    ("flight", "/<int:id_flight>/seat-availability", ["GET"], flight_seat_availability),
+    ("airports", "/search", ["GET"], search_airports),
+    ("airline", "/<airline_code>/analytics/timeseries", ["GET"], get_revenue_timeseries),
+    ("airline", "/<airline_code>/analytics/performance", ["GET"], get_performance_analytics),
+]
+
+
+def async_routes(app) -> list[tuple]:
+    """(rule, methods, handler) of the async routes whose Flask view the app serves, e.g. with its blueprint registered."""
+    served = {rule.rule for rule in app.url_map.iter_rules()}
+    routes = []
+    for name, rule, methods, handler in ASYNC_ROUTES:
+        rule = f"{BLUEPRINTS[name][2]}{rule}"
+        if rule in served:
+            routes.append((rule, methods, handler))
+    return routes
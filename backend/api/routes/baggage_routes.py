@@ -3,7 +3,7 @@ from flask import Blueprint, request, jsonify
 from pydantic import ValidationError
 
 from ..utils.role_checking import role_required, airline_check_param, airline_check_body
-from ..query.baggage_query import get_all_baggage
+from ..utils.reference_cache import reference_cache, etag_response
 from ..validations.baggage_validation import Baggage_roles_validation, Baggage_roles_validation_PUT, Baggage_class_policy_schema, Baggage_class_policy_PUT_schema
 from ..validations.airline_validation import Airline_aircraft_schema
 from ..controllers.baggage_controller import Baggage_controller
@@ -36,10 +36,8 @@ def get_baggage():
 
     
     """
-    session = SessionLocal()
-    result = get_all_baggage(session)
-    session.close()
-    return jsonify(result), 200
+    baggage = reference_cache.get("baggage")
+    return etag_response(baggage.payload, baggage.etag)
 
 @baggage_bp.route("/rules", methods=["POST"])
 #@airline_check_body("airline_code")
@@ -1,9 +1,15 @@
 from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from pydantic import ValidationError
-from ..validations.flight_validation import Flight_search_schema, Ticket_reservation_schema
-from ..controllers.flight_controller import Flight_controller
+from ..validations.flight_validation import Flight_search_schema, Ticket_reservation_schema, Seat_hold_schema, Seat_auto_assign_schema
+from ..controllers.flight_controller import Flight_controller, Seat_unavailable
+from ..utils.fare_quote import Quote_invalid
 from ..models.flight import Flight
-from ..query.flight_query import get_flight_seat_blocks, get_flight_seat_map
+from ..query.flight_query import get_flight_seat_blocks, get_flight_seat_map, get_flight_seat_map_compact
+from ..utils.seat_map_codec import wants_compact, seat_map_response
+from ..utils.data_versions import conditional_get
+from ..utils.metrics import bookings_total
+from ..utils.seat_holds import seat_holds
 from db import SessionLocal
 
 
@@ -82,6 +88,17 @@ responses:
               price:
                 type: number
                 nullable: true
+              fare_bucket:
+                type: integer
+                description: Fare bucket the price was quoted in, 0 is the cheapest
+              seats_left:
+                type: integer
+              quote:
+                type: string
+                nullable: true
+                description: >
+                  Signed fare quote to send back with the booking, valid for FARE_QUOTE_TTL seconds
+                  while the fare bucket does not move; null while SECRET_KEY is the default
               route_code:
                 type: string
               scheduled_arrival_day:
@@ -127,6 +144,17 @@ responses:
                     type: string
               price:
                 type: number
+              fare_bucket:
+                type: integer
+                description: Fare bucket the price was quoted in, 0 is the cheapest
+              seats_left:
+                type: integer
+              quote:
+                type: string
+                nullable: true
+                description: >
+                  Signed fare quote to send back with the booking, valid for FARE_QUOTE_TTL seconds
+                  while the fare bucket does not move; null while SECRET_KEY is the default
               route_code:
                 type: string
               scheduled_arrival_day:
@@ -181,7 +209,17 @@ responses:
     return jsonify(response), status
 
 
+def _seat_map_scopes(session, id_flight: int):
+    flight = session.get(Flight, id_flight)
+    return [f"flight:{id_flight}", f"aircraft:{flight.id_aircraft if flight else None}"]
+
+
+def _held_seats(id_flight: int):
+    return sorted(seat_holds.held_seats(id_flight))
+
+
 @flight_bp.route("/<int:id_flight>/seats-occupied", methods=["GET"])
+@conditional_get(_seat_map_scopes, _held_seats)
 def flight_seats_occupied(id_flight: int):
     """
     Get occupied seats for a flight
@@ -207,6 +245,16 @@ def flight_seats_occupied(id_flight: int):
         type: integer
         description: ID of the flight
         example: 123
+      - name: format
+        in: query
+        required: false
+        type: string
+        enum: ["compact"]
+        description: >
+          `compact` (or `Accept: application/vnd.seatmap.compact+json`) returns each cabin as
+          `rows`, `cols`, `base_cell` and base64 bitsets `seats`, `occupied` and `held` over its grid,
+          cell (x, y) at bit y * cols + x, bit i being bit i % 8 of byte i // 8. The id of a cell is
+          `base_cell + y * cols + x`, or `cell_ids[y * cols + x]` when `base_cell` is null.
 
     responses:
       200:
@@ -252,12 +300,15 @@ def flight_seats_occupied(id_flight: int):
     if flight is None:
         return jsonify({"message": f"Flight {id_flight} not found"}), 404
 
-    data = get_flight_seat_map(session, id_flight)
+    compact = wants_compact()
+    get_seat_map = get_flight_seat_map_compact if compact else get_flight_seat_map
+    data = get_seat_map(session, id_flight, seat_holds.held_seats(id_flight))
     session.close()
-    return jsonify(data), 200
+    return seat_map_response(data, compact)
 
 
 @flight_bp.route("/<int:id_flight>/seat-availability", methods=["GET"])
+@conditional_get(_seat_map_scopes, _held_seats)
 def flight_seat_availability(id_flight: int):
     """
     Get full seat map with occupancy status for a flight
@@ -266,7 +317,8 @@ def flight_seat_availability(id_flight: int):
       - Flights
     summary: Retrieve complete seat map (occupied + available)
     description: |
-      Returns **all seats** for the flight's aircraft with an `occupied` flag per seat. No authentication required.
+      Returns **all seats** for the flight's aircraft with an `occupied` flag per seat, and a `held` flag
+      for the seats reserved by an active seat hold. No authentication required.
 
     parameters:
       - name: id_flight
@@ -275,6 +327,16 @@ def flight_seat_availability(id_flight: int):
         type: integer
         description: ID of the flight
         example: 123
+      - name: format
+        in: query
+        required: false
+        type: string
+        enum: ["compact"]
+        description: >
+          `compact` (or `Accept: application/vnd.seatmap.compact+json`) returns each cabin as
+          `rows`, `cols`, `base_cell` and base64 bitsets `seats`, `occupied` and `held` over its grid,
+          cell (x, y) at bit y * cols + x, bit i being bit i % 8 of byte i // 8. The id of a cell is
+          `base_cell + y * cols + x`, or `cell_ids[y * cols + x]` when `base_cell` is null.
 
     responses:
       200:
@@ -310,6 +372,10 @@ def flight_seat_availability(id_flight: int):
                     occupied:
                       type: boolean
                       example: false
+                    held:
+                      type: boolean
+                      description: Reserved by a seat hold that has not expired, not bookable by others
+                      example: false
       404:
         description: Flight not found
 
@@ -320,9 +386,11 @@ def flight_seat_availability(id_flight: int):
         session.close()
         return jsonify({"message": f"Flight {id_flight} not found"}), 404
 
-    data = get_flight_seat_map(session, id_flight)
+    compact = wants_compact()
+    get_seat_map = get_flight_seat_map_compact if compact else get_flight_seat_map
+    data = get_seat_map(session, id_flight, seat_holds.held_seats(id_flight))
     session.close()
-    return jsonify(data), 200
+    return seat_map_response(data, compact)
 
 
 @flight_bp.route("/book", methods=["POST"])
@@ -377,6 +445,18 @@ def book_flight():
                         type: integer
                         description: Selected seat ID
                         example: 21
+                      hold_token:
+                        type: string
+                        description: >
+                          Token of the seat hold covering this seat, required while the seat is held,
+                          together with the Bearer JWT Token of the customer who made the hold
+                      quote:
+                        type: string
+                        description: >
+                          Fare quote of the flight from the search. When given, the quoted
+                          price and baggage prices are charged while the class is still sold
+                          at the quoted bucket, and the booking answers 409 once it moved;
+                          without it the current fare bucket is charged.
                       additional_baggage:
                         type: array
                         description: List of extra baggage for the passenger
@@ -434,6 +514,8 @@ def book_flight():
                 description: Details of the booked tickets
       400:
         description: Invalid request (seat already taken or missing info)
+      409:
+        description: The fare quote is expired, tampered with, for another flight or class, or its fare bucket has moved
       401:
         description: Missing or invalid token
       403:
@@ -444,14 +526,28 @@ def book_flight():
         data = Ticket_reservation_schema(**request.get_json())
     except ValidationError as e:
         return jsonify({"message": str(e)}), 400
+    # optional for now, but held seats can only be booked by the customer who holds them
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
     session = SessionLocal()
     try:
         with session.begin():
             controller = Flight_controller(session)
-            response, status = controller.book(data.id_buyer, data.tickets)
+            response, status = controller.book(data.id_buyer, data.tickets, int(identity) if identity else None)
+        for id_flight, id_seat, token in controller.converted_holds:
+            seat_holds.release(id_flight, token, [id_seat])
+        bookings_total.inc("success" if status < 400 else "rejected")
+    except Seat_unavailable as e:
+        bookings_total.inc("conflict")
+        response, status = {"message": str(e)}, 404
+    except Quote_invalid as e:
+        bookings_total.inc("rejected")
+        response, status = {"message": str(e)}, 409
     except ValueError as e:
+        bookings_total.inc("rejected")
         response, status = {"message": str(e)}, 404
     except Exception as e:
+        bookings_total.inc("error")
         response, status = {"message": str(e)}, 500
     finally:
         session.close()
@@ -459,4 +555,211 @@ def book_flight():
     return jsonify(response), status
 
 
+@flight_bp.route("/<int:id_flight>/holds", methods=["POST"])
+@jwt_required()
+def hold_seats(id_flight: int):
+    """
+    Hold seats until payment
+    ---
+    tags:
+      - Flights
+    summary: Reserve seats for SEAT_HOLD_TTL seconds
+    description: >
+      Reserves the seats so that no other booking can take them while the customer pays.
+      The returned `hold_token` must be sent as `ticket_info.hold_token` when booking the seats,
+      by the same customer; booking turns the hold into tickets. Holds expire on their own.
+      A customer has at most SEAT_HOLD_MAX_PER_USER holds running, and a flight at most
+      SEAT_HOLD_MAX_FLIGHT_SEATS held seats.
+
+      **Authorization:** Bearer JWT Token
+
+    security:
+      - Bearer: []
+
+    parameters:
+      - name: id_flight
+        in: path
+        required: true
+        type: integer
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            seats:
+              type: array
+              items:
+                type: integer
+              example: [21, 22]
+    responses:
+      201:
+        description: Seats held
+        schema:
+          type: object
+          properties:
+            hold_token:
+              type: string
+            id_flight:
+              type: integer
+            seats:
+              type: array
+              items:
+                type: integer
+            expires_at:
+              type: string
+      400:
+        description: Invalid seats, or too many
+      401:
+        description: Missing or invalid token
+      404:
+        description: Flight not found
+      409:
+        description: Some seats are already occupied or held, listed in `seats`
+      429:
+        description: Too many holds of the customer, or too many held seats on the flight
+    """
+    try:
+        data = Seat_hold_schema(**request.get_json())
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    session = SessionLocal()
+    try:
+        response, status = Flight_controller(session).hold_seats(id_flight, data.seats, int(get_jwt_identity()))
+    finally:
+        session.close()
+    return jsonify(response), status
+
+
+@flight_bp.route("/<int:id_flight>/auto-assign", methods=["POST"])
+def auto_assign_seats(id_flight: int):
+    """
+    Pick seats for a party
+    ---
+    tags:
+      - Flights
+    summary: Best free seats of a class for a group, optionally held
+    description: >
+      Finds free seats for the whole party in the cabins of the class. With `keep_together`
+      it looks for seats side by side in one row, then one row across the aisle, then two
+      consecutive rows, and falls back to single seats (`arrangement` says which one was used).
+      `preference` favours window or aisle seats. With `hold` the seats are also held, see
+      POST /flight/{id_flight}/holds; that needs a Bearer JWT Token.
+
+    parameters:
+      - name: id_flight
+        in: path
+        required: true
+        type: integer
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            party_size:
+              type: integer
+              example: 3
+            id_class:
+              type: integer
+              example: 4
+            keep_together:
+              type: boolean
+              default: true
+            preference:
+              type: string
+              enum: ["window", "aisle"]
+              nullable: true
+            hold:
+              type: boolean
+              default: false
+    responses:
+      200:
+        description: Seats found
+        schema:
+          type: object
+          properties:
+            id_flight:
+              type: integer
+            arrangement:
+              type: string
+              enum: ["row", "row_across_aisle", "two_rows", "scattered"]
+            seats:
+              type: array
+              items:
+                type: object
+                properties:
+                  id_cell:
+                    type: integer
+                  x:
+                    type: integer
+                  y:
+                    type: integer
+            hold_token:
+              type: string
+            expires_at:
+              type: string
+      400:
+        description: Invalid request
+      401:
+        description: hold without a valid token
+      404:
+        description: Flight not found, or no seats of the class
+      409:
+        description: Not enough free seats, or they were taken while holding them
+      429:
+        description: Too many holds of the customer, or too many held seats on the flight
+    """
+    try:
+        data = Seat_auto_assign_schema(**request.get_json())
+    except ValidationError as e:
+        return jsonify({"message": str(e)}), 400
+    id_user = None
+    if data.hold:
+        verify_jwt_in_request()
+        id_user = int(get_jwt_identity())
+    session = SessionLocal()
+    try:
+        response, status = Flight_controller(session).auto_assign_seats(
+            id_flight,
+            data.party_size,
+            data.id_class,
+            data.keep_together,
+            data.preference.value if data.preference else None,
+            data.hold,
+            id_user,
+        )
+    finally:
+        session.close()
+    return jsonify(response), status
+
 
+@flight_bp.route("/<int:id_flight>/holds/<string:hold_token>", methods=["DELETE"])
+@jwt_required()
+def release_seat_hold(id_flight: int, hold_token: str):
+    """
+    Release a seat hold
+    ---
+    tags:
+      - Flights
+    summary: Give back the seats of a hold before it expires
+    description: Only the customer who made the hold can release it.
+    security:
+      - Bearer: []
+    parameters:
+      - name: id_flight
+        in: path
+        required: true
+        type: integer
+      - name: hold_token
+        in: path
+        required: true
+        type: string
+    responses:
+      200:
+        description: Hold released
+      401:
+        description: Missing or invalid token
+    """
+    seat_holds.release(id_flight, hold_token, id_user=int(get_jwt_identity()))
+    return jsonify({"message": "Seat hold released"}), 200
@@ -1,7 +1,6 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from ..utils.role_checking import role_required
-from ..query.aircraft_query import all_manufacturer
-from db import SessionLocal
+from ..utils.reference_cache import reference_cache, etag_response
 
 manufacturer_bp = Blueprint("manufacturer_bp", __name__)
 
@@ -44,6 +43,5 @@ def get_all_manufacturer():
           403:
             description: User does not have the required role
         """
-        session = SessionLocal()
-        manufacturer = all_manufacturer(session)
-        return jsonify(manufacturer), 200
\ No newline at end of file
+        manufacturer = reference_cache.get("manufacturers")
+        return etag_response(manufacturer.payload, manufacturer.etag)
\ No newline at end of file
@@ -270,8 +270,8 @@ def logout():
               type: string
               example: "Logout successful"
     """
-    jti = get_jwt()["jti"]
-    blacklisted_tokens.add(jti)
+    claims = get_jwt()
+    blacklisted_tokens.revoke(claims["jti"], claims.get("exp"))
     return jsonify(msg="Logout successful"), 200
 
 
@@ -441,9 +441,29 @@ def get_flights():
 
       **Note:** The price to display is `price` from the ticket object, not the flight `base_price`.
 
+      When `page` is given the response is paginated and wrapped in
+      `{"flights": [...], "total", "page", "per_page", "total_pages"}`.
+
     security:
       - Bearer: []
 
+    parameters:
+      - name: when
+        in: query
+        type: string
+        enum: [all, upcoming, past]
+        default: all
+        description: Filter trips by departure day relative to today
+      - name: page
+        in: query
+        type: integer
+        description: Page number, enables pagination
+      - name: per_page
+        in: query
+        type: integer
+        default: 20
+        description: Number of trips per page
+
     responses:
       200:
         description: List of purchased flights
@@ -566,10 +586,14 @@ def get_flights():
       403:
         description: Unauthorized
     """
+    when = request.args.get('when', 'all')
+    page = request.args.get('page', None, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+
     session = SessionLocal()
     id = get_jwt_identity()
     controller = User_controller(session)
-    response, status = controller.get_user_flights(id)
+    response, status = controller.get_user_flights(id, when, page, per_page)
     session.close()
     return jsonify(response), status
 
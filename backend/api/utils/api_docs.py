@@ -0,0 +1,57 @@
+import json
+import os
+
+from flasgger import Swagger
+
+
+TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "Flight App API",
+        "version": "1.0",
+    },
+    "securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "JWT Authorization header using the Bearer scheme. Example: 'Bearer <token>'"
+        }
+    },
+    "security": [{"Bearer": []}],
+}
+
+
+class Cached_swagger(Swagger):
+    """
+    Swagger that builds each spec once, on the first request for it, and keeps
+    it also in debug mode (flasgger rebuilds it on every hit there). With
+    spec_file set the spec written by build_apispec.py is served instead and
+    no docstring is parsed at all.
+    """
+
+    def __init__(self, *args, spec_file: str | None = None, **kwargs):
+        self.spec_file = spec_file
+        super().__init__(*args, **kwargs)
+
+    def get_apispecs(self, endpoint="apispec_1"):
+        spec = self.apispecs.get(endpoint)
+        if spec is None:
+            if self.spec_file:
+                with open(self.spec_file) as f:
+                    spec = json.load(f)
+            else:
+                spec = super().get_apispecs(endpoint)
+            self.apispecs[endpoint] = spec
+        return spec
+
+
+def register_api_docs(app) -> Cached_swagger:
+    """/apidocs/ and /apispec_1.json; SWAGGER_SPEC_FILE is only used if the file exists."""
+    spec_file = app.config["SWAGGER_SPEC_FILE"]
+    if spec_file and not os.path.isfile(spec_file):
+        app.logger.warning("SWAGGER_SPEC_FILE %s not found, the spec will be built from the docstrings", spec_file)
+        spec_file = None
+    swagger = Cached_swagger(app, template=TEMPLATE, spec_file=spec_file)
+    app.extensions["swagger"] = swagger
+    return swagger
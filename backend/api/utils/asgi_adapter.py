@@ -0,0 +1,185 @@
+import gzip
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.datastructures import Headers
+from werkzeug.exceptions import HTTPException, BadRequest
+from werkzeug.http import parse_set_header, quote_etag, unquote_etag
+from werkzeug.routing import Map, Rule
+from werkzeug.sansio.request import Request
+
+from .compression import compressible, GZIP_ETAG_SUFFIX
+from .metrics import record_request, requests_in_flight
+from .server_timing import collect_server_timing, format_server_timing
+from .sql_instrumentation import collect_sql_stats, report_sql_stats
+
+
+class Async_request(Request):
+    """werkzeug's sans-IO request (args, headers, accept_mimetypes, if_none_match, ...) of an ASGI scope, plus the body."""
+
+    def __init__(self, scope: dict, body: bytes):
+        client = scope.get("client")
+        super().__init__(
+            scope["method"],
+            scope.get("scheme", "http"),
+            scope.get("server"),
+            scope.get("root_path", ""),
+            scope["path"],
+            scope.get("query_string", b""),
+            Headers([(name.decode("latin-1"), value.decode("latin-1")) for name, value in scope["headers"]]),
+            client[0] if client else None,
+        )
+        self.body = body
+
+    def get_json(self):
+        if not self.body:
+            return None
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise BadRequest("Failed to decode JSON object")
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+class _Threaded_wsgi_instance(WsgiToAsgiInstance):
+    # asgiref runs every WSGI call on one shared thread, the Flask routes get the executor of the loop instead
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__["run_wsgi_app"].func, thread_sensitive=False)
+
+
+class _Threaded_wsgi(WsgiToAsgi):
+
+    async def __call__(self, scope, receive, send):
+        await _Threaded_wsgi_instance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+class Asgi_app:
+    """
+    ASGI application of the async serving mode. routes are (rule, methods,
+    handler): their requests are served on the event loop, handler(request,
+    session, **url_args) getting an AsyncSession of engine and returning
+    (payload, status) or (payload, status, headers); every other request goes
+    to the Flask app on a thread. Payloads are encoded with the JSON provider
+    of the Flask app, CORS, gzip, request metrics, SQL instrumentation and
+    Server-Timing follow its configuration, under the endpoint names of the
+    Flask views, so both paths answer and report alike.
+    """
+
+    def __init__(self, flask_app, engine, routes, cors_origins: list[str]):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        self.flask_app = flask_app
+        self.engine = engine
+        self.sessions = async_sessionmaker(engine, expire_on_commit=False)
+        flask_endpoints = {
+            (rule.rule, method): rule.endpoint for rule in flask_app.url_map.iter_rules() for method in rule.methods
+        }
+        self.url_map = Map([
+            Rule(rule, methods=methods, endpoint=(handler, flask_endpoints.get((rule, methods[0]), handler.__name__)))
+            for rule, methods, handler in routes
+        ])
+        self.cors_origins = set(cors_origins)
+        self.wsgi = _Threaded_wsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        try:
+            (handler, endpoint), url_args = self.url_map.bind("localhost").match(scope["path"], scope["method"])
+        except HTTPException:
+            await self.wsgi(scope, receive, send)
+            return
+
+        config = self.flask_app.config
+        request = Async_request(scope, await _read_body(receive))
+        started = time.perf_counter()
+        # every request runs in its own task, the collectors are scoped to it
+        timings = collect_server_timing()
+        sql_stats = collect_sql_stats() if config["SQL_INSTRUMENTATION"] else None
+        if config["METRICS_ENABLED"]:
+            requests_in_flight.inc()
+        try:
+            try:
+                async with self.sessions() as session:
+                    result = await handler(request, session, **url_args)
+            except HTTPException as e:
+                result = {"message": e.description}, e.code
+            except Exception as e:
+                self.flask_app.logger.exception("async handler %s failed", handler.__name__)
+                result = {"message": str(e)}, 500
+            payload, status, headers = result if len(result) == 3 else (*result, None)
+            headers = Headers(headers)
+            if sql_stats is not None:
+                report_sql_stats(self.flask_app, sql_stats, request.method, request.path, endpoint, status, headers)
+            await self._respond(request, send, payload, status, headers, timings)
+            if config["METRICS_ENABLED"]:
+                record_request(
+                    endpoint.rpartition(".")[0],
+                    endpoint,
+                    request.method,
+                    status,
+                    time.perf_counter() - started,
+                    sql_stats.count if sql_stats is not None else None,
+                )
+        finally:
+            if config["METRICS_ENABLED"]:
+                requests_in_flight.dec()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _respond(self, request: Async_request, send, payload, status: int, headers: Headers, timings: list):
+        if timings:
+            headers.add("Server-Timing", format_server_timing(timings))
+        body = b""
+        if payload is not None:
+            body = self.flask_app.json.dumps(payload).encode()
+            headers.setdefault("Content-Type", "application/json")
+        vary = parse_set_header(headers.get("Vary"))
+
+        origin = request.headers.get("Origin")
+        if origin in self.cors_origins:
+            headers["Access-Control-Allow-Origin"] = origin
+            vary.add("Origin")
+
+        config = self.flask_app.config
+        if config["COMPRESSION_ENABLED"] and 200 <= status < 300 and compressible(headers.get("Content-Type", "")):
+            vary.add("Accept-Encoding")
+            if "gzip" in request.accept_encodings and len(body) >= config["COMPRESSION_MIN_SIZE"]:
+                body = gzip.compress(body, compresslevel=config["COMPRESSION_LEVEL"], mtime=0)
+                headers["Content-Encoding"] = "gzip"
+                if "ETag" in headers:
+                    etag, weak = unquote_etag(headers["ETag"])
+                    headers["ETag"] = quote_etag(f"{etag}{GZIP_ETAG_SUFFIX}", weak)
+
+        if vary:
+            headers["Vary"] = vary.to_header()
+        headers["Content-Length"] = str(len(body))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+        })
+        await send({"type": "http.response.body", "body": body if request.method != "HEAD" else b""})
@@ -1 +1,207 @@
-blacklisted_tokens = set()
\ No newline at end of file
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete
+
+from config import Config
+from db import SessionLocal
+from ..models.revoked_token import Revoked_token
+
+
+class Bloom_filter:
+
+    def __init__(self, size_bits: int, hashes: int):
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hashes)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class Rotating_bloom_filter:
+    """
+    Two bloom filter generations swapped every period. A key survives at least
+    one full period, then falls off, so memory stays fixed no matter how many
+    tokens are revoked as long as period >= token lifetime.
+    """
+
+    def __init__(self, period_seconds: float, size_bits: int, hashes: int):
+        self.period_seconds = period_seconds
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.current = Bloom_filter(size_bits, hashes)
+        self.previous = Bloom_filter(size_bits, hashes)
+        self.rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _rotate_if_due(self):
+        if time.monotonic() - self.rotated_at < self.period_seconds:
+            return
+        with self._lock:
+            # checked again: a concurrent caller may have rotated meanwhile, and
+            # rotating twice would drop the keys added in the last period
+            periods = int((time.monotonic() - self.rotated_at) // self.period_seconds)
+            if periods == 0:
+                return
+            # after two idle periods or more nothing in either generation is recent
+            self.previous = self.current if periods == 1 else Bloom_filter(self.size_bits, self.hashes)
+            self.current = Bloom_filter(self.size_bits, self.hashes)
+            self.rotated_at += periods * self.period_seconds
+
+    def add(self, key: str):
+        self._rotate_if_due()
+        self.current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._rotate_if_due()
+        return key in self.current or key in self.previous
+
+
+class Memory_revocation_store:
+    """Local stand-in for the shared backend, visible to this process only."""
+
+    shared = False
+
+    def __init__(self, purge_interval_seconds: int = 60):
+        self.entries: dict[str, datetime] = {}
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.monotonic() + purge_interval_seconds
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self.entries[jti] = expires_at
+            if time.monotonic() >= self._next_purge:
+                now = datetime.utcnow()
+                self.entries = {k: v for k, v in self.entries.items() if v > now}
+                self._next_purge = time.monotonic() + self.purge_interval_seconds
+
+    def contains(self, jti: str) -> bool:
+        expires_at = self.entries.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+    def revoked_since(self, since: datetime) -> list[tuple[str, datetime]]:
+        return []
+
+
+class Database_revocation_store:
+    """Revocations kept in the revoked_tokens table, shared by every worker."""
+
+    shared = True
+
+    def __init__(self, purge_interval_seconds: int = 600):
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.monotonic() + purge_interval_seconds
+
+    def add(self, jti: str, expires_at: datetime):
+        session = SessionLocal()
+        try:
+            session.merge(Revoked_token(jti=jti, expires_at=expires_at, created_at=datetime.utcnow()))
+            if time.monotonic() >= self._next_purge:
+                session.execute(delete(Revoked_token).where(Revoked_token.expires_at <= datetime.utcnow()))
+                self._next_purge = time.monotonic() + self.purge_interval_seconds
+            session.commit()
+        finally:
+            session.close()
+
+    def contains(self, jti: str) -> bool:
+        session = SessionLocal()
+        try:
+            token = session.get(Revoked_token, jti)
+            return token is not None and token.expires_at > datetime.utcnow()
+        finally:
+            session.close()
+
+    def revoked_since(self, since: datetime) -> list[tuple[str, datetime]]:
+        stmt = (
+            select(Revoked_token.jti, Revoked_token.created_at)
+            .where(
+                Revoked_token.created_at >= since,
+                Revoked_token.expires_at > datetime.utcnow()
+            )
+        )
+        session = SessionLocal()
+        try:
+            return [(row.jti, row.created_at) for row in session.execute(stmt).all()]
+        finally:
+            session.close()
+
+
+class Token_revocation_list:
+    """
+    Revoked JWT ids with an in-memory bloom filter in front of the store.
+
+    A negative bloom answer is final, so an unrevoked token costs a few hash
+    probes and no I/O. Positives are confirmed against the store. With a shared
+    store each worker pulls revocations made elsewhere every sync_interval
+    seconds, which bounds how long a token revoked on another worker stays usable.
+    """
+
+    def __init__(self, store, token_ttl: timedelta, sync_interval_seconds: int = 5,
+                 bloom_bits: int = 1 << 20, bloom_hashes: int = 7):
+        self.store = store
+        self.token_ttl = token_ttl
+        self.sync_interval_seconds = sync_interval_seconds
+        self.bloom = Rotating_bloom_filter(token_ttl.total_seconds(), bloom_bits, bloom_hashes)
+        self._synced_until = datetime.utcnow() - token_ttl
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def _sync_if_due(self):
+        if not self.store.shared or time.monotonic() < self._next_sync:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+            # overlap the window so rows committed late by other workers are not missed
+            since = self._synced_until - timedelta(seconds=self.sync_interval_seconds)
+            for jti, created_at in self.store.revoked_since(since):
+                self.bloom.add(jti)
+                self._synced_until = max(self._synced_until, created_at)
+            self._next_sync = time.monotonic() + self.sync_interval_seconds
+
+    def revoke(self, jti: str, exp: int | None = None):
+        if exp is not None:
+            expires_at = datetime.utcfromtimestamp(exp)
+        else:
+            expires_at = datetime.utcnow() + self.token_ttl
+        self.store.add(jti, expires_at)
+        self.bloom.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self._sync_if_due()
+        if jti not in self.bloom:
+            return False
+        return self.store.contains(jti)
+
+
+def create_revocation_list(config) -> Token_revocation_list:
+    if config.JWT_REVOCATION_BACKEND == "database":
+        store = Database_revocation_store()
+    elif config.JWT_REVOCATION_BACKEND == "memory":
+        store = Memory_revocation_store()
+    else:
+        raise ValueError(f"Unknown JWT_REVOCATION_BACKEND: {config.JWT_REVOCATION_BACKEND}")
+
+    return Token_revocation_list(
+        store,
+        token_ttl=config.JWT_ACCESS_TOKEN_EXPIRES,
+        sync_interval_seconds=config.JWT_REVOCATION_SYNC_SECONDS,
+        bloom_bits=config.JWT_REVOCATION_BLOOM_BITS,
+    )
+
+
+blacklisted_tokens = create_revocation_list(Config)
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+class Versioned_cache:
+    """
+    Small LRU for computed results, grouped in scopes (e.g. one per airline).
+
+    Entries are keyed by the version of their scope the caller read from
+    data_versions before computing, so a change committed by any worker moves
+    every process past the entries of that scope at once; stale entries are
+    never read again and age out of the LRU. The TTL bounds their memory.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: int = 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, scope, version, key, compute):
+        full_key = (scope, version, key)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self.entries.get(full_key)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self.entries.move_to_end(full_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self.entries[full_key] = (now, value)
+            self.entries.move_to_end(full_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+
+analytics_cache = Versioned_cache(Config.ANALYTICS_CACHE_SIZE, Config.ANALYTICS_CACHE_TTL)
@@ -0,0 +1,53 @@
+import gzip
+
+from flask import request
+
+# a gzip body is another representation, so it gets another strong ETag
+GZIP_ETAG_SUFFIX = "-gzip"
+
+
+def etag_matches(etag: str, if_none_match=None) -> bool:
+    """If-None-Match (of the current request by default) holds etag, for the plain or the gzip representation."""
+    if if_none_match is None:
+        if_none_match = request.if_none_match
+    return etag in if_none_match or f"{etag}{GZIP_ETAG_SUFFIX}" in if_none_match
+
+
+def compressible(mimetype: str) -> bool:
+    return mimetype == "application/json" or mimetype.endswith("+json") or mimetype.startswith("text/")
+
+
+def register_compression(app):
+    """
+    gzip successful JSON and text responses of at least COMPRESSION_MIN_SIZE
+    bytes for clients that accept it. Register it before the other
+    after_request hooks so that it runs last, on the final body.
+    """
+    if not app.config["COMPRESSION_ENABLED"]:
+        return
+    min_size = app.config["COMPRESSION_MIN_SIZE"]
+    level = app.config["COMPRESSION_LEVEL"]
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            not 200 <= response.status_code < 300
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not compressible(response.mimetype or "")
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        if "gzip" not in request.accept_encodings:
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        response.set_data(gzip.compress(body, compresslevel=level, mtime=0))
+        response.headers["Content-Encoding"] = "gzip"
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}{GZIP_ETAG_SUFFIX}", weak)
+        return response
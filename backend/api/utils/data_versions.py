@@ -0,0 +1,94 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import request, make_response, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from db import SessionLocal
+from ..models.data_version import Data_version
+from ..query.revenue_query import _dialect_insert
+from .compression import etag_matches
+
+# bumped by bulk jobs that write outside the API, moves every ETag at once
+ALL_SCOPE = "*"
+
+
+def bump_versions(session: Session, *scopes: str):
+    """
+    Move the versions of the scopes forward in the caller's transaction, so
+    that the ETags built from them change when it commits. Call it last: the
+    rows stay locked until the commit.
+    """
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    now = datetime.utcnow()
+    stmt = _dialect_insert(session)(Data_version).values(
+        [{"scope": scope, "version": 1, "updated_at": now} for scope in scopes]
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=[Data_version.scope],
+        set_={"version": Data_version.version + 1, "updated_at": now},
+    ))
+
+
+def get_versions(session: Session, scopes: list[str]) -> dict[str, int]:
+    stmt = select(Data_version.scope, Data_version.version).where(Data_version.scope.in_(scopes))
+    versions = dict(session.execute(stmt).all())
+    return {scope: versions.get(scope, 0) for scope in scopes}
+
+
+def data_etag(session: Session, endpoint: str, accept: str, args, scopes: list[str], extra=None) -> str:
+    """Strong ETag of a GET from its endpoint, Accept header and URL arguments (a MultiDict) and the versions of the scopes."""
+    names = [ALL_SCOPE, *scopes]
+    versions = get_versions(session, names)
+    parts = [endpoint, accept]
+    parts += [f"{key}={value}" for key, value in sorted(args.items(multi=True))]
+    parts += [f"{name}@{versions[name]}" for name in names]
+    if extra is not None:
+        parts.append(repr(extra))
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def conditional_get(scopes, extra=None):
+    """
+    Strong ETag for a GET view from the versions of the scopes it reads,
+    scopes(session, **view_args) -> scope names, plus the URL arguments and the
+    Accept header. When If-None-Match holds it the view does not run and the
+    answer is 304, after one lookup in data_versions. extra(**view_args) adds
+    state kept outside the database, e.g. in-memory seat holds.
+
+    The versions are read before the view queries, so a body can only be newer
+    than its ETag, never older.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            session = SessionLocal()
+            try:
+                etag = data_etag(
+                    session,
+                    request.endpoint,
+                    request.headers.get("Accept", ""),
+                    request.args,
+                    scopes(session, **kwargs),
+                    extra(**kwargs) if extra is not None else None,
+                )
+            finally:
+                session.close()
+
+            if etag_matches(etag):
+                response = Response(status=304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,54 @@
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from config import Config, DEFAULT_SECRET_KEY
+
+
+class Quote_invalid(ValueError):
+    pass
+
+
+class Fare_quote_signer:
+    """
+    Signed, time-limited fare quotes. Search hands one out per flight with the
+    price it displayed, the fare bucket of that price and the extra-baggage
+    prices of the airline; book charges those amounts after checking the
+    signature and the age, as long as the flight class is still sold at that
+    bucket. The prices are only as trustworthy as the key, so with the default
+    SECRET_KEY no quote is issued or accepted.
+    """
+
+    def __init__(self, secret_key: str, max_age: int):
+        self.max_age = max_age
+        self.enabled = secret_key != DEFAULT_SECRET_KEY
+        self.serializer = URLSafeTimedSerializer(secret_key, salt="fare-quote")
+
+    def sign(self, id_flight: int, id_class: int, price: float, bucket: int, baggage_prices: dict) -> str | None:
+        if not self.enabled:
+            return None
+        return self.serializer.dumps({
+            "f": id_flight,
+            "c": id_class,
+            "p": price,
+            "k": bucket,
+            "b": {str(id_baggage): value for id_baggage, value in baggage_prices.items()},
+        })
+
+    def load(self, token: str) -> dict:
+        if not self.enabled:
+            raise Quote_invalid("Fare quotes are not accepted until SECRET_KEY is set, book without the quote")
+        try:
+            quote = self.serializer.loads(token, max_age=self.max_age)
+        except SignatureExpired:
+            raise Quote_invalid("The fare quote has expired, search the flight again")
+        except BadSignature:
+            raise Quote_invalid("Invalid fare quote")
+        return {
+            "id_flight": quote["f"],
+            "id_class": quote["c"],
+            "price": quote["p"],
+            "bucket": quote.get("k"),
+            "baggage_prices": {int(id_baggage): value for id_baggage, value in quote["b"].items()},
+        }
+
+
+fare_quotes = Fare_quote_signer(Config.SECRET_KEY, Config.FARE_QUOTE_TTL)
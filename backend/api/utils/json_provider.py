@@ -0,0 +1,86 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib provider is used without it
+    orjson = None
+
+
+def _default(o):
+    """Types neither encoder knows: Decimal as a number, UUID as a string, sets as lists."""
+    if isinstance(o, decimal.Decimal):
+        return float(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class Stdlib_json_provider(DefaultJSONProvider):
+    """
+    Flask's provider with dates, datetimes and times as ISO 8601, like orjson
+    writes them, instead of HTTP dates. Query code hands them over as they come
+    from the database.
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (date, time)):
+            return o.isoformat()
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            return dataclasses.asdict(o)
+        return _default(o)
+
+
+class Orjson_json_provider(Stdlib_json_provider):
+    """
+    orjson for jsonify and request bodies: datetimes, dates, times, dataclasses
+    and non-string keys are encoded natively, and responses are built from the
+    bytes without a round trip through str. Calls with json.dumps options
+    (indent, sort_keys, ...) go to the stdlib provider.
+    """
+
+    OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self.OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.OPTIONS) + b"\n",
+            mimetype=self.mimetype,
+        )
+
+
+JSON_PROVIDERS = {
+    "orjson": Orjson_json_provider,
+    "stdlib": Stdlib_json_provider,
+}
+
+
+def register_json_provider(app):
+    """JSON_PROVIDER: orjson, stdlib, or auto for orjson when it is installed."""
+    name = app.config["JSON_PROVIDER"]
+    if name == "auto":
+        name = "orjson" if orjson is not None else "stdlib"
+    if name not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON_PROVIDER: {name}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON_PROVIDER=orjson but orjson is not installed")
+    app.json = JSON_PROVIDERS[name](app)
@@ -0,0 +1,242 @@
+import hmac
+import threading
+import time
+
+from flask import g, request, Response
+
+
+# scrapes without METRICS_TOKEN are only answered from the host itself
+LOOPBACK_ADDRESSES = {"127.0.0.1", "::1"}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self.values[label_values] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """Cumulative buckets kept as plain per-bucket counts, summed only when scraped."""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics_registry:
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = {}
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labels: tuple = ()) -> Gauge:
+        metric = Gauge(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, name: str, collect):
+        """collect() runs at scrape time to refresh gauges that are cheaper to read than to track."""
+        self.collectors[name] = collect
+
+    def render(self) -> str:
+        for collect in self.collectors.values():
+            collect()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics_registry()
+
+request_duration = metrics.histogram(
+    "http_request_duration_seconds", "Request latency per blueprint and endpoint.", ("blueprint", "endpoint", "method")
+)
+requests_total = metrics.counter(
+    "http_requests_total", "Requests per endpoint and status code.", ("endpoint", "method", "status")
+)
+requests_in_flight = metrics.gauge("http_requests_in_flight", "Requests being served right now.")
+request_queries = metrics.histogram(
+    "http_request_sql_queries", "SQL statements per request.", ("endpoint",), buckets=(1, 2, 5, 10, 20, 50, 100, 250)
+)
+db_pool = metrics.gauge("db_pool_connections", "Connections of the SQLAlchemy pool by state.", ("state",))
+cache_requests = metrics.gauge("cache_requests", "Cache lookups since start by result.", ("cache", "result"))
+cache_hit_ratio = metrics.gauge("cache_hit_ratio", "Share of cache lookups served from memory.", ("cache",))
+bookings_total = metrics.counter(
+    "bookings_total", "Booking requests by outcome: success, conflict, rejected or error.", ("result",)
+)
+
+
+def record_request(blueprint: str, endpoint: str, method: str, status: int, seconds: float, queries: int | None):
+    request_duration.observe(seconds, blueprint, endpoint, method)
+    requests_total.inc(endpoint, method, str(status))
+    if queries is not None:
+        request_queries.observe(queries, endpoint)
+
+
+def register_metrics(app, engine, caches: dict):
+    """
+    Time every request and expose everything on GET /metrics in the Prometheus
+    text format. caches maps a label to an object with hits and misses counters.
+    Off unless METRICS_ENABLED is set; scrapers send METRICS_TOKEN as a bearer
+    token, and without one configured only the host itself may scrape.
+    """
+    if not app.config["METRICS_ENABLED"]:
+        return
+    token = app.config["METRICS_TOKEN"]
+
+    def collect_pool():
+        pool = engine.pool
+        for state, read in (("size", "size"), ("checked_out", "checkedout"),
+                            ("checked_in", "checkedin"), ("overflow", "overflow")):
+            if hasattr(pool, read):
+                # QueuePool.overflow() is negative while the pool is not full
+                db_pool.set(state, value=max(getattr(pool, read)(), 0))
+
+    def collect_caches():
+        for name, cache in caches.items():
+            hits, misses = cache.hits, cache.misses
+            cache_requests.set(name, "hit", value=hits)
+            cache_requests.set(name, "miss", value=misses)
+            cache_hit_ratio.set(name, value=round(hits / (hits + misses), 4) if hits + misses else 0)
+
+    metrics.add_collector("db_pool", collect_pool)
+    metrics.add_collector("caches", collect_caches)
+
+    @app.before_request
+    def start_request_timer():
+        if request.path == "/metrics":
+            return
+        g.metrics_started = time.perf_counter()
+        requests_in_flight.inc()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get("metrics_started")
+        if started is None:
+            return response
+        stats = g.get("sql_stats")
+        record_request(
+            request.blueprint or "",
+            request.endpoint or "unmatched",
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            stats.count if stats is not None else None,
+        )
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        if g.pop("metrics_started", None) is not None:
+            requests_in_flight.dec()
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """
+        Prometheus metrics
+        ---
+        tags:
+          - Monitoring
+        summary: Request latency, in-flight requests, DB pool, cache and booking counters
+        description: >
+          Needs `Authorization: Bearer <METRICS_TOKEN>`; without METRICS_TOKEN configured it only
+          answers requests from the host itself.
+        produces:
+          - text/plain
+        security:
+          - Bearer: []
+        responses:
+          200:
+            description: Metrics in the Prometheus text exposition format
+          401:
+            description: Missing or wrong metrics token
+          403:
+            description: No METRICS_TOKEN configured and the request is not from the host itself
+        """
+        if token:
+            sent = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if not hmac.compare_digest(sent.encode(), token.encode()):
+                return Response("Missing or wrong metrics token\n", status=401, mimetype="text/plain",
+                                headers={"WWW-Authenticate": "Bearer"})
+        elif request.remote_addr not in LOOPBACK_ADDRESSES:
+            return Response("Set METRICS_TOKEN to scrape from other hosts\n", status=403, mimetype="text/plain")
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
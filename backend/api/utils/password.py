@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+
+
+class Password_hasher_busy(Exception):
+    pass
+
+
+class Password_hasher:
+    """
+    Hashes and verifies passwords on a bounded thread pool.
+
+    hashlib releases the GIL while running scrypt/pbkdf2, so hashing on the pool
+    does not stall the other request threads. At most workers + max_pending jobs
+    are accepted. A request that cannot get a slot within timeout seconds fails
+    with Password_hasher_busy instead of queueing forever.
+    """
+
+    def __init__(self, method: str, workers: int, max_pending: int, timeout: float):
+        self.method = method
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._method_prefix = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Password_hasher_busy("Password hashing queue is full")
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, hashed: str, password: str) -> bool:
+        return self._run(check_password_hash, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        # werkzeug expands the configured method with its default cost, e.g. "scrypt" -> "scrypt:32768:8:1"
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash("", self.method).split("$", 1)[0]
+        return hashed.split("$", 1)[0] != self._method_prefix
+
+
+password_hasher = Password_hasher(
+    Config.PASSWORD_HASH_METHOD,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    timeout=Config.PASSWORD_HASH_TIMEOUT,
+)
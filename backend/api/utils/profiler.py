@@ -0,0 +1,234 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from flask import g, request, jsonify
+
+from .role_checking import role_required
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Request_profile:
+
+    def __init__(self, thread_id: int, sampled: bool):
+        self.thread_id = thread_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+        self.stacks: dict[str, int] = {}
+        self.samples = 0
+
+    def add(self, stack: str):
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+
+class Sampling_profiler:
+    """
+    Wall-clock stack sampler for requests in flight.
+
+    One daemon thread reads sys._current_frames() every interval_ms and adds
+    the stack of each thread serving a request to that request's profile.
+    When no request is in flight the thread blocks on an event, so an idle
+    worker pays nothing. A profile is written only if the request took at
+    least threshold_ms or was picked by sample_rate; the rest are dropped.
+    """
+
+    def __init__(self, directory: str, interval_ms: float = 5, threshold_ms: float = 500,
+                 sample_rate: float = 0.0, max_files: int = 200, max_depth: int = 64):
+        self.directory = directory
+        self.interval = interval_ms / 1000
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.max_depth = max_depth
+        self.active: dict[int, Request_profile] = {}
+        self._labels: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _frame_label(self, code, lineno: int) -> str:
+        key = (code, lineno)
+        label = self._labels.get(key)
+        if label is None:
+            path = code.co_filename
+            if path.startswith(BACKEND_DIR):
+                path = os.path.relpath(path, BACKEND_DIR)
+            elif "site-packages" in path:
+                path = path.split("site-packages" + os.sep, 1)[1]
+            label = self._labels[key] = f"{path}:{code.co_name}:{lineno}"
+        return label
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(self._frame_label(frame.f_code, frame.f_lineno))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            if not self.active:
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                profiles = list(self.active.values())
+            for profile in profiles:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    profile.add(self._collapse(frame))
+
+    def start_request(self) -> Request_profile:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                    self._thread.start()
+        profile = Request_profile(threading.get_ident(), random.random() < self.sample_rate)
+        with self._lock:
+            self.active[profile.thread_id] = profile
+        self._wake.set()
+        return profile
+
+    def finish_request(self, profile: Request_profile, method: str, path: str, endpoint: str | None, status: int | None):
+        with self._lock:
+            self.active.pop(profile.thread_id, None)
+        duration_ms = (time.perf_counter() - profile.started) * 1000
+        if (duration_ms < self.threshold_ms and not profile.sampled) or not profile.samples:
+            return
+
+        stamp = profile.started_at.strftime("%Y%m%dT%H%M%S%f")
+        name = f"{stamp}-{(endpoint or 'unmatched').replace('.', '_')}-{int(duration_ms)}ms.json"
+        with open(os.path.join(self.directory, name), "w") as f:
+            json.dump({
+                "method": method,
+                "path": path,
+                "endpoint": endpoint,
+                "status": status,
+                "duration_ms": round(duration_ms, 2),
+                "started_at": profile.started_at.isoformat(),
+                "interval_ms": self.interval * 1000,
+                "sampled": profile.sampled,
+                "samples": profile.samples,
+                "stacks": profile.stacks,
+            }, f)
+        self._rotate()
+
+    def _profile_files(self) -> list[str]:
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def _rotate(self):
+        files = self._profile_files()
+        for name in files[:max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def summary(self, top: int = 20) -> dict:
+        """Slowest requests and the code paths where the stored profiles spent their samples."""
+        requests = []
+        inclusive: dict[str, int] = {}
+        leaf: dict[str, int] = {}
+        total = 0
+        if os.path.isdir(self.directory):
+            for name in self._profile_files():
+                try:
+                    with open(os.path.join(self.directory, name)) as f:
+                        profile = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                requests.append({key: profile[key] for key in ("method", "path", "endpoint", "status", "duration_ms", "started_at")})
+                for stack, count in profile["stacks"].items():
+                    frames = stack.split(";")
+                    total += count
+                    leaf[frames[-1]] = leaf.get(frames[-1], 0) + count
+                    for frame in set(frames):
+                        inclusive[frame] = inclusive.get(frame, 0) + count
+
+        def ranking(counts):
+            return [
+                {"frame": frame, "samples": count, "percent": round(100 * count / total, 1)}
+                for frame, count in sorted(counts.items(), key=lambda item: -item[1])[:top]
+            ]
+
+        return {
+            "profiles": len(requests),
+            "samples": total,
+            "slowest_requests": sorted(requests, key=lambda r: -r["duration_ms"])[:top],
+            "self_time": ranking(leaf),
+            "total_time": ranking(inclusive),
+        }
+
+
+def register_profiler(app):
+    """Opt-in with PROFILER_ENABLED; adds GET /profiler/summary for admins."""
+    if not app.config["PROFILER_ENABLED"]:
+        return
+
+    profiler = Sampling_profiler(
+        app.config["PROFILER_DIR"],
+        interval_ms=app.config["PROFILER_INTERVAL_MS"],
+        threshold_ms=app.config["PROFILER_THRESHOLD_MS"],
+        sample_rate=app.config["PROFILER_SAMPLE_RATE"],
+        max_files=app.config["PROFILER_MAX_FILES"],
+    )
+    app.extensions["profiler"] = profiler
+
+    @app.before_request
+    def start_profile():
+        g.profile = profiler.start_request()
+
+    @app.after_request
+    def keep_status(response):
+        g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profiler.finish_request(profile, request.method, request.path, request.endpoint, g.get("profile_status"))
+
+    @app.route("/profiler/summary", methods=["GET"])
+    @role_required("Admin")
+    def profiler_summary():
+        """
+        Profiler summary
+        ---
+        tags:
+          - Monitoring
+        summary: Slowest profiled requests and the code paths they spent time in
+        description: >
+          Aggregates the stored request profiles. `self_time` ranks the frames that were
+          executing when sampled, `total_time` the frames that were anywhere on the stack.
+
+          **Authorization required:** Bearer JWT Token
+          **Allowed roles:** Admin
+
+        security:
+          - Bearer: []
+
+        parameters:
+          - name: top
+            in: query
+            type: integer
+            default: 20
+        responses:
+          200:
+            description: Profile summary
+          403:
+            description: Admin role required
+        """
+        return jsonify(profiler.summary(request.args.get("top", 20, type=int))), 200
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import threading
+import time
+
+from flask import jsonify, Response
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import Config
+from db import SessionLocal
+from ..query.airline_query import all_airline
+from ..query.aircraft_query import all_aircraft, all_manufacturer
+from ..query.baggage_query import get_all_baggage
+from ..query.airport_query import get_all_airports_without_pagination
+from .compression import etag_matches
+
+
+def _load_airports(session):
+    return [airport.to_dict() for airport in get_all_airports_without_pagination(session)]
+
+
+# name -> loader(session) returning a JSON serializable payload
+REFERENCE_DATASETS = {
+    "airlines": all_airline,
+    "aircraft": all_aircraft,
+    "manufacturers": all_manufacturer,
+    "baggage": get_all_baggage,
+    "airports": _load_airports,
+}
+
+
+class Reference_entry:
+
+    def __init__(self, version: int, payload, etag: str, loaded_at: float):
+        self.version = version
+        self.payload = payload
+        self.etag = etag
+        self.loaded_at = loaded_at
+
+
+class Reference_cache:
+    """
+    Process-wide snapshot of the slowly-changing reference tables.
+
+    Every dataset has a version counter; admin write paths call bump() after
+    committing, so the next read reloads the snapshot. The TTL bounds how long
+    a worker can serve data changed by another worker or outside the API.
+    """
+
+    def __init__(self, datasets: dict, ttl_seconds: int = 300):
+        self.datasets = datasets
+        self.ttl_seconds = ttl_seconds
+        self.versions = {name: 0 for name in datasets}
+        self.entries: dict[str, Reference_entry] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, name: str, entry: Reference_entry | None) -> bool:
+        if entry is None or entry.version != self.versions[name]:
+            return False
+        return not self.ttl_seconds or time.monotonic() - entry.loaded_at < self.ttl_seconds
+
+    def _load(self, name: str) -> Reference_entry:
+        version = self.versions[name]
+        session = SessionLocal()
+        try:
+            payload = self.datasets[name](session)
+        finally:
+            session.close()
+
+        body = json.dumps(payload, sort_keys=True, default=str).encode()
+        etag = hashlib.sha1(body).hexdigest()
+        return Reference_entry(version, payload, etag, time.monotonic())
+
+    def get(self, name: str) -> Reference_entry:
+        entry = self.entries.get(name)
+        if self._is_fresh(name, entry):
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            entry = self.entries.get(name)
+            if self._is_fresh(name, entry):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._load(name)
+            self.entries[name] = entry
+            return entry
+
+    def bump(self, *names: str):
+        with self._lock:
+            for name in names:
+                self.versions[name] += 1
+                self.entries.pop(name, None)
+
+    def warm_up(self, logger=None):
+        for name in self.datasets:
+            try:
+                self.get(name)
+            except SQLAlchemyError as e:
+                if logger:
+                    logger.warning("reference cache warm-up failed for %s: %s", name, e)
+
+
+reference_cache = Reference_cache(REFERENCE_DATASETS, ttl_seconds=Config.REFERENCE_CACHE_TTL)
+
+
+def etag_response(payload, etag: str, status: int = 200):
+    """Return 304 when the client already holds this snapshot, the JSON body otherwise."""
+    if etag_matches(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload)
+        response.status_code = status
+    response.set_etag(etag)
+    return response
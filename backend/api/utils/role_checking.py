@@ -1,15 +1,58 @@
+import time
 from functools import wraps
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
-from flask import request, jsonify
+from flask import request, jsonify, g
+
+from .server_timing import add_server_timing
+
+
+class Auth_context:
+    """
+    JWT claims and JSON body of the current request, resolved once and shared
+    by every stacked decorator. Timings are in milliseconds.
+    """
+
+    def __init__(self, claims: dict, verify_ms: float):
+        self.claims = claims
+        self.timings = {"jwt": verify_ms}
+        self._body = None
+
+    @property
+    def role(self):
+        return self.claims.get("role")
+
+    @property
+    def airline_code(self):
+        return self.claims.get("airline_code")
+
+    @property
+    def body(self) -> dict:
+        if self._body is None:
+            start = time.perf_counter()
+            self._body = request.get_json(silent=True) or {}
+            self.timings["body"] = (time.perf_counter() - start) * 1000
+            add_server_timing("auth-body", self.timings["body"])
+        return self._body
+
+
+def get_auth_context() -> Auth_context:
+    context = g.get("auth_context")
+    if context is None:
+        start = time.perf_counter()
+        verify_jwt_in_request()
+        claims = get_jwt()
+        context = Auth_context(claims, (time.perf_counter() - start) * 1000)
+        g.auth_context = context
+        add_server_timing("auth", context.timings["jwt"])
+    return context
+
 
 def role_required(*allowed_roles):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            user_role = claims.get("role")
-            if user_role not in allowed_roles:
+            context = get_auth_context()
+            if context.role not in allowed_roles:
                 return jsonify(msg="Access Denied: role not allowed"), 403
             return fn(*args, **kwargs)
         return wrapper
@@ -20,9 +63,8 @@ def airline_check_param(param_airline_key="airline_code"):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            token_airline = claims.get("airline_code")
+            context = get_auth_context()
+            token_airline = context.airline_code
 
             if not token_airline:
                 return jsonify(msg="Access Denied: no airline in token"), 403
@@ -40,18 +82,16 @@ def airline_check_body(body_airline_key="airline_code"):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            token_airline = claims.get("airline_code")
+            context = get_auth_context()
+            token_airline = context.airline_code
 
             if not token_airline:
                 return jsonify(msg="Access Denied: no airline in token"), 403
 
-            json_data = request.get_json(silent=True) or {}
-            body_airline = json_data.get(body_airline_key)
+            body_airline = context.body.get(body_airline_key)
             if body_airline != token_airline:
                 return jsonify(msg="Access Denied: airline mismatch (BODY)"), 403
 
             return fn(*args, **kwargs)
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,123 @@
+WINDOW = "window"
+AISLE = "aisle"
+
+
+class Cabin_grid:
+    """
+    A cabin as one bitmask per row, bit x standing for the cell in column x.
+    seats marks the cells that are seats, free the seats nobody booked or holds.
+    """
+
+    def __init__(self, id_cabin: int, cells, taken: set[int]):
+        self.id_cabin = id_cabin
+        self.cols = max((x for _, x, _, _ in cells), default=-1) + 1
+        self.rows = max((y for _, _, y, _ in cells), default=-1) + 1
+        self.cell_ids: dict[tuple[int, int], int] = {}
+        self.seats = [0] * self.rows
+        self.free = [0] * self.rows
+        for id_cell, x, y, is_seat in cells:
+            if not is_seat:
+                continue
+            self.cell_ids[(x, y)] = id_cell
+            self.seats[y] |= 1 << x
+            if id_cell not in taken:
+                self.free[y] |= 1 << x
+
+        full = (1 << self.cols) - 1
+        self.window = []
+        self.aisle = []
+        for row in self.seats:
+            # outermost seat of each side; a seat next to a cell that is not a seat faces an aisle
+            self.window.append((row & -row) | (1 << (row.bit_length() - 1)) if row else 0)
+            gaps = full & ~row
+            self.aisle.append(row & ((gaps << 1) | (gaps >> 1)))
+
+    def runs(self, y: int, size: int) -> int:
+        """Bit x set when the size seats from column x rightwards are all free and side by side."""
+        runs = self.free[y]
+        for shift in range(1, size):
+            runs &= self.free[y] >> shift
+        return runs
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _score(grid: Cabin_grid, order: int, seats: list[tuple[int, int]], preference: str | None) -> tuple:
+    """Lower is better: seats matching the preference first, then the front cabins and rows, then the left side."""
+    hits = 0
+    if preference is not None:
+        masks = grid.window if preference == WINDOW else grid.aisle
+        hits = sum(1 for x, y in seats if masks[y] >> x & 1)
+    return (-hits, order, min(y for _, y in seats), min(x for x, _ in seats))
+
+
+def _same_row(grid: Cabin_grid, size: int):
+    """Blocks of size free seats side by side in one row."""
+    for y in range(grid.rows):
+        for x in _bits(grid.runs(y, size)):
+            yield [(x + i, y) for i in range(size)]
+
+
+def _same_row_across_aisle(grid: Cabin_grid, size: int):
+    """size free seats of one row with nothing but aisles between them."""
+    for y in range(grid.rows):
+        free = list(_bits(grid.free[y]))
+        for i in range(len(free) - size + 1):
+            chosen = sum(1 << x for x in free[i:i + size])
+            span = (1 << (free[i + size - 1] + 1)) - (1 << free[i])
+            if not grid.seats[y] & span & ~chosen:
+                yield [(x, y) for x in free[i:i + size]]
+
+
+def _two_rows(grid: Cabin_grid, size: int):
+    """The party split over two consecutive rows, each half side by side, the halves as aligned as possible."""
+    front, back = (size + 1) // 2, size // 2
+    for y in range(grid.rows - 1):
+        front_runs, back_runs = list(_bits(grid.runs(y, front))), list(_bits(grid.runs(y + 1, back)))
+        if not front_runs or not back_runs:
+            continue
+        x1, x2 = min(((a, b) for a in front_runs for b in back_runs), key=lambda pair: abs(pair[0] - pair[1]))
+        yield [(x1 + i, y) for i in range(front)] + [(x2 + i, y + 1) for i in range(back)]
+
+
+ARRANGEMENTS = (
+    ("row", _same_row),
+    ("row_across_aisle", _same_row_across_aisle),
+    ("two_rows", _two_rows),
+)
+
+
+def allocate_seats(grids: list[Cabin_grid], size: int, keep_together: bool = True,
+                   preference: str | None = None) -> dict | None:
+    """
+    Best free seats for a party of size in the given cabins (front cabin first),
+    None if there are not enough. With keep_together the arrangements are tried
+    in order, side by side in one row, one row across the aisle, two consecutive
+    rows, and the best block of the first one that fits wins; otherwise, or when
+    none fits, the best single seats are picked one by one.
+    """
+    if sum(bin(row).count("1") for grid in grids for row in grid.free) < size:
+        return None
+
+    if keep_together:
+        for arrangement, candidates in ARRANGEMENTS:
+            best = None
+            for order, grid in enumerate(grids):
+                for seats in candidates(grid, size):
+                    score = _score(grid, order, seats, preference)
+                    if best is None or score < best[0]:
+                        best = (score, grid, seats)
+            if best is not None:
+                _, grid, seats = best
+                return {"arrangement": arrangement, "seats": [(grid.cell_ids[seat], *seat) for seat in seats]}
+
+    singles = sorted(
+        (_score(grid, order, [(x, y)], preference), grid.cell_ids[(x, y)], x, y)
+        for order, grid in enumerate(grids) for y in range(grid.rows) for x in _bits(grid.free[y])
+    )
+    return {"arrangement": "scattered", "seats": [(id_cell, x, y) for _, id_cell, x, y in singles[:size]]}
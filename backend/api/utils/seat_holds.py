@@ -0,0 +1,218 @@
+import heapq
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from db import SessionLocal
+from ..models.seat_hold import Seat_hold
+
+
+class Seat_hold_conflict(Exception):
+
+    def __init__(self, seats: list[int]):
+        super().__init__(f"Seats already held: {', '.join(map(str, seats))}")
+        self.seats = seats
+
+
+class Seat_hold_limit(Exception):
+    """The customer has too many holds running, or the flight too many held seats."""
+
+
+def _check_limits(user_holds: int, flight_seats: int, id_seats: list[int], max_user_holds: int, max_flight_seats: int):
+    if user_holds >= max_user_holds:
+        raise Seat_hold_limit(f"At most {max_user_holds} seat holds per customer at a time")
+    if flight_seats + len(id_seats) > max_flight_seats:
+        raise Seat_hold_limit("Too many seats of this flight are held right now, try again later")
+
+
+class Memory_seat_hold_store:
+    """
+    Holds of this process only: {id_flight: {id_seat: (token, id_user, expires)}}
+    plus a heap of (expires, id_flight, id_seat, token). Every call first pops the
+    expired heap entries, so sweeping costs O(log n) per hold that ran out and
+    nothing for the ones still alive.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.flights: dict[int, dict[int, tuple[str, int, float]]] = {}
+        self._expiry: list[tuple[float, int, int, str]] = []
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires, id_flight, id_seat, token = heapq.heappop(self._expiry)
+            seats = self.flights.get(id_flight)
+            # the seat may have been released, or held again since
+            if seats is not None and id_seat in seats and seats[id_seat][0] == token and seats[id_seat][2] == expires:
+                del seats[id_seat]
+                if not seats:
+                    del self.flights[id_flight]
+
+    def hold(self, id_flight: int, id_seats: list[int], token: str, id_user: int, expires: float,
+             max_user_holds: int, max_flight_seats: int):
+        with self._lock:
+            self._sweep(time.time())
+            seats = self.flights.setdefault(id_flight, {})
+            taken = [id_seat for id_seat in id_seats if id_seat in seats]
+            if taken:
+                raise Seat_hold_conflict(taken)
+            user_holds = len({
+                token_ for held in self.flights.values() for token_, holder, _ in held.values() if holder == id_user
+            })
+            _check_limits(user_holds, len(seats), id_seats, max_user_holds, max_flight_seats)
+            for id_seat in id_seats:
+                seats[id_seat] = (token, id_user, expires)
+                heapq.heappush(self._expiry, (expires, id_flight, id_seat, token))
+
+    def held(self, id_flight: int) -> dict[int, tuple[str, int]]:
+        with self._lock:
+            self._sweep(time.time())
+            return {id_seat: (token, id_user) for id_seat, (token, id_user, _) in self.flights.get(id_flight, {}).items()}
+
+    def release(self, id_flight: int, id_seats: list[int] | None, token: str, id_user: int | None):
+        """Drop the seats of the hold, all of them when id_seats is None; the heap entries expire on their own."""
+        with self._lock:
+            seats = self.flights.get(id_flight, {})
+            for id_seat in list(seats) if id_seats is None else id_seats:
+                if id_seat in seats and seats[id_seat][0] == token and id_user in (None, seats[id_seat][1]):
+                    del seats[id_seat]
+            if not seats:
+                self.flights.pop(id_flight, None)
+
+
+class Database_seat_hold_store:
+    """
+    Holds in the seat_holds table, shared by every worker. Expired rows are
+    taken over, and purged now and then. The limits are checked before the
+    insert, so concurrent holds of other workers can overshoot them slightly.
+    """
+
+    shared = True
+
+    def __init__(self, purge_interval_seconds: int = 60):
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.monotonic() + purge_interval_seconds
+
+    def hold(self, id_flight: int, id_seats: list[int], token: str, id_user: int, expires: float,
+             max_user_holds: int, max_flight_seats: int):
+        now = datetime.utcnow()
+        session = SessionLocal()
+        try:
+            if time.monotonic() >= self._next_purge:
+                session.execute(delete(Seat_hold).where(Seat_hold.expires_at <= now))
+                self._next_purge = time.monotonic() + self.purge_interval_seconds
+            user_holds = session.scalar(
+                select(func.count(func.distinct(Seat_hold.token)))
+                .where(Seat_hold.id_user == id_user, Seat_hold.expires_at > now)
+            )
+            flight_seats = session.scalar(
+                select(func.count()).select_from(Seat_hold)
+                .where(Seat_hold.id_flight == id_flight, Seat_hold.expires_at > now)
+            )
+            _check_limits(user_holds, flight_seats, id_seats, max_user_holds, max_flight_seats)
+            session.execute(
+                delete(Seat_hold).where(
+                    Seat_hold.id_flight == id_flight,
+                    Seat_hold.id_seat.in_(id_seats),
+                    Seat_hold.expires_at <= now,
+                )
+            )
+            session.add_all(
+                Seat_hold(id_flight=id_flight, id_seat=id_seat, token=token, id_user=id_user,
+                          expires_at=datetime.utcfromtimestamp(expires))
+                for id_seat in id_seats
+            )
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                held = self.held(id_flight)
+                raise Seat_hold_conflict([id_seat for id_seat in id_seats if id_seat in held])
+        finally:
+            session.close()
+
+    def held(self, id_flight: int) -> dict[int, tuple[str, int]]:
+        stmt = select(Seat_hold.id_seat, Seat_hold.token, Seat_hold.id_user).where(
+            Seat_hold.id_flight == id_flight,
+            Seat_hold.expires_at > datetime.utcnow(),
+        )
+        session = SessionLocal()
+        try:
+            return {row.id_seat: (row.token, row.id_user) for row in session.execute(stmt).all()}
+        finally:
+            session.close()
+
+    def release(self, id_flight: int, id_seats: list[int] | None, token: str, id_user: int | None):
+        stmt = delete(Seat_hold).where(Seat_hold.id_flight == id_flight, Seat_hold.token == token)
+        if id_seats is not None:
+            stmt = stmt.where(Seat_hold.id_seat.in_(id_seats))
+        if id_user is not None:
+            stmt = stmt.where(Seat_hold.id_user == id_user)
+        session = SessionLocal()
+        try:
+            session.execute(stmt)
+            session.commit()
+        finally:
+            session.close()
+
+
+class Seat_holds:
+    """
+    Short-lived seat reservations between seat selection and payment. A hold
+    covers one or more seats of a flight, belongs to the customer who made it
+    and is identified by a random token; book converts the hold of a seat for
+    that customer when it gets the same token, and refuses a seat held by
+    anyone else. A customer has at most max_user_holds holds running and a
+    flight at most max_flight_seats held seats, so holds cannot block a cabin.
+    """
+
+    def __init__(self, store, ttl_seconds: int, max_seats: int, max_user_holds: int, max_flight_seats: int):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_seats = max_seats
+        self.max_user_holds = max_user_holds
+        self.max_flight_seats = max_flight_seats
+
+    def hold(self, id_flight: int, id_seats: list[int], id_user: int) -> tuple[str, datetime]:
+        token = secrets.token_urlsafe(16)
+        expires = time.time() + self.ttl_seconds
+        self.store.hold(id_flight, sorted(set(id_seats)), token, id_user, expires,
+                        self.max_user_holds, self.max_flight_seats)
+        return token, datetime.utcfromtimestamp(expires)
+
+    def held_seats(self, id_flight: int) -> set[int]:
+        return set(self.store.held(id_flight))
+
+    def holder(self, id_flight: int, id_seat: int) -> tuple[str, int] | None:
+        """(token, id_user) of the hold on the seat, None when it is not held."""
+        return self.store.held(id_flight).get(id_seat)
+
+    def release(self, id_flight: int, token: str, id_seats: list[int] | None = None, id_user: int | None = None):
+        """Give back the seats of the hold; with id_user only when that customer owns it."""
+        self.store.release(id_flight, id_seats, token, id_user)
+
+
+def create_seat_holds(config) -> Seat_holds:
+    if config.SEAT_HOLD_BACKEND == "database":
+        store = Database_seat_hold_store()
+    elif config.SEAT_HOLD_BACKEND == "memory":
+        store = Memory_seat_hold_store()
+    else:
+        raise ValueError(f"Unknown SEAT_HOLD_BACKEND: {config.SEAT_HOLD_BACKEND}")
+    return Seat_holds(
+        store,
+        ttl_seconds=config.SEAT_HOLD_TTL,
+        max_seats=config.SEAT_HOLD_MAX_SEATS,
+        max_user_holds=config.SEAT_HOLD_MAX_PER_USER,
+        max_flight_seats=config.SEAT_HOLD_MAX_FLIGHT_SEATS,
+    )
+
+
+seat_holds = create_seat_holds(Config)
@@ -0,0 +1,75 @@
+import base64
+
+from flask import request, jsonify
+
+COMPACT_MEDIA_TYPE = "application/vnd.seatmap.compact+json"
+
+
+def wants_compact(req=None) -> bool:
+    """?format=compact, or an Accept header that prefers the compact media type to plain JSON; req defaults to the Flask request."""
+    req = req if req is not None else request
+    if req.args.get("format") == "compact":
+        return True
+    return req.accept_mimetypes.best_match(["application/json", COMPACT_MEDIA_TYPE]) == COMPACT_MEDIA_TYPE
+
+
+def seat_map_response(data, compact: bool, status: int = 200):
+    response = jsonify(data)
+    if compact:
+        response.mimetype = COMPACT_MEDIA_TYPE
+    response.vary.add("Accept")
+    return response, status
+
+
+def bitset(indexes, size: int) -> str:
+    """Base64 of a bitset of size bits, bit i being bit i % 8 of byte i // 8."""
+    mask = 0
+    for i in indexes:
+        mask |= 1 << i
+    return base64.b64encode(mask.to_bytes((size + 7) // 8, "little")).decode("ascii")
+
+
+def compact_cabin(rows: int, cols: int, cells, occupied: set[int] | None = None, held: set[int] = frozenset()) -> dict:
+    """
+    One cabin as bitsets over its grid, cell (x, y) at bit y * cols + x:
+    seats marks the cells that are seats, occupied and held the seats taken by
+    a ticket or a seat hold (left out when occupied is None). The cells of a
+    block get consecutive ids row by row, so base_cell + y * cols + x is the id
+    of a cell; cell_ids lists them row by row in the rare cabin where that does
+    not hold. cells are (id_cell, x, y, is_seat).
+    """
+    size = rows * cols
+    base_cell = min((id_cell for id_cell, _, _, _ in cells), default=None)
+    contiguous = len(cells) == size
+    seats, taken, holds = [], [], []
+    for id_cell, x, y, is_seat in cells:
+        i = y * cols + x
+        if id_cell != base_cell + i:
+            contiguous = False
+        if not is_seat:
+            continue
+        seats.append(i)
+        if occupied is None:
+            continue
+        if id_cell in occupied:
+            taken.append(i)
+        elif id_cell in held:
+            holds.append(i)
+
+    cabin = {
+        "rows": rows,
+        "cols": cols,
+        "base_cell": base_cell if contiguous else None,
+        "seats": bitset(seats, size),
+    }
+    if occupied is not None:
+        cabin["occupied"] = bitset(taken, size)
+        cabin["held"] = bitset(holds, size)
+        cabin["occupied_seats"] = len(taken)
+        cabin["held_seats"] = len(holds)
+    if not contiguous:
+        ids = [0] * size
+        for id_cell, x, y, _ in cells:
+            ids[y * cols + x] = id_cell
+        cabin["cell_ids"] = ids
+    return cabin
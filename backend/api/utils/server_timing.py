@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+
+from flask import g, has_request_context
+
+# metrics of a request served outside of Flask, by the async handlers of the ASGI mode
+_async_timings: ContextVar[list | None] = ContextVar("server_timing", default=None)
+
+
+def add_server_timing(name: str, duration_ms: float, description: str | None = None):
+    """Record a metric for the Server-Timing header of the current response."""
+    if not has_request_context():
+        timings = _async_timings.get()
+        if timings is not None:
+            timings.append((name, duration_ms, description))
+        return
+    if "server_timing" not in g:
+        g.server_timing = []
+    g.server_timing.append((name, duration_ms, description))
+
+
+def collect_server_timing() -> list:
+    """Start the Server-Timing metrics of the request of the current asyncio task and return their list."""
+    timings = []
+    _async_timings.set(timings)
+    return timings
+
+
+def format_server_timing(metrics: list) -> str:
+    parts = []
+    for name, duration_ms, description in metrics:
+        part = f"{name};dur={duration_ms:.2f}"
+        if description:
+            part += f';desc="{description}"'
+        parts.append(part)
+    return ", ".join(parts)
+
+
+def register_server_timing(app):
+
+    @app.after_request
+    def emit_server_timing(response):
+        metrics = g.get("server_timing")
+        if metrics:
+            response.headers.add("Server-Timing", format_server_timing(metrics))
+        return response
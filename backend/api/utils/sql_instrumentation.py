@@ -0,0 +1,149 @@
+import hashlib
+import json
+import re
+import time
+from contextvars import ContextVar
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+from .server_timing import add_server_timing
+
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+# stats of a request served outside of Flask, by the async handlers of the ASGI mode
+_async_stats: ContextVar["Sql_request_stats | None"] = ContextVar("sql_stats", default=None)
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    """Statement with literals and IN lists folded, and a short id for it."""
+    normalized = _STRING.sub("?", statement)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("(?)", normalized)
+    normalized = _SPACES.sub(" ", normalized).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class Sql_request_stats:
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: dict[str, list] = {}  # fingerprint -> [count, total_ms, normalized sql]
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.total_ms += duration_ms
+        key, normalized = fingerprint(statement)
+        entry = self.statements.get(key)
+        if entry is None:
+            self.statements[key] = [1, duration_ms, normalized]
+        else:
+            entry[0] += 1
+            entry[1] += duration_ms
+
+    def repeated(self, threshold: int) -> list[dict]:
+        """Statements run at least threshold times, the usual shape of an N+1."""
+        return sorted(
+            (
+                {"fingerprint": key, "count": count, "ms": round(total_ms, 2), "sql": sql[:300]}
+                for key, (count, total_ms, sql) in self.statements.items()
+                if count >= threshold
+            ),
+            key=lambda item: -item["count"],
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    if has_request_context():
+        stats = g.get("sql_stats")
+    else:
+        stats = _async_stats.get()
+    if stats is not None:
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def instrument_engine(engine):
+    """Time the statements of engine for the request running them, a sync engine or the sync_engine of an async one."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def collect_sql_stats() -> Sql_request_stats:
+    """Start the stats of the request of the current asyncio task, for the requests served outside of Flask."""
+    stats = Sql_request_stats()
+    _async_stats.set(stats)
+    return stats
+
+
+def report_sql_stats(app, stats: Sql_request_stats, method: str, path: str, endpoint: str | None, status: int,
+                     headers):
+    """Server-Timing entry, N+1 warning and debug header of the statements of a finished request."""
+    # DB timings and N+1 warnings are development aids, not something every client or log should get
+    develop = app.debug or app.config["SQL_DEBUG"]
+    if develop:
+        add_server_timing("db", stats.total_ms, f"{stats.count} queries")
+    repeated = stats.repeated(app.config["SQL_N_PLUS_ONE_THRESHOLD"]) if develop else []
+
+    record = {
+        "event": "sql",
+        "method": method,
+        "path": path,
+        "endpoint": endpoint,
+        "status": status,
+        "queries": stats.count,
+        "db_ms": round(stats.total_ms, 2),
+    }
+    if repeated:
+        record["repeated"] = repeated
+        app.logger.warning("possible N+1 %s", json.dumps(record))
+        if app.debug:
+            headers["X-Sql-N-Plus-One"] = ", ".join(
+                f"{item['fingerprint']};count={item['count']}" for item in repeated
+            )
+    elif app.config["SQL_LOG_REQUESTS"]:
+        app.logger.info("%s", json.dumps(record))
+
+
+def register_sql_instrumentation(app, engine):
+    """
+    Count the statements of every request, with their DB time, and group them
+    by fingerprint; the counts feed the request metrics. In debug mode or with
+    SQL_DEBUG the totals go in the Server-Timing header and a statement
+    repeated SQL_N_PLUS_ONE_THRESHOLD times or more is logged as a possible
+    N+1 with its fingerprint, in debug mode also listed in X-Sql-N-Plus-One.
+    """
+    if not app.config["SQL_INSTRUMENTATION"]:
+        return
+
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_sql_stats():
+        g.sql_stats = Sql_request_stats()
+
+    @app.after_request
+    def report_request_sql_stats(response):
+        stats = g.get("sql_stats")
+        if stats is not None:
+            report_sql_stats(
+                app, stats, request.method, request.path, request.endpoint, response.status_code, response.headers
+            )
+        return response
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, StringConstraints, PositiveFloat, Field, field_validator, PositiveInt
-from typing import Annotated, List, Optional
+from pydantic import BaseModel, StringConstraints, PositiveFloat, Field, field_validator, model_validator, PositiveInt
+from typing import Annotated, List, Optional, Literal
 from datetime import date, timedelta, time
 from ..validations.XSS_protection import SafeStr
 
@@ -56,6 +56,20 @@ class Clone_aircraft_seat_map_schema(BaseModel):
             raise ValueError("The IDs must be different.")
         return v
 
+class Clone_aircraft_seat_map_many_schema(BaseModel):
+    airline_code: Annotated[str, StringConstraints(min_length=2, max_length=2, pattern=r'^[A-Z0-9]{2}$')]
+    source_id: PositiveInt
+    target_ids: Annotated[List[PositiveInt], Field(min_length=1, max_length=500)]
+
+    @field_validator("target_ids")
+    @classmethod
+    def distinct_ids(cls, v: list[int], values: dict) -> list[int]:
+        if len(set(v)) != len(v):
+            raise ValueError("The target IDs must be unique.")
+        if values.data.get("source_id") in v:
+            raise ValueError("The source ID cannot be a target.")
+        return v
+
 
 FourDigitInt = Annotated[int, Field(ge=0, le=9999)]
 
@@ -165,6 +179,50 @@ class Route_analytics_schema(BaseModel):
 class Routes_analytics_schema(BaseModel):
     start_date: Optional[date] = None
 
+# longest start_date..end_date span per bucket: the series is filled with a zero
+# row for every empty bucket, so the span sets the size of the answer
+TIMESERIES_MAX_SPAN_DAYS = {"day": 366, "week": 5 * 366, "month": 10 * 366}
+
+class Revenue_timeseries_schema(BaseModel):
+    bucket: Literal["day", "week", "month"] = "day"
+    axis: Literal["sale", "flight"] = "sale"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    route_code: Optional[Annotated[str, StringConstraints(min_length=3, max_length=6, pattern=r'^[A-Z0-9]{2}[0-9]{1,4}$')]] = None
+    id_flight: Optional[PositiveInt] = None
+
+    @model_validator(mode="after")
+    def check_filters(self):
+        if self.route_code is not None and self.id_flight is not None:
+            raise ValueError("route_code and id_flight cannot be used together")
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        if self.id_flight is not None and self.axis != "sale":
+            raise ValueError("a single flight can only be bucketed by sale day")
+        if self.start_date or self.end_date:
+            # an open end is filled from the data, today is where it usually lands
+            start = self.start_date or min(self.end_date, date.today())
+            end = self.end_date or max(self.start_date, date.today())
+            max_days = TIMESERIES_MAX_SPAN_DAYS[self.bucket]
+            if (end - start).days > max_days:
+                raise ValueError(
+                    f"start_date to end_date spans at most {max_days} days with {self.bucket} buckets, "
+                    f"narrow the range or use a larger bucket"
+                )
+        return self
+
+class Performance_analytics_schema(BaseModel):
+    level: Literal["flight", "route"] = "route"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    route_code: Optional[Annotated[str, StringConstraints(min_length=3, max_length=6, pattern=r'^[A-Z0-9]{2}[0-9]{1,4}$')]] = None
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
 
 
 
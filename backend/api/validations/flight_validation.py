@@ -1,5 +1,5 @@
 import bleach
-from pydantic import BaseModel, StringConstraints, field_validator, model_validator, PositiveInt, EmailStr
+from pydantic import BaseModel, StringConstraints, Field, field_validator, model_validator, PositiveInt, EmailStr
 from datetime import date
 from enum import Enum
 from typing import Annotated, Optional, List
@@ -44,6 +44,8 @@ class Ticket_info(BaseModel):
     id_flight: PositiveInt
     id_seat: PositiveInt
     additional_baggage: List[Additional_baggage] = []
+    quote: Optional[str] = None
+    hold_token: Optional[str] = None
 
 
 class SexEnum(str, Enum):
@@ -69,6 +71,20 @@ class Ticket(BaseModel):
     ticket_info: Ticket_info
     passenger_info: Passenger_info
 
+class Seat_preference(str, Enum):
+    WINDOW = "window"
+    AISLE = "aisle"
+
+class Seat_auto_assign_schema(BaseModel):
+    party_size: Annotated[int, Field(ge=1, le=20)]
+    id_class: PositiveInt
+    keep_together: bool = True
+    preference: Optional[Seat_preference] = None
+    hold: bool = False
+
+class Seat_hold_schema(BaseModel):
+    seats: Annotated[List[PositiveInt], Field(min_length=1)]
+
 class Ticket_reservation_schema(BaseModel):
     id_buyer: PositiveInt
     tickets: List[Ticket]
@@ -1,41 +1,61 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
+from db import engine, create_tables
+from sqlalchemy.exc import SQLAlchemyError
 from api.routes import register_routes
 from sqlalchemy.orm import sessionmaker
 from api.models import *
 from flask_jwt_extended import JWTManager
 from api.utils.blacklist import blacklisted_tokens
-from flasgger import Swagger
+from api.utils.reference_cache import reference_cache
+from api.utils.server_timing import register_server_timing
+from api.utils.sql_instrumentation import register_sql_instrumentation
+from api.utils.metrics import register_metrics
+from api.utils.profiler import register_profiler
+from api.utils.json_provider import register_json_provider
+from api.utils.compression import register_compression
+from api.utils.cache import analytics_cache
 
+CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
-def create_app():
+
+def create_app(blueprints=None):
+    """blueprints: names of api.routes.BLUEPRINTS to serve, APP_BLUEPRINTS (all by default) when None."""
     app = Flask(__name__)
-    template = {
-        "swagger": "2.0", 
-        "info": {
-            "title": "Flight App API",
-            "version": "1.0",
-        },
-        "securityDefinitions": {  
-            "Bearer": {
-                "type": "apiKey",
-                "name": "Authorization",
-                "in": "header",
-                "description": "JWT Authorization header using the Bearer scheme. Example: 'Bearer <token>'"
-            }
-        },
-        "security": [{"Bearer": []}],
-    }
-    swagger = Swagger(app, template=template)
     app.config.from_object(Config)
-    CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000"])
-    register_routes(app)
+    register_json_provider(app)
+    if app.config["SWAGGER_ENABLED"]:
+        # imported here so that flasgger is not even loaded when the docs are off
+        from api.utils.api_docs import register_api_docs
+        register_api_docs(app)
+    # first, so that its after_request hook runs last
+    register_compression(app)
+    CORS(app, origins=CORS_ORIGINS)
+    register_routes(app, blueprints if blueprints is not None else app.config["APP_BLUEPRINTS"])
+    register_server_timing(app)
+    register_sql_instrumentation(app, engine)
+    register_metrics(app, engine, {"reference": reference_cache, "analytics": analytics_cache})
+    register_profiler(app)
     jwt = JWTManager(app)
 
+    aux_tables = [Revenue_daily, Flight_fare, Data_version]
+    if app.config["JWT_REVOCATION_BACKEND"] == "database":
+        aux_tables.append(Revoked_token)
+    if app.config["SEAT_HOLD_BACKEND"] == "database":
+        aux_tables.append(Seat_hold)
+    try:
+        create_tables(*aux_tables)
+    except SQLAlchemyError as e:
+        app.logger.warning("could not create auxiliary tables: %s", e)
+
+    if app.config["REFERENCE_CACHE_WARMUP"]:
+        reference_cache.warm_up(app.logger)
+
+    @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
         jti = jwt_payload["jti"]
-        return jti in blacklisted_tokens
+        return blacklisted_tokens.is_revoked(jti)
 
     return app
 
@@ -0,0 +1,38 @@
+import argparse
+
+from app import create_app, CORS_ORIGINS
+from db import create_async_db_engine
+from api.utils.sql_instrumentation import instrument_engine
+from api.routes.async_routes import async_routes
+from api.utils.asgi_adapter import Asgi_app
+
+
+def create_asgi_app(blueprints=None):
+    """
+    The Flask app behind an ASGI adapter: search, seat availability, airport
+    search and analytics are served by async handlers on the asyncio driver of
+    the database, every other route by Flask on a thread.
+
+        uvicorn --factory asgi:create_asgi_app --port 8000
+    """
+    app = create_app(blueprints)
+    engine = create_async_db_engine()
+    if app.config["SQL_INSTRUMENTATION"]:
+        # the async handlers run their statements on this engine, not on the one of create_app
+        instrument_engine(engine.sync_engine)
+    return Asgi_app(app, engine, async_routes(app), CORS_ORIGINS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API in async mode with uvicorn.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run("asgi:create_asgi_app", factory=True, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,629 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib import request as urlrequest, error as urlerror
+
+
+SCENARIOS = [
+    "flight_search",
+    "seat_availability",
+    "book",
+    "airport_search",
+    "analytics_routes",
+    "analytics_timeseries",
+    "analytics_performance",
+]
+
+# scenarios whose endpoints use PostgreSQL functions, skipped on other databases
+POSTGRESQL_ONLY = {
+    "book": "json_agg/json_build_object in get_flight_seat_blocks",
+    "analytics_timeseries": "date_trunc in the revenue buckets",
+}
+
+
+# ---------------------------------------------------------------- synthetic network
+
+def _airport_code(index: int) -> str:
+    letters = ""
+    for _ in range(3):
+        index, rest = divmod(index, 26)
+        letters = chr(ord("A") + rest) + letters
+    return letters
+
+
+def _bulk(session, model, rows: list[dict], chunk: int = 5000):
+    from sqlalchemy import insert
+    for start in range(0, len(rows), chunk):
+        session.execute(insert(model), rows[start:start + chunk])
+
+
+def generate_network(session, rng: random.Random, airports: int, routes: int, flights_per_day: int,
+                     days: int, seat_rows: int, load_factor: float, users: int, airlines: int):
+    """
+    Fill an empty database with a reproducible network: airports, airlines with
+    price policies, one aircraft and seat map per route pair, outbound and return
+    routes (every fifth one with a stopover), flights_per_day route pairs flown
+    every day for the next days and tickets up to load_factor of the seats.
+    """
+    from sqlalchemy import select, func
+    from api.models import (
+        Role, Country, State, City, Airport, Airline, Manufacturer, Aircraft, Aircraft_airline, Class_seat,
+        Cabin, Cell, Airline_price_policy, Class_price_policy, Route, Route_section, Route_detail, Flight,
+        User, Passenger, Ticket, Passenger_ticket,
+    )
+    from api.query.revenue_query import rebuild_revenue_rollup
+    from api.utils.geo import haversine, calculate_arrival_time
+
+    if session.scalar(select(func.count()).select_from(Airport)):
+        raise SystemExit("--generate needs an empty database")
+
+    if not session.scalar(select(func.count()).select_from(Role)):
+        _bulk(session, Role, [
+            {"id_role": 1, "name": "Admin"}, {"id_role": 2, "name": "User"}, {"id_role": 3, "name": "Airline-Admin"},
+        ])
+    _bulk(session, Country, [{"id_country": 1, "name": "Synthetic"}])
+    _bulk(session, State, [{"id_state": 1, "id_country": 1, "name": "Synthetic"}])
+
+    airport_rows = []
+    for i in range(airports):
+        code = _airport_code(i)
+        airport_rows.append({
+            "iata_code": code,
+            "id_city": i + 1,
+            "name": f"Synthetic {code} Airport",
+            "latitude": round(rng.uniform(-55, 65), 4),
+            "longitude": round(rng.uniform(-170, 170), 4),
+        })
+    _bulk(session, City, [{"id_city": i + 1, "id_state": 1, "name": f"City {row['iata_code']}"}
+                          for i, row in enumerate(airport_rows)])
+    _bulk(session, Airport, airport_rows)
+    coordinates = {row["iata_code"]: (row["latitude"], row["longitude"]) for row in airport_rows}
+
+    airline_codes = [f"Z{c}" for c in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXY"[:airlines]]
+    _bulk(session, Airline, [{"iata_code": code, "name": f"Synthetic {code}"} for code in airline_codes])
+    _bulk(session, Class_seat, [
+        {"id_class": 1, "name": "Economy", "code": "Y"}, {"id_class": 2, "name": "Business", "code": "J"},
+    ])
+    _bulk(session, Airline_price_policy, [
+        {"airline_code": code, "fixed_markup": 30, "price_for_km": 0.08, "fee_for_stopover": 25}
+        for code in airline_codes
+    ])
+    multipliers = {1: (1.0, 0), 2: (2.5, 40)}
+    _bulk(session, Class_price_policy, [
+        {"airline_code": code, "id_class": id_class, "price_multiplier": multiplier, "fixed_markup": markup}
+        for code in airline_codes for id_class, (multiplier, markup) in multipliers.items()
+    ])
+
+    business_rows = 3
+    _bulk(session, Manufacturer, [{"id_manufacturer": 1, "name": "Synthetic"}])
+    _bulk(session, Aircraft, [{
+        "id_aircraft": 1, "id_manufacturer": 1, "name": "SYN-1", "cruise_speed_kmh": 850, "cabin_max_cols": 7,
+        "max_seats": seat_rows * 6 + business_rows * 4,
+    }])
+
+    # one aircraft per route pair, business 2-2 and economy 3-3 cabins
+    aircraft_rows, cabin_rows, cell_rows = [], [], []
+    seats_by_aircraft = {}
+    for pair in range(routes):
+        id_aircraft = pair + 1
+        aircraft_rows.append({
+            "id_aircraft_airline": id_aircraft,
+            "airline_code": airline_codes[pair % len(airline_codes)],
+            "id_aircraft_model": 1,
+        })
+        seats_by_aircraft[id_aircraft] = []
+        for id_class, rows, pattern in ((2, business_rows, [1, 1, 0, 1, 1]), (1, seat_rows, [1, 1, 1, 0, 1, 1, 1])):
+            id_cabin = len(cabin_rows) + 1
+            cabin_rows.append({"id_cabin": id_cabin, "id_aircraft": id_aircraft, "id_class": id_class,
+                               "rows": rows, "cols": len(pattern)})
+            for y in range(rows):
+                for x, is_seat in enumerate(pattern):
+                    id_cell = len(cell_rows) + 1
+                    cell_rows.append({"id_cell": id_cell, "id_cabin": id_cabin, "x": x, "y": y, "is_seat": bool(is_seat)})
+                    if is_seat:
+                        seats_by_aircraft[id_aircraft].append((id_cell, id_class))
+    _bulk(session, Aircraft_airline, aircraft_rows)
+    _bulk(session, Cabin, cabin_rows)
+    _bulk(session, Cell, cell_rows)
+
+    codes = [row["iata_code"] for row in airport_rows]
+    sections = {}
+    route_rows, detail_rows = [], []
+    route_pairs = []
+    start_day = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    numbers = {code: 0 for code in airline_codes}
+
+    def add_route(code, airline_code, stops, is_outbound, base_price):
+        route_rows.append({
+            "code": code, "airline_iata_code": airline_code, "base_price": base_price, "is_outbound": is_outbound,
+            "start_date": start_day, "end_date": start_day + timedelta(days=days + 1),
+        })
+        departure = start_day.replace(hour=rng.randrange(6, 20))
+        previous = None
+        for dep, arr in zip(stops, stops[1:]):
+            if (dep, arr) not in sections:
+                sections[(dep, arr)] = len(sections) + 1
+            distance = haversine(*coordinates[dep], *coordinates[arr])
+            arrival = calculate_arrival_time(departure.strftime("%H:%M"), distance)
+            detail = {
+                "id_airline_routes": len(detail_rows) + 1, "code_route": code, "id_route_section": sections[(dep, arr)],
+                "id_next": None, "departure_time": departure.time(), "arrival_time": arrival,
+            }
+            if previous is not None:
+                previous["id_next"] = detail["id_airline_routes"]
+            detail_rows.append(detail)
+            previous = detail
+            departure = datetime.combine(start_day.date(), arrival) + timedelta(minutes=60)
+
+    for pair in range(routes):
+        airline_code = airline_codes[pair % len(airline_codes)]
+        stops = rng.sample(codes, 3 if pair % 5 == 4 and len(codes) > 2 else 2)
+        distance = sum(haversine(*coordinates[a], *coordinates[b]) for a, b in zip(stops, stops[1:]))
+        base_price = int(distance * 0.08 + 30 + 25 * (len(stops) - 2))
+        numbers[airline_code] += 2
+        outbound = f"{airline_code}{numbers[airline_code] - 1}"
+        inbound = f"{airline_code}{numbers[airline_code]}"
+        add_route(outbound, airline_code, stops, True, base_price)
+        add_route(inbound, airline_code, list(reversed(stops)), False, base_price)
+        route_pairs.append((outbound, inbound, pair + 1, base_price, airline_code))
+
+    _bulk(session, Route, route_rows)
+    _bulk(session, Route_section, [
+        {"id_routes_section": id_section, "code_departure_airport": dep, "code_arrival_airport": arr}
+        for (dep, arr), id_section in sections.items()
+    ])
+    # insert the chain tail first so every id_next already exists
+    _bulk(session, Route_detail, list(reversed(detail_rows)))
+
+    flight_rows = []
+    for day in range(days):
+        departure_day = start_day + timedelta(days=day + 1)
+        for j in range(flights_per_day):
+            outbound, inbound, id_aircraft, base_price, airline_code = route_pairs[(day * flights_per_day + j) % routes]
+            for route_code in (outbound, inbound):
+                flight_rows.append({
+                    "id_flight": len(flight_rows) + 1, "id_aircraft": id_aircraft, "route_code": route_code,
+                    "scheduled_departure_day": departure_day, "scheduled_arrival_day": departure_day,
+                    "_base_price": base_price, "_airline": airline_code,
+                })
+    _bulk(session, Flight, [{k: v for k, v in row.items() if not k.startswith("_")} for row in flight_rows])
+
+    _bulk(session, User, [
+        {"id_user": i + 1, "id_role": 2, "name": "Bench", "lastname": f"User{i}",
+         "email": f"bench{i}@example.com", "password": "!"}
+        for i in range(users)
+    ])
+    _bulk(session, Passenger, [
+        {"id_passengers": i + 1, "name": "Bench", "lastname": f"Passenger{i}", "date_birth": datetime(1980, 1, 1),
+         "phone_number": "+390000000", "email": f"passenger{i}@example.com", "passport_number": f"BN{i:07d}",
+         "sex": "M" if i % 2 else "F"}
+        for i in range(users)
+    ])
+
+    ticket_rows, passenger_ticket_rows = [], []
+    now = datetime.utcnow()
+    for flight in flight_rows:
+        seats = seats_by_aircraft[flight["id_aircraft"]]
+        for id_cell, id_class in rng.sample(seats, int(len(seats) * load_factor)):
+            multiplier, markup = multipliers[id_class]
+            id_ticket = len(ticket_rows) + 1
+            ticket_rows.append({
+                "id_ticket": id_ticket, "id_flight": flight["id_flight"], "id_seat": id_cell,
+                "price": flight["_base_price"] * multiplier + markup,
+                "created_at": now - timedelta(days=rng.randrange(60), seconds=rng.randrange(86400)),
+            })
+            passenger_ticket_rows.append({
+                "id_passenger_tickets": id_ticket, "id_ticket": id_ticket,
+                "id_buyer": rng.randrange(users) + 1, "id_passenger": rng.randrange(users) + 1,
+            })
+    _bulk(session, Ticket, ticket_rows)
+    _bulk(session, Passenger_ticket, passenger_ticket_rows)
+    rebuild_revenue_rollup(session)
+    session.commit()
+
+    print(f"generated {airports} airports, {len(route_rows)} routes, {len(flight_rows)} flights, "
+          f"{len(cell_rows)} cells, {len(ticket_rows)} tickets")
+
+
+# ---------------------------------------------------------------- workload
+
+class Workload:
+    """Parameters for the scenarios, sampled once from whatever the database holds."""
+
+    def __init__(self, session, rng: random.Random, sample_size: int = 5000):
+        from sqlalchemy import select
+        from api.models import Route, Route_detail, Route_section, Flight, Cabin, Cell, Ticket, User, Airport
+
+        self.rng = rng
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+        details = session.execute(
+            select(Route_detail.code_route, Route_detail.id_airline_routes, Route_detail.id_next,
+                   Route_section.code_departure_airport, Route_section.code_arrival_airport)
+            .join(Route_section, Route_section.id_routes_section == Route_detail.id_route_section)
+        ).all()
+        by_route = {}
+        for row in details:
+            by_route.setdefault(row.code_route, []).append(row)
+        endpoints = {}
+        for code, rows in by_route.items():
+            pointed = {row.id_next for row in rows}
+            first = next((row for row in rows if row.id_airline_routes not in pointed), rows[0])
+            last = next((row for row in rows if row.id_next is None), rows[-1])
+            endpoints[code] = (first.code_departure_airport, last.code_arrival_airport)
+
+        flights = session.execute(
+            select(Flight.id_flight, Flight.id_aircraft, Flight.route_code, Flight.scheduled_departure_day,
+                   Route.airline_iata_code)
+            .join(Route, Route.code == Flight.route_code)
+            .where(Flight.scheduled_departure_day >= today)
+            .order_by(Flight.scheduled_departure_day)
+            .limit(sample_size)
+        ).all()
+        self.flights = [row for row in flights if row.route_code in endpoints]
+        self.endpoints = endpoints
+        self.airlines = sorted({row.airline_iata_code for row in self.flights})
+
+        self.seats = {}
+        for row in session.execute(
+            select(Cabin.id_aircraft, Cell.id_cell, Cabin.id_class)
+            .join(Cell, Cell.id_cabin == Cabin.id_cabin)
+            .where(Cell.is_seat == True, Cabin.id_aircraft.in_({f.id_aircraft for f in self.flights}))
+        ).all():
+            self.seats.setdefault(row.id_aircraft, []).append((row.id_cell, row.id_class))
+
+        self.taken = {}
+        for row in session.execute(
+            select(Ticket.id_flight, Ticket.id_seat).where(Ticket.id_flight.in_({f.id_flight for f in self.flights}))
+        ).all():
+            self.taken.setdefault(row.id_flight, set()).add(row.id_seat)
+
+        self.users = session.scalars(select(User.id_user).limit(1000)).all()
+        self.airports = session.execute(select(Airport.iata_code, Airport.name).limit(1000)).all()
+        self._booking = 0
+
+    def flight_search(self):
+        if not self.flights:
+            return None
+        flight = self.rng.choice(self.flights)
+        departure, arrival = self.endpoints[flight.route_code]
+        return "POST", "/flight/search", {
+            "departure_airport": departure,
+            "arrival_airport": arrival,
+            "round_trip_flight": False,
+            "direct_flights": False,
+            "departure_date_outbound": flight.scheduled_departure_day.date().isoformat(),
+            "departure_date_return": None,
+            "id_class": self.rng.choice([1, 2]),
+        }
+
+    def seat_availability(self):
+        if not self.flights:
+            return None
+        return "GET", f"/flight/{self.rng.choice(self.flights).id_flight}/seat-availability", None
+
+    def book(self):
+        if not self.flights or not self.users:
+            return None
+        for _ in range(20):
+            flight = self.rng.choice(self.flights)
+            taken = self.taken.setdefault(flight.id_flight, set())
+            free = [id_cell for id_cell, _ in self.seats.get(flight.id_aircraft, []) if id_cell not in taken]
+            if free:
+                break
+        else:
+            return None
+        id_seat = self.rng.choice(free)
+        taken.add(id_seat)
+        self._booking += 1
+        return "POST", "/flight/book", {
+            "id_buyer": self.rng.choice(self.users),
+            "tickets": [{
+                "ticket_info": {"id_flight": flight.id_flight, "id_seat": id_seat, "additional_baggage": []},
+                "passenger_info": {
+                    "name": "Bench", "lastname": "Booking", "date_birth": "1985-06-01",
+                    "phone_number": "+390000001", "email": f"booking{self._booking}-{id_seat}@example.com",
+                    "passport_number": f"BK{self._booking:07d}", "sex": "F",
+                },
+            }],
+        }
+
+    def airport_search(self):
+        if not self.airports:
+            return None
+        airport = self.rng.choice(self.airports)
+        query = airport.iata_code[:2] if self.rng.random() < 0.5 else airport.name.split()[-1][:4]
+        return "GET", f"/airports/search?q={query}", None
+
+    def analytics_routes(self):
+        if not self.airlines:
+            return None
+        return "GET", f"/airline/{self.rng.choice(self.airlines)}/analytics/routes", None
+
+    def analytics_timeseries(self):
+        if not self.airlines:
+            return None
+        bucket = self.rng.choice(["day", "week", "month"])
+        return "GET", f"/airline/{self.rng.choice(self.airlines)}/analytics/timeseries?bucket={bucket}", None
+
+    def analytics_performance(self):
+        if not self.airlines:
+            return None
+        level = self.rng.choice(["route", "flight"])
+        return "GET", f"/airline/{self.rng.choice(self.airlines)}/analytics/performance?level={level}", None
+
+
+# ---------------------------------------------------------------- targets
+
+class Client_target:
+    """In-process requests through the Flask test client, one client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method: str, path: str, body) -> tuple[int, bytes]:
+        client = getattr(self.local, "client", None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+
+class Http_target:
+    """Requests to a running server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method: str, path: str, body) -> tuple[int, bytes]:
+        data = json.dumps(body).encode() if body is not None else None
+        req = urlrequest.Request(self.base_url + path, data=data, method=method,
+                                 headers={"Content-Type": "application/json"})
+        try:
+            with urlrequest.urlopen(req, timeout=60) as response:
+                return response.status, response.read()
+        except urlerror.HTTPError as e:
+            return e.code, e.read()
+
+
+class Asgi_target:
+    """In-process requests through the ASGI app, all of them on one event loop like a single async worker."""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def _request(self, method: str, path: str, body) -> tuple[int, bytes]:
+        path, _, query = path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "scheme": "http",
+            "method": method, "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "server": ("localhost", 80), "client": ("127.0.0.1", 0),
+            "headers": [(b"host", b"localhost"), (b"content-type", b"application/json")],
+        }
+        messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+        started, chunks = [], []
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.append(message["status"])
+            else:
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return started[0], b"".join(chunks)
+
+    def request(self, method: str, path: str, body) -> tuple[int, bytes]:
+        return asyncio.run_coroutine_threadsafe(self._request(method, path, body), self.loop).result()
+
+
+class Query_counter:
+    """SQL statements executed by the current thread, only meaningful for in-process targets."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.local.count = getattr(self.local, "count", 0) + 1
+
+    def reset(self):
+        self.local.count = 0
+
+    def value(self) -> int:
+        return getattr(self.local, "count", 0)
+
+
+# ---------------------------------------------------------------- runner
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def has_data(body: bytes) -> bool:
+    """The body is JSON with something in it: not empty, and not an object whose values are all empty."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return False
+    if isinstance(payload, dict):
+        return any(value not in (None, [], {}, "") for value in payload.values())
+    return payload not in (None, [], "")
+
+
+def run_scenario(target, counter, calls: list, concurrency: int) -> dict:
+    def one(call):
+        if counter is not None:
+            counter.reset()
+        started = time.perf_counter()
+        status, body = target.request(*call)
+        elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, counter.value() if counter is not None else None, status, has_data(body)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, calls))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed for elapsed, _, _, _ in results]
+    queries = [count for _, count, _, _ in results if count is not None]
+    statuses = {}
+    for _, _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    # an empty answer is timed on a path that did no work, it counts as an error too
+    empty = sum(1 for _, _, status, data in results if status < 400 and not data)
+    return {
+        "requests": len(results),
+        "errors": sum(count for status, count in statuses.items() if int(status) >= 400) + empty,
+        "empty": empty,
+        "statuses": statuses,
+        "throughput": round(len(results) / wall, 1) if wall else None,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "queries_per_request": round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+def print_report(results: dict):
+    header = f"{'scenario':<24}{'req':>6}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        queries = "-" if r["queries_per_request"] is None else r["queries_per_request"]
+        print(f"{name:<24}{r['requests']:>6}{r['errors']:>6}{r['throughput']:>9}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{queries:>9}")
+
+
+def compare_with_baseline(results: dict, baseline_path: str, tolerance: float) -> list[str]:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["scenarios"]
+    regressions = []
+    for name, r in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if r["errors"] > before.get("errors", 0):
+            regressions.append(f"{name}: errors {before.get('errors', 0)} -> {r['errors']}")
+        if r["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {r['p95_ms']} ms")
+        if before.get("queries_per_request") is not None and r["queries_per_request"] is not None \
+                and r["queries_per_request"] > before["queries_per_request"]:
+            regressions.append(f"{name}: queries/request {before['queries_per_request']} -> {r['queries_per_request']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic network and benchmark the hot endpoints.")
+    parser.add_argument("--db-url", help="database to use instead of DB_URL, e.g. sqlite:///bench.db")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process test client")
+    parser.add_argument("--asgi", action="store_true",
+                        help="in-process through the async ASGI mode (needs asgiref and asyncpg or aiosqlite)")
+    parser.add_argument("--generate", action="store_true", help="create the schema and the synthetic network first")
+    parser.add_argument("--airports", type=int, default=200)
+    parser.add_argument("--routes", type=int, default=100, help="outbound routes, each with its return route")
+    parser.add_argument("--flights-per-day", type=int, default=40, help="route pairs flown per day")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seat-rows", type=int, default=25, help="economy rows per aircraft")
+    parser.add_argument("--load-factor", type=float, default=0.5, help="share of seats sold when generating")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--airlines", type=int, default=4)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown against the baseline")
+    args = parser.parse_args()
+
+    if args.db_url:
+        os.environ["DB_URL"] = args.db_url
+
+    import logging
+    from db import engine, SessionLocal, sync_id_sequences
+    from api.models import Base, Route_detail
+
+    engine.echo = False
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+
+    if args.generate:
+        # insert_new_route leaves id_next empty on the last section, the deployed column allows it
+        Route_detail.__table__.c.id_next.nullable = True
+        Base.metadata.create_all(engine)
+        session = SessionLocal()
+        try:
+            generate_network(session, rng, args.airports, args.routes, args.flights_per_day, args.days,
+                             args.seat_rows, args.load_factor, args.users, min(args.airlines, 35))
+            sync_id_sequences(session, *(mapper.class_ for mapper in Base.registry.mappers))
+        finally:
+            session.close()
+
+    session = SessionLocal()
+    try:
+        workload = Workload(session, rng)
+    finally:
+        session.close()
+
+    if args.url:
+        target, counter = Http_target(args.url), None
+    elif args.asgi:
+        from asgi import create_asgi_app
+        target, counter = Asgi_target(create_asgi_app()), None
+    else:
+        from app import create_app
+        target, counter = Client_target(create_app()), Query_counter(engine)
+
+    results = {}
+    for name in args.scenarios:
+        if name in POSTGRESQL_ONLY and engine.dialect.name != "postgresql":
+            print(f"{name}: skipped on {engine.dialect.name}, needs PostgreSQL ({POSTGRESQL_ONLY[name]})")
+            continue
+        make_call = getattr(workload, name)
+        calls = [call for call in (make_call() for _ in range(args.warmup + args.requests)) if call is not None]
+        if not calls:
+            print(f"{name}: no data for this scenario, skipped")
+            continue
+        for call in calls[:args.warmup]:
+            target.request(*call)
+        results[name] = run_scenario(target, counter, calls[args.warmup:], args.concurrency)
+
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(),
+                "target": args.url or ("asgi" if args.asgi else "test-client"),
+                "database": engine.dialect.name,
+                "concurrency": args.concurrency,
+                "scenarios": results,
+            }, f, indent=2)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
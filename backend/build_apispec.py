@@ -0,0 +1,30 @@
+import argparse
+import json
+import os
+
+# the spec is always built from the docstrings here, whatever the .env says
+os.environ["SWAGGER_ENABLED"] = "True"
+os.environ["SWAGGER_SPEC_FILE"] = ""
+os.environ["REFERENCE_CACHE_WARMUP"] = "False"
+
+from app import create_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the OpenAPI spec once and write it for SWAGGER_SPEC_FILE.")
+    parser.add_argument("--out", default="apispec.json", help="output file (default: apispec.json)")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        spec = app.extensions["swagger"].get_apispecs()
+
+    tmp = args.out + ".part"
+    with open(tmp, "w") as f:
+        json.dump(spec, f, separators=(",", ":"))
+    os.replace(tmp, args.out)
+    print(f"{args.out}: {len(spec['paths'])} paths")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,56 @@ from datetime import timedelta
 
 load_dotenv()
 
+# placeholder of the example setup, nothing signed with it can be trusted
+DEFAULT_SECRET_KEY = "default-secret"
+
 class Config:
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
-    SECRET_KEY = os.getenv("SECRET_KEY", "default-secret")
+    SECRET_KEY = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "default-jwt-secret")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=3)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=1)
     JWT_BLACKLIST_ENABLED = True
     JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+    JWT_REVOCATION_BACKEND = os.getenv("JWT_REVOCATION_BACKEND", "memory")
+    JWT_REVOCATION_SYNC_SECONDS = int(os.getenv("JWT_REVOCATION_SYNC_SECONDS", "5"))
+    JWT_REVOCATION_BLOOM_BITS = int(os.getenv("JWT_REVOCATION_BLOOM_BITS", str(1 << 20)))
     DB_URL = os.getenv("DB_URL")
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "2"))
+    REFERENCE_CACHE_TTL = int(os.getenv("REFERENCE_CACHE_TTL", "300"))
+    REFERENCE_CACHE_WARMUP = os.getenv("REFERENCE_CACHE_WARMUP", "True").lower() == "true"
+    ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "1024"))
+    ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "True").lower() == "true"
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+    SQL_LOG_REQUESTS = os.getenv("SQL_LOG_REQUESTS", "False").lower() == "true"
+    # N+1 warnings and the db Server-Timing entry outside debug mode, e.g. on a staging server
+    SQL_DEBUG = os.getenv("SQL_DEBUG", "False").lower() == "true"
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+    # bearer token of the Prometheus scraper, /metrics only answers the host itself without it
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
+    PROFILER_THRESHOLD_MS = float(os.getenv("PROFILER_THRESHOLD_MS", "500"))
+    PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+    PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+    PROFILER_DIR = os.getenv("PROFILER_DIR", "profiles")
+    PROFILER_MAX_FILES = int(os.getenv("PROFILER_MAX_FILES", "200"))
+    SWAGGER_ENABLED = os.getenv("SWAGGER_ENABLED", "True").lower() == "true"
+    SWAGGER_SPEC_FILE = os.getenv("SWAGGER_SPEC_FILE")
+    APP_BLUEPRINTS = [name.strip() for name in os.getenv("APP_BLUEPRINTS", "").split(",") if name.strip()] or None
+    FARE_QUOTE_TTL = int(os.getenv("FARE_QUOTE_TTL", "900"))
+    SEAT_HOLD_BACKEND = os.getenv("SEAT_HOLD_BACKEND", "memory")
+    SEAT_HOLD_TTL = int(os.getenv("SEAT_HOLD_TTL", "600"))
+    SEAT_HOLD_MAX_SEATS = int(os.getenv("SEAT_HOLD_MAX_SEATS", "9"))
+    SEAT_HOLD_MAX_PER_USER = int(os.getenv("SEAT_HOLD_MAX_PER_USER", "2"))
+    SEAT_HOLD_MAX_FLIGHT_SEATS = int(os.getenv("SEAT_HOLD_MAX_FLIGHT_SEATS", "50"))
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+    ASYNC_DB_URL = os.getenv("ASYNC_DB_URL")
+    ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "20"))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", "10"))
@@ -1,7 +1,58 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from config import Config
 
 engine = create_engine(Config.DB_URL, echo=True)
 
 SessionLocal = sessionmaker(bind=engine)
+
+
+def create_tables(*models):
+    """Create the tables of the given models if they do not exist yet."""
+    if models:
+        models[0].metadata.create_all(engine, tables=[model.__table__ for model in models], checkfirst=True)
+
+
+def sync_id_sequences(session, *models):
+    """
+    Move the PostgreSQL sequences of the models' integer primary keys past
+    their largest id, after rows were inserted with explicit ids; otherwise
+    the next insert through the API collides with them. Commits.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__table__
+        pk = list(table.primary_key.columns)
+        if len(pk) == 1 and pk[0].autoincrement is not False and str(pk[0].type) == "INTEGER":
+            session.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{pk[0].name}'), "
+                f"COALESCE((SELECT MAX({pk[0].name}) FROM {table.name}), 0) + 1, false) "
+                f"WHERE pg_get_serial_sequence('{table.name}', '{pk[0].name}') IS NOT NULL"
+            ))
+    session.commit()
+
+
+# asyncio driver per database, for the ASGI mode
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database through its asyncio driver, e.g. postgresql+psycopg2://... -> postgresql+asyncpg://..."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine():
+    """Engine of the ASGI mode, ASYNC_DB_URL or DB_URL on its asyncio driver. Imported lazily: needs asyncpg or aiosqlite."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    return create_async_engine(
+        Config.ASYNC_DB_URL or async_database_url(Config.DB_URL),
+        echo=engine.echo,
+        pool_size=Config.ASYNC_DB_POOL_SIZE,
+        max_overflow=Config.ASYNC_DB_MAX_OVERFLOW,
+    )
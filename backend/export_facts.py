@@ -0,0 +1,194 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import Integer, Float, Numeric, Boolean, DateTime, Date
+
+from db import SessionLocal
+from api.models import *
+from api.query.export_query import EXPORT_DATASETS, export_statement
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+WATERMARK_FILE = "_watermarks.json"
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+class Parquet_writer:
+    extension = "parquet"
+
+    def __init__(self, path: str, columns):
+        self.schema = pa.schema([(column.name, _arrow_type(column.type)) for column in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        arrays = [
+            pa.array([row[i] for row in rows], type=field.type)
+            for i, field in enumerate(self.schema)
+        ]
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class Csv_writer:
+    extension = "csv.gz"
+
+    def __init__(self, path: str, columns):
+        self.file = gzip.open(path, "wt", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([column.name for column in columns])
+
+    def write(self, rows):
+        self.writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in rows
+        )
+
+    def close(self):
+        self.file.close()
+
+
+def load_watermarks(out_dir: str) -> dict:
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermarks(out_dir: str, watermarks: dict):
+    path = os.path.join(out_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _load_watermark(value) -> dict | None:
+    if isinstance(value, str):
+        # watermark of the created_at-only format: the lookback window and the rows without created_at go out once more
+        return {"created_at": value, "keys": [], "null_keys": []}
+    return value
+
+
+def export_dataset(session, name: str, out_dir: str, writer_class, watermark: dict | None, lookback: timedelta,
+                   chunk_size: int):
+    """
+    Stream one dataset to a new file through a server-side cursor, chunk_size
+    rows at a time. The watermark is the newest created_at exported, the keys
+    of the rows seen within lookback of it and the keys of the rows without
+    created_at exported so far; rows of those keys are not written again.
+    Returns (rows written, new watermark) and leaves no file behind when
+    nothing changed since the watermark.
+    """
+    since = datetime.fromisoformat(watermark["created_at"]) if watermark and watermark["created_at"] else None
+    stmt, key_name = export_statement(name, since, lookback)
+    columns = list(stmt.selected_columns.keys())
+    created_at_index, key_index = columns.index("created_at"), columns.index(key_name)
+    seen = set(watermark["keys"]) if watermark else set()
+    null_keys = set(watermark["null_keys"]) if watermark else set()
+    # (created_at, key) of the rows read within lookback of the newest one, ascending
+    window = deque()
+
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = os.path.join(out_dir, f"{name}-{stamp}.{writer_class.extension}")
+
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    writer = writer_class(path + ".part", list(stmt.selected_columns))
+    rows_written = 0
+    newest = since
+    try:
+        for rows in result.partitions():
+            fresh = []
+            for row in rows:
+                created_at, key = row[created_at_index], row[key_index]
+                if created_at is None:
+                    if key not in null_keys:
+                        null_keys.add(key)
+                        fresh.append(row)
+                    continue
+                if key not in seen:
+                    fresh.append(row)
+                newest = max(newest, created_at) if newest is not None else created_at
+                window.append((created_at, key))
+                while window[0][0] < newest - lookback:
+                    window.popleft()
+            if fresh:
+                writer.write(fresh)
+                rows_written += len(fresh)
+    finally:
+        writer.close()
+        result.close()
+
+    if rows_written:
+        os.replace(path + ".part", path)
+    else:
+        os.remove(path + ".part")
+    if newest is None and not null_keys:
+        return rows_written, watermark
+    return rows_written, {
+        "created_at": newest.isoformat() if newest is not None else None,
+        "keys": [key for _, key in window],
+        "null_keys": sorted(null_keys),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ticket, flight, route and class facts for offline analysis.")
+    parser.add_argument("--out", default="exports", help="output directory (default: exports)")
+    parser.add_argument("--format", choices=["auto", "parquet", "csv"], default="auto",
+                        help="parquet needs pyarrow; auto falls back to gzip CSV without it")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_DATASETS), default=list(EXPORT_DATASETS))
+    parser.add_argument("--full", action="store_true", help="ignore the watermarks and export every row")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows fetched per round trip")
+    parser.add_argument("--lookback-minutes", type=int, default=60,
+                        help="rows stamped this long before the watermark are read again, for late commits (default: 60)")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and pa is None:
+        parser.error("pyarrow is not installed, use --format csv")
+    writer_class = Parquet_writer if args.format != "csv" and pa is not None else Csv_writer
+
+    os.makedirs(args.out, exist_ok=True)
+    watermarks = load_watermarks(args.out)
+
+    session = SessionLocal()
+    try:
+        for name in args.tables:
+            watermark = None if args.full else _load_watermark(watermarks.get(name))
+            rows, watermark = export_dataset(session, name, args.out, writer_class, watermark,
+                                             timedelta(minutes=args.lookback_minutes), args.chunk_size)
+            if watermark is not None:
+                watermarks[name] = watermark
+            save_watermarks(args.out, watermarks)
+            print(f"{name}: {rows} rows")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+import argparse
+import json
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import select, insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db import SessionLocal, create_tables, sync_id_sequences
+from api.models import *
+from api.utils.data_versions import bump_versions, ALL_SCOPE
+
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dataset")
+STATE_FILE = ".load_state.json"
+READ_SIZE = 1 << 16
+
+
+def iter_json_array(path: str, key: str | None = None):
+    """
+    Yield the objects of a JSON array one by one without loading the file.
+
+    The array is either the whole document or the value of the first
+    occurrence of "key". Yields (object, fraction of the file read).
+    """
+    decoder = json.JSONDecoder()
+    size = os.path.getsize(path) or 1
+    pattern = re.compile(r'\[' if key is None else r'"' + re.escape(key) + r'"\s*:\s*\[')
+
+    with open(path, encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        read = 0
+
+        def fill() -> bool:
+            nonlocal buffer, pos, read
+            chunk = f.read(READ_SIZE)
+            read += len(chunk)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            return bool(chunk)
+
+        match = pattern.search(buffer)
+        while match is None:
+            if not fill():
+                raise ValueError(f"{path}: no array found" + (f" under '{key}'" if key else ""))
+            match = pattern.search(buffer)
+        pos = match.end()
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                if not fill():
+                    raise ValueError(f"{path}: unexpected end of file")
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # the object continues in the next chunk
+                if not fill():
+                    raise
+                continue
+            pos = end
+            yield obj, min(read / size, 1.0)
+
+
+class Loader:
+    """
+    Bulk import of the dataset files in foreign key order.
+
+    Every stage keeps the ids already present in the database in memory, so
+    references are resolved without a query per object, and inserts batch_size
+    rows per executemany with ON CONFLICT DO NOTHING. Progress is committed and
+    recorded in the state file after each batch, so an interrupted run resumes
+    where it stopped and a finished stage is skipped.
+    """
+
+    def __init__(self, session, dataset_dir: str, state_path: str, batch_size: int,
+                 cruise_speed_kmh: int, flight_aircraft: int | None):
+        self.session = session
+        self.dataset_dir = dataset_dir
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.cruise_speed_kmh = cruise_speed_kmh
+        self.flight_aircraft = flight_aircraft
+        self.state = self._load_state()
+
+    # state
+
+    def _load_state(self) -> dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        with open(self.state_path + ".tmp", "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(self.state_path + ".tmp", self.state_path)
+
+    def _done(self, stage: str) -> bool:
+        return self.state.get(stage, {}).get("done", False)
+
+    def _mark(self, stage: str, **values):
+        self.state.setdefault(stage, {}).update(values)
+        self._save_state()
+
+    # helpers
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dataset_dir, name)
+
+    def _ids(self, column) -> set:
+        return set(self.session.scalars(select(column)).all())
+
+    def _insert(self, model, rows: list[dict]):
+        if not rows:
+            return
+        if self.session.get_bind().dialect.name == "sqlite":
+            stmt = sqlite.insert(model).on_conflict_do_nothing()
+        else:
+            stmt = postgresql.insert(model).on_conflict_do_nothing()
+        self.session.execute(stmt, rows)
+
+    def _progress(self, stage: str, count: int, fraction: float):
+        print(f"\r{stage}: {count} objects, {fraction:.0%} of the file", end="", flush=True)
+
+    def _stream(self, stage: str, file_name: str, key: str | None, handle_batch, batch_size: int | None = None):
+        """Feed the file to handle_batch(objects) in committed batches, skipping what a previous run loaded."""
+        batch_size = batch_size or self.batch_size
+        if self._done(stage):
+            print(f"{stage}: already loaded")
+            return
+        path = self._path(file_name)
+        if not os.path.exists(path):
+            print(f"{stage}: {file_name} not found, skipped")
+            return
+
+        skip = self.state.get(stage, {}).get("position", 0)
+        position = 0
+        batch = []
+        fraction = 0.0
+        for obj, fraction in iter_json_array(path, key):
+            position += 1
+            if position <= skip:
+                continue
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                handle_batch(batch)
+                self.session.commit()
+                self._mark(stage, position=position)
+                self._progress(stage, position, fraction)
+                batch = []
+        if batch:
+            handle_batch(batch)
+            self.session.commit()
+        self._mark(stage, position=position, done=True)
+        self._progress(stage, position, 1.0)
+        print()
+
+    # stages
+
+    def load_aircraft(self):
+        manufacturers = self._ids(Manufacturer.id_manufacturer)
+
+        def handle(objects):
+            new_manufacturers = {}
+            aircraft = []
+            for obj in objects:
+                manufacturer = obj["manufacturer"]
+                if manufacturer["id_manufacturer"] not in manufacturers:
+                    new_manufacturers[manufacturer["id_manufacturer"]] = {
+                        "id_manufacturer": manufacturer["id_manufacturer"],
+                        "name": manufacturer["name"],
+                    }
+                aircraft.append({
+                    "id_aircraft": obj["id_aircraft"],
+                    "id_manufacturer": manufacturer["id_manufacturer"],
+                    "name": obj["name"],
+                    "max_seats": obj["max_economy_seats"],
+                    "cabin_max_cols": obj["cabin_max_cols"],
+                    "cruise_speed_kmh": obj.get("cruise_speed_kmh", self.cruise_speed_kmh),
+                })
+            self._insert(Manufacturer, list(new_manufacturers.values()))
+            manufacturers.update(new_manufacturers)
+            self._insert(Aircraft, aircraft)
+
+        self._stream("aircraft", "aircraft.json", None, handle)
+
+    def load_airports(self):
+        cities = self._ids(City.id_city)
+        skipped = []
+
+        def handle(objects):
+            airports = []
+            for obj in objects:
+                if obj["city"]["id_city"] not in cities:
+                    skipped.append(obj["iata_code"])
+                    continue
+                airports.append({
+                    "iata_code": obj["iata_code"],
+                    "id_city": obj["city"]["id_city"],
+                    "name": obj["name"],
+                    "latitude": obj["latitude"],
+                    "longitude": obj["longitude"],
+                })
+            self._insert(Airport, airports)
+
+        self._stream("airports", "airport.json", "airports", handle)
+        if skipped:
+            print(f"airports: {len(skipped)} skipped, city not in the database: {', '.join(skipped[:20])}")
+
+    def load_fleet(self):
+        airlines = self._ids(Airline.iata_code)
+        aircraft = self._ids(Aircraft.id_aircraft)
+        skipped = []
+
+        def handle(objects):
+            new_airlines = {}
+            fleet = []
+            for obj in objects:
+                if obj["aircraft"]["id_aircraft"] not in aircraft:
+                    skipped.append(obj["id_aircraft_airline"])
+                    continue
+                airline = obj["airline"]
+                if airline["iata_code"] not in airlines:
+                    new_airlines[airline["iata_code"]] = {"iata_code": airline["iata_code"], "name": airline["name"]}
+                fleet.append({
+                    "id_aircraft_airline": obj["id_aircraft_airline"],
+                    "airline_code": airline["iata_code"],
+                    "id_aircraft_model": obj["aircraft"]["id_aircraft"],
+                })
+            self._insert(Airline, list(new_airlines.values()))
+            airlines.update(new_airlines)
+            self._insert(Aircraft_airline, fleet)
+
+        self._stream("fleet", "fleet.json", None, handle)
+        if skipped:
+            print(f"fleet: {len(skipped)} aircraft skipped, model not in the database: {skipped[:20]}")
+
+    def load_seat_map(self, file_name: str, id_aircraft_airline: int):
+        """Cabins and cells of one aircraft. Aircraft that already have a seat map are left alone."""
+        stage = f"seat_map:{file_name}:{id_aircraft_airline}"
+        if self.session.get(Aircraft_airline, id_aircraft_airline) is None:
+            print(f"{stage}: aircraft not found, skipped")
+            return
+        if self.session.scalar(select(Cabin.id_cabin).where(Cabin.id_aircraft == id_aircraft_airline).limit(1)):
+            self._mark(stage, done=True)
+        classes = self._ids(Class_seat.id_class)
+
+        def handle(objects):
+            for block in objects:
+                if block["id_class"] not in classes:
+                    raise ValueError(f"{file_name}: class {block['id_class']} not in the database")
+                # one round trip per cabin for its new id, the cells go in one executemany
+                id_cabin = self.session.scalar(
+                    insert(Cabin).values(
+                        id_aircraft=id_aircraft_airline,
+                        id_class=block["id_class"],
+                        rows=block["rows"],
+                        cols=block["cols"],
+                    ).returning(Cabin.id_cabin)
+                )
+                self._insert(Cell, [
+                    {"id_cabin": id_cabin, "x": cell["x"], "y": cell["y"], "is_seat": cell["is_seat"]}
+                    for cell in block["cells"]
+                ])
+
+        # a seat map is all or nothing, so it is loaded as a single batch
+        self._stream(stage, file_name, "seat_map", handle, batch_size=float("inf"))
+
+    def _scan_routes(self, path: str) -> dict:
+        """First pass over the flights: one entry per route with its validity period."""
+        routes = {}
+        for obj, _ in iter_json_array(path):
+            day = _parse_day(obj["departure_day"])
+            route = routes.get(obj["Route_code"])
+            if route is None:
+                routes[obj["Route_code"]] = {
+                    "code": obj["Route_code"],
+                    "airline_iata_code": obj["airline_iata_code"],
+                    "origin": obj["origin"],
+                    "destination": obj["destination"],
+                    "departure_time": obj["departure_time"],
+                    "arrival_time": obj["arrival_time"],
+                    "base_price": obj["base_price"],
+                    "start_date": day,
+                    "end_date": day,
+                }
+            else:
+                route["start_date"] = min(route["start_date"], day)
+                route["end_date"] = max(route["end_date"], day)
+        return routes
+
+    def load_routes(self):
+        """Routes, sections and route details derived from the flights file."""
+        if self._done("routes"):
+            print("routes: already loaded")
+            return
+        path = self._path("flights.json")
+        if not os.path.exists(path):
+            print("routes: flights.json not found, skipped")
+            return
+
+        routes = self._scan_routes(path)
+        existing_routes = self._ids(Route.code)
+        airports = self._ids(Airport.iata_code)
+        sections = {
+            (row.code_departure_airport, row.code_arrival_airport): row.id_routes_section
+            for row in self.session.execute(select(
+                Route_section.id_routes_section,
+                Route_section.code_departure_airport,
+                Route_section.code_arrival_airport
+            )).all()
+        }
+
+        by_endpoints = {(r["origin"], r["destination"]): code for code, r in routes.items()}
+        missing_price = []
+        loaded = 0
+        for code, route in routes.items():
+            if code in existing_routes:
+                continue
+            if route["origin"] not in airports or route["destination"] not in airports:
+                print(f"routes: {code} skipped, airport {route['origin']} or {route['destination']} not in the database")
+                continue
+
+            # the lower number of an outbound/return pair is the outbound route, as insert_new_route creates them
+            reverse = by_endpoints.get((route["destination"], route["origin"]))
+            is_outbound = reverse is None or _route_number(code) < _route_number(reverse)
+            if route["base_price"] is None:
+                missing_price.append(code)
+
+            self._insert(Route, [{
+                "code": code,
+                "airline_iata_code": route["airline_iata_code"],
+                "base_price": route["base_price"] or 0,
+                "start_date": route["start_date"],
+                "end_date": route["end_date"],
+                "is_outbound": is_outbound,
+            }])
+
+            endpoints = (route["origin"], route["destination"])
+            if endpoints not in sections:
+                sections[endpoints] = self.session.scalar(
+                    insert(Route_section).values(
+                        code_departure_airport=route["origin"],
+                        code_arrival_airport=route["destination"],
+                    ).returning(Route_section.id_routes_section)
+                )
+            self.session.execute(insert(Route_detail).values(
+                code_route=code,
+                id_route_section=sections[endpoints],
+                departure_time=datetime.strptime(route["departure_time"], "%H:%M").time(),
+                arrival_time=datetime.strptime(route["arrival_time"], "%H:%M").time(),
+            ))
+            existing_routes.add(code)
+            loaded += 1
+
+        self.session.commit()
+        self._mark("routes", done=True)
+        print(f"routes: {loaded} of {len(routes)} routes loaded")
+        if missing_price:
+            print(f"routes: no base_price in the dataset for {', '.join(missing_price)}, set to 0")
+
+    def load_flights(self):
+        routes = self._ids(Route.code)
+        fleet = {}
+        for row in self.session.execute(
+            select(Aircraft_airline.id_aircraft_airline, Aircraft_airline.airline_code)
+            .order_by(Aircraft_airline.id_aircraft_airline)
+        ).all():
+            fleet.setdefault(row.airline_code, row.id_aircraft_airline)
+        skipped = 0
+
+        def handle(objects):
+            nonlocal skipped
+            flights = []
+            for obj in objects:
+                id_aircraft = self.flight_aircraft or fleet.get(obj["airline_iata_code"])
+                if obj["Route_code"] not in routes or id_aircraft is None:
+                    skipped += 1
+                    continue
+                flights.append({
+                    "id_flight": obj["id_flight"],
+                    "id_aircraft": id_aircraft,
+                    "route_code": obj["Route_code"],
+                    "scheduled_departure_day": _parse_day(obj["departure_day"]),
+                    "scheduled_arrival_day": _parse_day(obj["arrival_day"]),
+                })
+            self._insert(Flight, flights)
+
+        self._stream("flights", "flights.json", None, handle)
+        if skipped:
+            print(f"flights: {skipped} skipped, route not loaded or airline without aircraft")
+
+
+def _parse_day(value: str) -> datetime:
+    # days are dumped by the API in HTTP date format, e.g. "Thu, 01 Jan 2026 00:00:00 GMT"
+    return datetime.strptime(value, "%a, %d %b %Y %H:%M:%S GMT")
+
+
+def _route_number(code: str) -> int:
+    return int(re.sub(r"^[A-Z0-9]{2}", "", code))
+
+
+def _seat_map_arg(value: str):
+    file_name, _, id_aircraft_airline = value.rpartition("=")
+    if not file_name or not id_aircraft_airline.isdigit():
+        raise argparse.ArgumentTypeError("expected FILE=ID_AIRCRAFT_AIRLINE")
+    return file_name, int(id_aircraft_airline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk load the JSON datasets into the database.")
+    parser.add_argument("--dir", default=DATASET_DIR, help="dataset folder (default: backend/dataset)")
+    parser.add_argument("--state", help="progress file used to resume (default: <dir>/.load_state.json)")
+    parser.add_argument("--restart", action="store_true", help="forget the progress of previous runs")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per insert and commit")
+    parser.add_argument("--seat-map", action="append", type=_seat_map_arg, default=[], metavar="FILE=ID",
+                        help="load a seat map file onto an aircraft of the fleet, e.g. seat_map.json=1")
+    parser.add_argument("--cruise-speed", type=int, default=850,
+                        help="cruise speed for aircraft models that do not carry one (km/h)")
+    parser.add_argument("--flight-aircraft", type=int,
+                        help="aircraft assigned to every flight (default: first aircraft of the airline's fleet)")
+    args = parser.parse_args()
+
+    state_path = args.state or os.path.join(args.dir, STATE_FILE)
+    if args.restart and os.path.exists(state_path):
+        os.remove(state_path)
+
+    session = SessionLocal()
+    try:
+        loader = Loader(session, args.dir, state_path, args.batch_size, args.cruise_speed, args.flight_aircraft)
+        loader.load_aircraft()
+        loader.load_airports()
+        loader.load_fleet()
+        for file_name, id_aircraft_airline in args.seat_map:
+            loader.load_seat_map(file_name, id_aircraft_airline)
+        loader.load_routes()
+        loader.load_flights()
+        # these came with their ids from the files, the API inserts after them
+        sync_id_sequences(session, Manufacturer, Aircraft, Aircraft_airline, Flight)
+        # the loaded rows are in no ETag yet
+        create_tables(Data_version)
+        bump_versions(session, ALL_SCOPE)
+        session.commit()
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
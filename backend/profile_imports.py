@@ -0,0 +1,85 @@
+import argparse
+import os
+import subprocess
+import sys
+
+
+STARTUP = """
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+print(f"STARTUP {imported - started} {time.perf_counter() - imported}")
+"""
+
+
+def profile(blueprints: str | None, swagger: bool) -> dict:
+    """One cold start in a fresh interpreter under -X importtime."""
+    env = dict(os.environ, REFERENCE_CACHE_WARMUP="False", SWAGGER_ENABLED=str(swagger))
+    if blueprints is not None:
+        env["APP_BLUEPRINTS"] = blueprints
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP],
+        env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    startup = [line for line in result.stdout.splitlines() if line.startswith("STARTUP ")]
+    if result.returncode or not startup:
+        sys.exit(result.stderr[-2000:])
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+
+    import_s, create_s = map(float, startup[0].split()[1:])
+    return {"import_ms": import_s * 1000, "create_app_ms": create_s * 1000, "modules": modules}
+
+
+def by_package(modules: dict) -> dict:
+    """Self time summed per top-level package, api.* kept per sub-package."""
+    packages = {}
+    for name, (self_us, _) in modules.items():
+        parts = name.split(".")
+        key = ".".join(parts[:2]) if parts[0] == "api" else parts[0]
+        packages[key] = packages.get(key, 0) + self_us
+    return packages
+
+
+def print_profile(label: str, run: dict, top: int):
+    total = run["import_ms"] + run["create_app_ms"]
+    print(f"{label}: {total:.0f} ms (import app {run['import_ms']:.0f} ms, create_app {run['create_app_ms']:.0f} ms), "
+          f"{len(run['modules'])} modules")
+    print(f"  {'package':<32} {'self ms':>8}")
+    for name, self_us in sorted(by_package(run["modules"]).items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<32} {self_us / 1000:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of a cold start of the backend.")
+    parser.add_argument("--blueprints", help="comma separated APP_BLUEPRINTS to profile, e.g. flight,airports")
+    parser.add_argument("--no-swagger", action="store_true", help="profile with SWAGGER_ENABLED=false")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per profile, the fastest is kept (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="packages to list (default: 15)")
+    args = parser.parse_args()
+
+    def fastest(blueprints):
+        runs = [profile(blueprints, not args.no_swagger) for _ in range(args.runs)]
+        return min(runs, key=lambda run: run["import_ms"] + run["create_app_ms"])
+
+    full = fastest(None)
+    print_profile("all blueprints", full, args.top)
+    if args.blueprints:
+        subset = fastest(args.blueprints)
+        print()
+        print_profile(args.blueprints, subset, args.top)
+        skipped = sorted(set(full["modules"]) - set(subset["modules"]))
+        saved = sum(full["modules"][name][0] for name in skipped) / 1000
+        print(f"\n{len(skipped)} modules not imported, {saved:.0f} ms of import self time saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse
+
+from db import SessionLocal, create_tables
+from api.models import *
+from api.query.fare_query import refresh_fares
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reprice the flight fares for today and price the flights still missing from the table (run daily)."
+    )
+    parser.parse_args()
+
+    create_tables(Flight_fare)
+
+    session = SessionLocal()
+    try:
+        with session.begin():
+            repriced, built = refresh_fares(session)
+        print(f"flight_fares: {repriced} repriced, {built} built")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import argparse
+
+from db import SessionLocal, create_tables
+from api.models import *
+from api.query.revenue_query import rebuild_revenue_rollup
+from api.utils.data_versions import bump_versions, ALL_SCOPE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the revenue_daily rollup from the raw tickets.")
+    parser.add_argument("--airline", help="only rebuild the buckets of this airline IATA code")
+    args = parser.parse_args()
+
+    create_tables(Revenue_daily, Data_version)
+
+    session = SessionLocal()
+    try:
+        with session.begin():
+            buckets = rebuild_revenue_rollup(session, args.airline)
+            bump_versions(session, f"analytics:{args.airline}" if args.airline else ALL_SCOPE)
+        print(f"revenue_daily rebuilt: {buckets} buckets")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()